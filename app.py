@@ -1,13 +1,18 @@
 import os
+import io
 import re
 import time
 import uuid
+import pstats
+import cProfile
 import logging
+import threading
 import pandas as pd
 import requests
 from bs4 import BeautifulSoup
-from flask import Flask, request, jsonify, render_template, send_file, send_from_directory
+from flask import Flask, Response, g, request, jsonify, render_template, send_file, send_from_directory
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
 
 # Настройка логирования
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
@@ -26,6 +31,88 @@ DEFAULT_HEADERS = {"User-Agent": "Mozilla/5.0"}
 price_cache = {}
 column_mapping = {}
 
+# Метрики Prometheus. При нескольких процессах (gunicorn) задайте PROMETHEUS_MULTIPROC_DIR:
+# каждый процесс пишет значения в файлы этого каталога, а /metrics собирает их вместе.
+LOOKUP_SOURCE = "marketplace"
+REQUEST_SECONDS = Histogram("price_http_request_seconds", "Время обработки HTTP-запроса", ["route", "method", "status"])
+LOOKUP_SECONDS = Histogram("price_lookup_seconds", "Время поиска цены одного артикула", ["source"])
+LOOKUP_ERRORS = Counter("price_lookup_errors_total", "Ошибки поиска цены", ["source"])
+LOOKUPS_IN_FLIGHT = Gauge("price_lookups_in_flight", "Поиски цены, выполняемые сейчас", ["source"], multiprocess_mode="livesum")
+ROWS_PROCESSED = Counter("price_rows_processed_total", "Обработанные строки прайсов")
+JOB_SECONDS = Histogram(
+    "price_job_seconds",
+    "Длительность обработки файла в /process",
+    ["status"],
+    buckets=(0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, float("inf")),
+)
+
+
+def lookup_article(article, price, source=LOOKUP_SOURCE):
+    """process_article с замером времени, ошибок и числа одновременных поисков."""
+    in_flight = LOOKUPS_IN_FLIGHT.labels(source)
+    in_flight.inc()
+    started = time.perf_counter()
+    try:
+        return process_article(article, price)
+    except Exception:
+        LOOKUP_ERRORS.labels(source).inc()
+        raise
+    finally:
+        LOOKUP_SECONDS.labels(source).observe(time.perf_counter() - started)
+        in_flight.dec()
+
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def observe_request(response):
+    started = g.pop("request_started", None)
+    if started is not None:
+        # Шаблон маршрута, а не путь: /download/<file_id> не порождает новую серию на каждый файл.
+        route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        REQUEST_SECONDS.labels(route, request.method, str(response.status_code)).observe(time.perf_counter() - started)
+    return response
+
+
+@app.route('/metrics')
+def metrics():
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
+    return Response(generate_latest(), mimetype=CONTENT_TYPE_LATEST)
+
+# Профилирование /process по запросу: заголовок X-Profile: 1 или "profile": true в JSON.
+# cProfile видит только поток запроса (pandas, iterrows, to_excel); поиски цен в пуле потоков
+# видны в нём как ожидание as_completed. Одновременно профилируется не больше одного задания.
+PROFILE_HEADER = "X-Profile"
+FILE_ID_RE = re.compile(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}")
+profile_lock = threading.Lock()
+
+
+def profile_requested(data):
+    return request.headers.get(PROFILE_HEADER, "").strip().lower() in {"1", "true", "yes"} or bool(data.get("profile"))
+
+
+def profile_path(file_id):
+    return os.path.join(RESULT_FOLDER, f"{file_id}_profile.pstats")
+
+
+def run_profiled(file_id, job):
+    """Выполнить job под cProfile и сохранить pstats рядом с результатом."""
+    profiler = cProfile.Profile()
+    response = profiler.runcall(job)
+    status = response[1] if isinstance(response, tuple) else 200
+    if status != 200:
+        return response
+    profiler.dump_stats(profile_path(file_id))
+    data = response.get_json()
+    data["profile_url"] = f"/profile/{file_id}"
+    return jsonify(data)
+
 # Разрешаем доступ к статическим файлам
 @app.route('/static/<path:filename>')
 def static_files(filename):
@@ -65,6 +152,29 @@ def confirm_mapping():
 
 @app.route('/process', methods=['POST'])
 def process_file():
+    started = time.perf_counter()
+    data = request.get_json(silent=True) or {}
+    file_id = str(data.get("file_id") or "")
+    profile = profile_requested(data) and FILE_ID_RE.fullmatch(file_id) is not None
+    if profile and not profile_lock.acquire(blocking=False):
+        logging.warning(f"Профилирование {file_id} пропущено: уже выполняется другое")
+        profile = False
+    # Исключение из задания тоже попадает в price_job_seconds, со статусом error.
+    status = 500
+    try:
+        if profile:
+            try:
+                response = run_profiled(file_id, run_process_job)
+            finally:
+                profile_lock.release()
+        else:
+            response = run_process_job()
+        status = response[1] if isinstance(response, tuple) else 200
+        return response
+    finally:
+        JOB_SECONDS.labels("success" if status == 200 else "error").observe(time.perf_counter() - started)
+
+def run_process_job():
     file_id = request.json.get("file_id")
     file_path = os.path.join(UPLOAD_FOLDER, f"{file_id}.xlsx")
 
@@ -84,7 +194,7 @@ def process_file():
 
     market_prices, price_diffs, comments = [], [], []
     with ThreadPoolExecutor(max_workers=10) as executor:
-        futures = {executor.submit(process_article, str(row[article_col]).strip(), row[price_col]): idx for idx, row in df.iterrows()}
+        futures = {executor.submit(lookup_article, str(row[article_col]).strip(), row[price_col]): idx for idx, row in df.iterrows()}
 
         for future in as_completed(futures):
             idx = futures[future]
@@ -97,6 +207,7 @@ def process_file():
             market_prices.append(market_price)
             price_diffs.append(price_diff)
             comments.append(comment)
+            ROWS_PROCESSED.inc()
 
     df["Рыночная цена"], df["Разница в цене"], df["Комментарий"] = market_prices, price_diffs, comments
 
@@ -112,5 +223,17 @@ def download_file(file_id):
         return send_file(file_path, as_attachment=True)
     return jsonify({"status": "error", "message": "Файл не найден"}), 404
 
+@app.route('/profile/<file_id>', methods=['GET'])
+def download_profile(file_id):
+    """pstats-файл профиля; ?format=text — 50 самых дорогих функций по cumulative."""
+    file_path = profile_path(file_id)
+    if not FILE_ID_RE.fullmatch(file_id) or not os.path.exists(file_path):
+        return jsonify({"status": "error", "message": "Профиль не найден"}), 404
+    if request.args.get("format") == "text":
+        stream = io.StringIO()
+        pstats.Stats(file_path, stream=stream).sort_stats("cumulative").print_stats(50)
+        return Response(stream.getvalue(), mimetype="text/plain")
+    return send_file(file_path, as_attachment=True)
+
 if __name__ == '__main__':
     app.run(host="0.0.0.0", port=int(os.environ.get("PORT", 5000)), debug=True)
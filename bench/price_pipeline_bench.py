@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""End-to-end benchmark of the Flask price pipeline: /upload -> /process -> /download.
+
+For every requested size a synthetic Excel price list is generated (article,
+name, price; `--duplicate-ratio` of the rows repeat an earlier article), and
+the app is driven through Flask's test client in a fresh subprocess so that
+peak RSS belongs to that size alone. Marketplace lookups go to a local stub
+HTTP server with configurable latency.
+
+app.py calls `process_article(article, price)` but does not define it, so the
+harness installs a lookup with that signature into the app module: it asks the
+stub server through `app.session` and memoises prices in `app.price_cache`,
+which is where the cache hit ratio comes from.
+
+Reported per size: rows/sec for /process, peak RSS, Excel read and write time
+(every pandas.read_excel / DataFrame.to_excel call of the run), cache hit ratio
+and marketplace requests.
+
+Example:
+    python bench/price_pipeline_bench.py --rows 1000 --rows 10000 --latency-ms 20 --duplicate-ratio 0.3
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import io
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+APP_PATH = ROOT / "app.py"
+DEFAULT_SIZES = (1000, 10000, 100000)
+
+
+class StubMarketplace:
+    """GET /price?article=X -> {"article": X, "price": <stable pseudo-random price>} after `latency_ms`."""
+
+    def __init__(self, latency_ms: float = 0.0, miss_ratio: float = 0.0) -> None:
+        self.latency_ms = latency_ms
+        self.miss_ratio = miss_ratio
+        self.requests = 0
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format: str, *args: Any) -> None:  # noqa: A002 - BaseHTTPRequestHandler signature
+                return
+
+            def do_GET(self) -> None:
+                article = urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query).get("article", [""])[0]
+                body = json.dumps(stub.lookup(article)).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/price"
+
+    def lookup(self, article: str) -> Dict[str, Any]:
+        with self.lock:
+            self.requests += 1
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000.0)
+        rng = random.Random(article)
+        if rng.random() < self.miss_ratio:
+            return {"article": article, "price": None}
+        return {"article": article, "price": round(rng.uniform(50, 50000), 2)}
+
+    def __enter__(self) -> "StubMarketplace":
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def synthetic_rows(rows: int, duplicate_ratio: float, seed: int = 0) -> List[Tuple[str, str, float]]:
+    rng = random.Random(seed)
+    articles: List[str] = []
+    result: List[Tuple[str, str, float]] = []
+    for index in range(rows):
+        if articles and rng.random() < duplicate_ratio:
+            article = rng.choice(articles)
+        else:
+            article = f"ART-{index:07d}"
+            articles.append(article)
+        result.append((article, f"Товар {article}", round(rng.uniform(50, 50000), 2)))
+    return result
+
+
+def install_lookup(app_module: Any, stub_url: str, stats: Dict[str, int]) -> None:
+    """Provide the `process_article` that app.py expects, backed by the stub marketplace."""
+    lock = threading.Lock()
+
+    def process_article(article: str, price: Any) -> Tuple[Any, Any, str]:
+        with lock:
+            cached = article in app_module.price_cache
+            stats["cache_hits" if cached else "cache_misses"] += 1
+        if not cached:
+            response = app_module.session.get(stub_url, params={"article": article}, headers=app_module.DEFAULT_HEADERS, timeout=30)
+            response.raise_for_status()
+            with lock:
+                app_module.price_cache[article] = response.json().get("price")
+        market_price = app_module.price_cache[article]
+        if market_price is None:
+            return "Нет данных", "Нет данных", "Товар не найден"
+        return market_price, round(float(price) - market_price, 2), "Цена найдена"
+
+    app_module.process_article = process_article
+
+
+def load_app(workdir: Path) -> Any:
+    # app.py creates uploads/ and results/ relative to the working directory on import.
+    os.chdir(workdir)
+    spec = importlib.util.spec_from_file_location("price_app", APP_PATH)
+    module = importlib.util.module_from_spec(spec)
+    assert spec.loader is not None
+    spec.loader.exec_module(module)
+    return module
+
+
+def time_excel_io(pd: Any, timings: Dict[str, float], read_engine: str, write_engine: str) -> None:
+    """Wrap pandas.read_excel / DataFrame.to_excel to accumulate their time and force the chosen engines."""
+    read_excel = pd.read_excel
+    to_excel = pd.DataFrame.to_excel
+
+    def timed_read_excel(*args: Any, **kwargs: Any) -> Any:
+        if read_engine:
+            kwargs.setdefault("engine", read_engine)
+        started = time.perf_counter()
+        try:
+            return read_excel(*args, **kwargs)
+        finally:
+            timings["excel_read_seconds"] += time.perf_counter() - started
+
+    def timed_to_excel(self: Any, *args: Any, **kwargs: Any) -> Any:
+        if write_engine:
+            kwargs.setdefault("engine", write_engine)
+        started = time.perf_counter()
+        try:
+            return to_excel(self, *args, **kwargs)
+        finally:
+            timings["excel_write_seconds"] += time.perf_counter() - started
+
+    pd.read_excel = timed_read_excel
+    pd.DataFrame.to_excel = timed_to_excel
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux and bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_size(rows: int, args: argparse.Namespace) -> Dict[str, Any]:
+    """One pipeline run; meant to be the only work of its process so peak RSS is attributable."""
+    with tempfile.TemporaryDirectory() as tmp, StubMarketplace(args.latency_ms, args.miss_ratio) as stub:
+        workdir = Path(tmp)
+        app_module = load_app(workdir)
+        pd = app_module.pd
+        stats = {"cache_hits": 0, "cache_misses": 0}
+        timings = {"excel_read_seconds": 0.0, "excel_write_seconds": 0.0}
+        install_lookup(app_module, stub.url, stats)
+
+        started = time.perf_counter()
+        source = pd.DataFrame(synthetic_rows(rows, args.duplicate_ratio, args.seed), columns=["Артикул", "Наименование", "Цена"])
+        buffer = io.BytesIO()
+        source.to_excel(buffer, index=False, engine=args.write_engine or None)
+        generate_seconds = time.perf_counter() - started
+
+        time_excel_io(pd, timings, args.read_engine, args.write_engine)
+        client = app_module.app.test_client()
+
+        started = time.perf_counter()
+        upload = client.post("/upload", data={"file": (io.BytesIO(buffer.getvalue()), "prices.xlsx")}, content_type="multipart/form-data").get_json()
+        upload_seconds = time.perf_counter() - started
+        if upload.get("status") != "success":
+            raise RuntimeError(f"/upload failed: {upload}")
+        client.post("/confirm-mapping", json={"article_column": "Артикул", "price_column": "Цена"})
+
+        started = time.perf_counter()
+        processed = client.post("/process", json={"file_id": upload["file_id"]}).get_json()
+        process_seconds = time.perf_counter() - started
+        if processed.get("status") != "success":
+            raise RuntimeError(f"/process failed: {processed}")
+
+        started = time.perf_counter()
+        download = client.get(processed["download_url"])
+        download_bytes = len(download.data)
+        download_seconds = time.perf_counter() - started
+
+        lookups = stats["cache_hits"] + stats["cache_misses"]
+        return {
+            "rows": rows,
+            "duplicate_ratio": args.duplicate_ratio,
+            "latency_ms": args.latency_ms,
+            "read_engine": args.read_engine or "default",
+            "write_engine": args.write_engine or "default",
+            "rows_per_second": round(rows / process_seconds, 1) if process_seconds else None,
+            "generate_seconds": round(generate_seconds, 3),
+            "upload_seconds": round(upload_seconds, 3),
+            "process_seconds": round(process_seconds, 3),
+            "download_seconds": round(download_seconds, 3),
+            "download_bytes": download_bytes,
+            "excel_read_seconds": round(timings["excel_read_seconds"], 3),
+            "excel_write_seconds": round(timings["excel_write_seconds"], 3),
+            "cache_hit_ratio": round(stats["cache_hits"] / lookups, 4) if lookups else None,
+            "marketplace_requests": stub.requests,
+            "peak_rss_mb": peak_rss_mb(),
+        }
+
+
+def child_command(rows: int, args: argparse.Namespace) -> List[str]:
+    command = [
+        sys.executable, str(Path(__file__).resolve()), "--single", str(rows),
+        "--duplicate-ratio", str(args.duplicate_ratio),
+        "--latency-ms", str(args.latency_ms),
+        "--miss-ratio", str(args.miss_ratio),
+        "--seed", str(args.seed),
+    ]
+    if args.read_engine:
+        command += ["--read-engine", args.read_engine]
+    if args.write_engine:
+        command += ["--write-engine", args.write_engine]
+    return command
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark /upload -> /process -> /download of the price app")
+    parser.add_argument("--rows", type=int, action="append", help=f"Rows in the synthetic price list; repeat for several (default: {', '.join(map(str, DEFAULT_SIZES))})")
+    parser.add_argument("--duplicate-ratio", type=float, default=0.3, help="Share of rows repeating an earlier article")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Stub marketplace latency per lookup")
+    parser.add_argument("--miss-ratio", type=float, default=0.0, help="Share of articles the stub marketplace does not know")
+    parser.add_argument("--read-engine", default="", help="pandas.read_excel engine (e.g. openpyxl, calamine)")
+    parser.add_argument("--write-engine", default="", help="DataFrame.to_excel engine (e.g. openpyxl, xlsxwriter)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--single", type=int, default=0, help=argparse.SUPPRESS)
+    parser.add_argument("--output", default="", help="Write the JSON report here as well as to stdout")
+    args = parser.parse_args(argv)
+
+    if args.single:
+        print(json.dumps(run_size(args.single, args), ensure_ascii=False))
+        return 0
+
+    results = []
+    for rows in args.rows or DEFAULT_SIZES:
+        completed = subprocess.run(child_command(rows, args), check=True, capture_output=True, text=True)
+        results.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+    text = json.dumps({"results": results}, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
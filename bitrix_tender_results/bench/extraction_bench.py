@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""Extraction benchmark over the saved EIS page corpus in bench/eis_corpus.
+
+Each case directory holds supplier-results.html, protocol.html,
+common-info.html and meta.json (procurement_number, deal_id, task_id and an
+optional `inflate` section that blows marker comments up into thousands of
+rows, so huge pages do not have to be stored). expected_44fz.json and
+expected_eis.json are the payloads the current extractors produce; tests
+compare against them so a faster extractor cannot silently change output.
+
+For every case the benchmark times strip_html, each extractor of
+collect_44fz_result and collect_eis_result, and the full collect_44fz /
+collect_from_text, and reports pages/sec and tracemalloc peak memory of the
+full collectors. Every timing round is divided by a fixed calibration workload
+timed right before it, so extraction_baseline.json survives a change of
+machine reasonably well. The corpus totals of strip_html and the full
+collectors are gated (every metric of every case with --gate-all): slower, or
+a larger memory peak, than the baseline plus the tolerance is a regression and
+the exit code is 1.
+
+Examples:
+    python bitrix_tender_results/bench/extraction_bench.py
+    python bitrix_tender_results/bench/extraction_bench.py --write-baseline
+    python bitrix_tender_results/bench/extraction_bench.py --update-expected
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+BENCH_DIR = Path(__file__).resolve().parent
+SCRIPT_DIR = BENCH_DIR.parent / "scripts"
+if str(SCRIPT_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPT_DIR))
+
+import collect_44fz_result  # noqa: E402
+import collect_eis_result  # noqa: E402
+
+CORPUS_DIR = BENCH_DIR / "eis_corpus"
+BASELINE_PATH = BENCH_DIR / "extraction_baseline.json"
+PAGE_FILES = {
+    "supplier_html": "supplier-results.html",
+    "protocol_html": "protocol.html",
+    "common_html": "common-info.html",
+}
+DEFAULT_TOLERANCE = 0.50
+DEFAULT_MEMORY_TOLERANCE = 0.20
+GATED_METRICS = ("44fz.strip_html", "44fz.collect_44fz", "eis.strip_html", "eis.collect_from_text")
+# Slowdowns smaller than this (in calibration units, some tens of microseconds) are timer noise.
+NOISE_FLOOR = 0.05
+
+
+def inflate(raw_html: str, rules: List[Dict[str, Any]]) -> str:
+    for rule in rules:
+        block = str(rule["block"])
+        rows = "".join(block.replace("{n}", str(number)) for number in range(1, int(rule["repeat"]) + 1))
+        raw_html = raw_html.replace(str(rule["marker"]), rows)
+    return raw_html
+
+
+def load_case(case_dir: Path) -> Dict[str, Any]:
+    meta = json.loads((case_dir / "meta.json").read_text(encoding="utf-8"))
+    inflate_rules = meta.get("inflate") or {}
+    pages: Dict[str, str] = {}
+    for key, filename in PAGE_FILES.items():
+        path = case_dir / filename
+        raw_html = path.read_text(encoding="utf-8") if path.exists() else ""
+        pages[key] = inflate(raw_html, inflate_rules.get(filename) or [])
+    return {
+        "name": case_dir.name,
+        "dir": case_dir,
+        "procurement_number": str(meta["procurement_number"]),
+        "deal_id": meta.get("deal_id"),
+        "task_id": meta.get("task_id"),
+        "pages": pages,
+    }
+
+
+def load_corpus(corpus_dir: Path = CORPUS_DIR, names: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    cases = [load_case(path) for path in sorted(corpus_dir.iterdir()) if (path / "meta.json").is_file()]
+    return [case for case in cases if not names or case["name"] in names]
+
+
+def collect_44fz(case: Dict[str, Any]) -> Dict[str, Any]:
+    return collect_44fz_result.collect_44fz_from_pages(case["procurement_number"], case["deal_id"], case["task_id"], case["pages"], [])
+
+
+def collect_eis(case: Dict[str, Any]) -> Dict[str, Any]:
+    """What collect_eis_result.py does for a saved supplier-results page."""
+    text = collect_eis_result.strip_html(case["pages"]["supplier_html"])
+    return collect_eis_result.collect_from_text(text, case["procurement_number"], case["deal_id"], case["task_id"])
+
+
+def case_benchmarks(case: Dict[str, Any]) -> Dict[str, Callable[[], Any]]:
+    c44 = collect_44fz_result
+    eis = collect_eis_result
+    reg = case["procurement_number"]
+    pages = case["pages"]
+    supplier = c44.strip_html(pages["supplier_html"])
+    protocol = c44.strip_html(pages["protocol_html"])
+    common = c44.strip_html(pages["common_html"])
+    combined = "\n".join([common, supplier, protocol])
+    eis_text = eis.compact_text(eis.strip_html(pages["supplier_html"]))
+    return {
+        "44fz.strip_html": lambda: [c44.strip_html(raw) for raw in pages.values()],
+        "44fz.extract_protocol_meta": lambda: c44.extract_protocol_meta(protocol or supplier, reg),
+        "44fz.extract_applications_count_from_protocol": lambda: c44.extract_applications_count_from_protocol(protocol),
+        "44fz.extract_winner_from_supplier_results": lambda: c44.extract_winner_from_supplier_results(supplier),
+        "44fz.money_after": lambda: (
+            c44.money_after(supplier, ["Предложение участника", "Предложение о цене", "Цена, предложенная участником"], after=900),
+            c44.money_after(supplier, ["Цена контракта"], after=900),
+            c44.money_after(common, ["Начальная максимальная цена контракта", "Начальная (максимальная) цена контракта", "НМЦК"], after=900),
+        ),
+        "44fz.determine_price_basis": lambda: c44.determine_price_basis(None, None, combined),
+        "44fz.extract_failed_reason": lambda: c44.extract_failed_reason(protocol, supplier),
+        "44fz.extract_purchase_name": lambda: c44.extract_purchase_name(common, supplier),
+        "44fz.extract_customer_name": lambda: c44.extract_customer_name(common, supplier),
+        "44fz.extract_procedure_type": lambda: c44.extract_procedure_type(combined),
+        "44fz.extract_status": lambda: c44.extract_status(combined),
+        "44fz.extract_contract_registry_number": lambda: c44.extract_contract_registry_number(supplier),
+        "44fz.extract_contract_publish_date": lambda: c44.extract_contract_publish_date(supplier),
+        "44fz.collect_44fz": lambda: collect_44fz(case),
+        "eis.strip_html": lambda: eis.strip_html(pages["supplier_html"]),
+        "eis.extract_protocol": lambda: eis.extract_protocol(eis_text, reg),
+        "eis.extract_failed_reason": lambda: eis.extract_failed_reason(eis_text),
+        "eis.extract_participants_count": lambda: eis.extract_participants_count(eis_text),
+        "eis.find_money_after": lambda: eis.find_money_after(eis_text, ["Цена контракта"], window=700),
+        "eis.extract_name_after": lambda: eis.extract_name_after(eis_text, ["Поставщик", "Подрядчик", "Исполнитель"]),
+        "eis.extract_purchase_name": lambda: eis.extract_purchase_name(eis_text),
+        "eis.extract_customer_name": lambda: eis.extract_customer_name(eis_text),
+        "eis.extract_procedure_type": lambda: eis.extract_procedure_type(eis_text),
+        "eis.extract_status": lambda: eis.extract_status(eis_text),
+        "eis.extract_law": lambda: eis.extract_law(eis_text),
+        "eis.extract_registry_contract_number": lambda: eis.extract_registry_contract_number(eis_text),
+        "eis.extract_contract_publish_date": lambda: eis.extract_contract_publish_date(eis_text),
+        "eis.collect_from_text": lambda: collect_eis(case),
+    }
+
+
+def timed_round(fn: Callable[[], Any], min_seconds: float) -> float:
+    """Per-call seconds of `fn` called repeatedly for at least `min_seconds`."""
+    calls = 0
+    started = time.perf_counter()
+    while True:
+        fn()
+        calls += 1
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_seconds:
+            return elapsed / calls
+
+
+def peak_memory(fn: Callable[[], Any]) -> int:
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def calibration_workload() -> Callable[[], None]:
+    """Fixed regex + string workload used to normalise timings across machines."""
+    sample = "Цена контракта 1 245 300,00 ₽\nПоставщик ООО \"ТЕСТ\" ИНН 7701234567\n" * 200
+    pattern = re.compile(r"(\d{1,3}(?:\s\d{3})*,\d{2})")
+
+    def workload() -> None:
+        pattern.findall(sample)
+        sample.lower().find("инн")
+
+    return workload
+
+
+def measure_relative(fn: Callable[[], Any], min_seconds: float, repeat: int) -> Tuple[float, float]:
+    """`(seconds, seconds / calibration)` with the calibration timed right before every round.
+
+    Pairing each round with its own calibration keeps CPU throttling that drifts
+    over a run out of the ratio that is compared with the baseline.
+    """
+    workload = calibration_workload()
+    best_seconds = best_relative = float("inf")
+    for _ in range(max(1, repeat)):
+        calibration = timed_round(workload, min_seconds / 2)
+        seconds = timed_round(fn, min_seconds)
+        best_seconds = min(best_seconds, seconds)
+        best_relative = min(best_relative, seconds / calibration)
+    return best_seconds, best_relative
+
+
+def run_case(case: Dict[str, Any], min_seconds: float, repeat: int) -> Dict[str, Any]:
+    timings: Dict[str, float] = {}
+    relative: Dict[str, float] = {}
+    for name, fn in case_benchmarks(case).items():
+        seconds, ratio = measure_relative(fn, min_seconds, repeat)
+        timings[name] = seconds
+        relative[name] = float(f"{ratio:.4g}")
+    pages_44fz = sum(1 for raw in case["pages"].values() if raw)
+    return {
+        "case": case["name"],
+        "page_bytes": {key: len(raw.encode("utf-8")) for key, raw in case["pages"].items()},
+        "seconds": timings,
+        "relative_time": relative,
+        "pages_per_second": {
+            "44fz.collect_44fz": round(pages_44fz / timings["44fz.collect_44fz"], 1),
+            "eis.collect_from_text": round(1 / timings["eis.collect_from_text"], 1),
+        },
+        "peak_memory_bytes": {
+            "44fz.collect_44fz": peak_memory(lambda: collect_44fz(case)),
+            "eis.collect_from_text": peak_memory(lambda: collect_eis(case)),
+        },
+    }
+
+
+def baseline_from_report(report: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "cases": {
+            case["case"]: {"relative_time": case["relative_time"], "peak_memory_bytes": case["peak_memory_bytes"]}
+            for case in report["cases"]
+        }
+    }
+
+
+def compare_to_baseline(
+    report: Dict[str, Any],
+    baseline: Dict[str, Any],
+    tolerance: float = DEFAULT_TOLERANCE,
+    memory_tolerance: float = DEFAULT_MEMORY_TOLERANCE,
+    per_case: bool = False,
+) -> List[str]:
+    """Human-readable regressions of `report` against a baseline written by --write-baseline.
+
+    By default the GATED_METRICS are compared as totals over the corpus: the
+    small pages run in tens of microseconds and jitter too much on their own.
+    `per_case` compares every metric of every case instead. Peak memory is
+    always compared per case.
+    """
+    current = {case["case"]: case for case in report["cases"]}
+    shared = [name for name in (baseline.get("cases") or {}) if name in current]
+    regressions: List[str] = []
+
+    def check(label: str, now: float, then: float) -> None:
+        if now > then * (1 + tolerance) and now - then > NOISE_FLOOR:
+            regressions.append(f"{label} is {now / then:.2f}x the baseline time")
+
+    for case_name in shared:
+        expected = baseline["cases"][case_name]
+        measured = current[case_name]
+        if per_case:
+            for metric, then in (expected.get("relative_time") or {}).items():
+                if metric in measured["relative_time"]:
+                    check(f"{case_name}: {metric}", measured["relative_time"][metric], then)
+        for metric, peak in (expected.get("peak_memory_bytes") or {}).items():
+            now = measured["peak_memory_bytes"].get(metric)
+            if now is not None and now > peak * (1 + memory_tolerance):
+                regressions.append(f"{case_name}: {metric} peak memory {now} B vs baseline {peak} B")
+    if not per_case:
+        for metric in GATED_METRICS:
+            pairs = [
+                (current[name]["relative_time"][metric], baseline["cases"][name]["relative_time"][metric])
+                for name in shared
+                if metric in current[name]["relative_time"] and metric in (baseline["cases"][name].get("relative_time") or {})
+            ]
+            if pairs:
+                check(f"corpus: {metric}", sum(now for now, _ in pairs), sum(then for _, then in pairs))
+    return regressions
+
+
+def write_expected(cases: List[Dict[str, Any]]) -> None:
+    for case in cases:
+        for filename, payload in (("expected_44fz.json", collect_44fz(case)), ("expected_eis.json", collect_eis(case))):
+            (case["dir"] / filename).write_text(json.dumps(payload, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark EIS extraction over the saved page corpus")
+    parser.add_argument("--case", action="append", help="Only run this corpus case; repeat for several")
+    parser.add_argument("--min-time", type=float, default=0.05, help="Minimum seconds per timing round")
+    parser.add_argument("--repeat", type=int, default=3, help="Timing rounds; the best one is reported")
+    parser.add_argument("--baseline", default=str(BASELINE_PATH))
+    parser.add_argument("--write-baseline", action="store_true", help="Store this run as the new baseline instead of comparing")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Allowed relative slowdown before failing")
+    parser.add_argument("--gate-all", action="store_true", help="Gate every metric of every case instead of corpus totals of strip_html and the full collectors")
+    parser.add_argument("--memory-tolerance", type=float, default=DEFAULT_MEMORY_TOLERANCE, help="Allowed relative growth of peak memory")
+    parser.add_argument("--update-expected", action="store_true", help="Rewrite expected_44fz.json / expected_eis.json from the current extractors and exit")
+    parser.add_argument("--output", default="", help="Write the JSON report here as well as to stdout")
+    args = parser.parse_args(argv)
+
+    cases = load_corpus(names=args.case)
+    if args.update_expected:
+        write_expected(cases)
+        print(f"Updated expected payloads of {len(cases)} cases")
+        return 0
+
+    report: Dict[str, Any] = {"cases": [run_case(case, args.min_time, args.repeat) for case in cases]}
+    baseline_path = Path(args.baseline)
+    if args.write_baseline:
+        baseline_path.write_text(json.dumps(baseline_from_report(report), ensure_ascii=False, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+        report["regressions"] = []
+    elif baseline_path.exists():
+        report["regressions"] = compare_to_baseline(
+            report,
+            json.loads(baseline_path.read_text(encoding="utf-8")),
+            args.tolerance,
+            args.memory_tolerance,
+            per_case=args.gate_all,
+        )
+    else:
+        report["regressions"] = []
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    print(text)
+    return 1 if report["regressions"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
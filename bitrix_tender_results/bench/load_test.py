@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""Load test of the Bitrix24 drivers against mock_bitrix_server.
+
+Every driver runs in-process against a fresh mock portal (and, for
+batch_44fz_results, the mock EIS pages) and is measured the same way:
+
+- deals/sec over the whole run;
+- p50/p99 latency of one item and of one Bitrix24 HTTP request as seen by the client;
+- Bitrix24 HTTP requests per deal (a `batch` counts once) and commands per deal
+  (every command inside a `batch` counted separately).
+
+Example:
+    python bitrix_tender_results/bench/load_test.py --deals 200 --latency-ms 20 --driver fill_batch_payload
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+BENCH_DIR = Path(__file__).resolve().parent
+SCRIPT_DIR = BENCH_DIR.parent / "scripts"
+for path in (BENCH_DIR, SCRIPT_DIR):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+import batch_44fz_results  # noqa: E402
+import batch_output  # noqa: E402
+import collect_44fz_result  # noqa: E402
+import fill_batch_payload  # noqa: E402
+import fill_tender_result  # noqa: E402
+from mock_bitrix_server import MockBitrixServer, MockPortal, tender_number  # noqa: E402
+from timing import percentile  # noqa: E402
+
+DRIVERS = ("fill_tender_result", "fill_batch_payload", "batch_44fz_results")
+RESOLVE_BY = ("deal_id", "task_id", "procurement_number")
+
+
+def item_payload(portal: MockPortal, index: int, resolve_by: str) -> Dict[str, Any]:
+    deal_id = 10000 + index
+    payload: Dict[str, Any] = {
+        "mode": "update",
+        "deal_id": deal_id if resolve_by == "deal_id" else None,
+        "task_id": 50000 + index if resolve_by == "task_id" else None,
+        "procurement_number": portal.deals[deal_id]["TITLE"].split()[1],
+        "winner_name": f"ООО \"ПОСТАВЩИК {index}\"",
+        "winner_price": 1000000 + index,
+        "participants_count": index % 5 + 1,
+        "result_status": "ok",
+        "price_basis": "contract_price",
+        "allow_overwrite": False,
+    }
+    return payload
+
+
+class Recorder:
+    """Wraps fill_tender_result.bitrix_call and BatchResultWriter.write to time requests and items."""
+
+    def __init__(self) -> None:
+        self.call_seconds: List[float] = []
+        self.item_seconds: List[float] = []
+        self.statuses: Dict[str, int] = {}
+        self._last_item = 0.0
+
+    def start_item_clock(self) -> None:
+        self._last_item = time.perf_counter()
+
+    def item_done(self, status: Any) -> None:
+        now = time.perf_counter()
+        self.item_seconds.append(now - self._last_item)
+        self._last_item = now
+        self.statuses[str(status)] = self.statuses.get(str(status), 0) + 1
+
+    @contextlib.contextmanager
+    def installed(self):
+        original_call = fill_tender_result.bitrix_call
+        original_write = batch_output.BatchResultWriter.write
+        recorder = self
+
+        def timed_call(webhook_url: str, method: str, params: Dict[str, Any]) -> Dict[str, Any]:
+            started = time.perf_counter()
+            try:
+                return original_call(webhook_url, method, params)
+            finally:
+                recorder.call_seconds.append(time.perf_counter() - started)
+
+        def timed_write(self: batch_output.BatchResultWriter, result: Dict[str, Any], index: Optional[int] = None) -> None:
+            recorder.item_done(result.get("status"))
+            original_write(self, result, index)
+
+        fill_tender_result.bitrix_call = timed_call
+        batch_output.BatchResultWriter.write = timed_write
+        try:
+            yield self
+        finally:
+            fill_tender_result.bitrix_call = original_call
+            batch_output.BatchResultWriter.write = original_write
+
+
+def run_fill_tender_result(portal: MockPortal, deals: int, resolve_by: str, recorder: Recorder, workdir: Path, client_rate_limit: float) -> None:
+    fill_tender_result.configure_rate_limit(client_rate_limit)
+    payload_path = workdir / "payload.json"
+    for index in range(deals):
+        payload_path.write_text(json.dumps(item_payload(portal, index, resolve_by), ensure_ascii=False), encoding="utf-8")
+        recorder.start_item_clock()
+        buffer = io.StringIO()
+        with contextlib.redirect_stdout(buffer), contextlib.redirect_stderr(io.StringIO()):
+            fill_tender_result.main(["--payload-json", str(payload_path), "--mode", "update"])
+        log = buffer.getvalue().strip()
+        recorder.item_done(json.loads(log).get("status") if log.startswith("{") else "error")
+
+
+def run_fill_batch_payload(portal: MockPortal, deals: int, resolve_by: str, recorder: Recorder, workdir: Path, client_rate_limit: float) -> None:
+    payload_path = workdir / "batch_payload.json"
+    items = [item_payload(portal, index, resolve_by) for index in range(deals)]
+    payload_path.write_text(json.dumps({"mode": "update", "items": items}, ensure_ascii=False), encoding="utf-8")
+    recorder.start_item_clock()
+    with contextlib.redirect_stdout(io.StringIO()):
+        fill_batch_payload.main([
+            "--payload-json", str(payload_path),
+            "--max-items", "0",
+            "--output", str(workdir / "fill_batch_payload_results.ndjson"),
+            "--output-format", "ndjson",
+            "--rate-limit", str(client_rate_limit),
+        ])
+
+
+def run_batch_44fz_results(portal: MockPortal, deals: int, resolve_by: str, recorder: Recorder, workdir: Path, client_rate_limit: float) -> None:
+    batch_path = workdir / "batch.json"
+    items = [{"procurement_number": tender_number(index), "deal_id": 10000 + index, "task_id": 50000 + index} for index in range(deals)]
+    batch_path.write_text(json.dumps(items), encoding="utf-8")
+    recorder.start_item_clock()
+    with contextlib.redirect_stdout(io.StringIO()):
+        batch_44fz_results.main([
+            "--batch-json", str(batch_path),
+            "--mode", "update",
+            "--max-items", "0",
+            "--output", str(workdir / "batch_44fz_results.ndjson"),
+            "--output-format", "ndjson",
+            "--rate-limit", str(client_rate_limit),
+        ])
+
+
+RUNNERS: Dict[str, Callable[..., None]] = {
+    "fill_tender_result": run_fill_tender_result,
+    "fill_batch_payload": run_fill_batch_payload,
+    "batch_44fz_results": run_batch_44fz_results,
+}
+
+
+def run_driver(driver: str, args: argparse.Namespace) -> Dict[str, Any]:
+    config, _config_path, _is_example = fill_tender_result.load_config(None)
+    portal = MockPortal(
+        args.deals,
+        config=config,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        bucket_capacity=args.bucket_capacity,
+        drain_per_second=args.drain_per_second,
+        limit_error_rate=args.limit_error_rate,
+    )
+    recorder = Recorder()
+    original_eis_base = collect_44fz_result.EIS_BASE
+    previous_webhook = os.environ.get("BITRIX_WEBHOOK_URL")
+    with MockBitrixServer(portal) as server, tempfile.TemporaryDirectory() as tmp, recorder.installed():
+        os.environ["BITRIX_WEBHOOK_URL"] = server.webhook_url
+        collect_44fz_result.EIS_BASE = server.base_url
+        try:
+            started = time.perf_counter()
+            RUNNERS[driver](portal, args.deals, args.resolve_by, recorder, Path(tmp), args.client_rate_limit)
+            elapsed = time.perf_counter() - started
+        finally:
+            collect_44fz_result.EIS_BASE = original_eis_base
+            if previous_webhook is None:
+                os.environ.pop("BITRIX_WEBHOOK_URL", None)
+            else:
+                os.environ["BITRIX_WEBHOOK_URL"] = previous_webhook
+            fill_tender_result.configure_rate_limit(0)
+        stats = portal.stats()
+
+    bitrix_calls = {method: count for method, count in stats["calls"].items() if not method.startswith("eis:")}
+    http_calls = sum(count for method, count in bitrix_calls.items() if not method.startswith("batch:"))
+    commands = sum(count for method, count in bitrix_calls.items() if method != "batch")
+    milliseconds = lambda value: None if value is None else round(value * 1000, 2)  # noqa: E731
+    return {
+        "driver": driver,
+        "deals": args.deals,
+        "resolve_by": args.resolve_by if driver != "batch_44fz_results" else "deal_id",
+        "elapsed_seconds": round(elapsed, 3),
+        "deals_per_second": round(args.deals / elapsed, 2) if elapsed else None,
+        "item_latency_ms": {"p50": milliseconds(percentile(recorder.item_seconds, 0.50)), "p99": milliseconds(percentile(recorder.item_seconds, 0.99))},
+        "call_latency_ms": {"p50": milliseconds(percentile(recorder.call_seconds, 0.50)), "p99": milliseconds(percentile(recorder.call_seconds, 0.99))},
+        "calls_per_deal": round(http_calls / args.deals, 3) if args.deals else None,
+        "commands_per_deal": round(commands / args.deals, 3) if args.deals else None,
+        "rejected_query_limit": stats["rejected"],
+        "calls_by_method": dict(sorted(bitrix_calls.items())),
+        "statuses": recorder.statuses,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure Bitrix24 driver throughput against a local mock portal")
+    parser.add_argument("--driver", action="append", choices=DRIVERS, help="Driver to measure; repeat for several (default: all)")
+    parser.add_argument("--deals", type=int, default=100)
+    parser.add_argument("--resolve-by", choices=RESOLVE_BY, default="deal_id", help="How payloads identify their deal (fill_* drivers)")
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="Server-side latency added to every request")
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--bucket-capacity", type=int, default=0, help="Mock portal leaky bucket size; 0 disables it")
+    parser.add_argument("--drain-per-second", type=float, default=fill_tender_result.BITRIX_RATE_PER_SECOND)
+    parser.add_argument("--limit-error-rate", type=float, default=0.0, help="Share of requests answered with QUERY_LIMIT_EXCEEDED")
+    parser.add_argument("--client-rate-limit", type=float, default=0.0, help="--rate-limit passed to the drivers; 0 disables client throttling")
+    parser.add_argument("--output", default="", help="Write the JSON report here as well as to stdout")
+    args = parser.parse_args(argv)
+
+    report = {"results": [run_driver(driver, args) for driver in (args.driver or DRIVERS)]}
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
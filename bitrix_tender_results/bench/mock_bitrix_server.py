@@ -0,0 +1,412 @@
+#!/usr/bin/env python3
+"""Local stand-in for the Bitrix24 REST webhook and the EIS pages.
+
+Covers the methods the tender scripts use: crm.deal.get/list/update,
+crm.item.update, tasks.task.get/list, task.item.getdata and batch. Requests are
+served from an in-memory portal with configurable latency, a leaky-bucket
+limit like the real portal (QUERY_LIMIT_EXCEEDED on overflow) and random
+QUERY_LIMIT_EXCEEDED injection. EIS supplier-results/protocol/common-info pages
+are generated for every deal so batch_44fz_results can run end to end.
+
+Webhook URL: http://127.0.0.1:<port>/rest/1/mock/
+EIS base:    http://127.0.0.1:<port>
+Stats:       GET /__stats, POST /__reset
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+import urllib.parse
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+PAGE_SIZE = 50
+REST_PATH_RE = re.compile(r"^/rest/[^/]+/[^/]+/(?P<method>[\w.]+?)(?:\.json)?$")
+
+
+class LeakyBucket:
+    def __init__(self, capacity: int, drain_per_second: float) -> None:
+        self.capacity = capacity
+        self.drain_per_second = drain_per_second
+        self.level = 0.0
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def admit(self) -> bool:
+        if self.capacity <= 0:
+            return True
+        with self.lock:
+            now = time.monotonic()
+            self.level = max(0.0, self.level - (now - self.updated) * self.drain_per_second)
+            self.updated = now
+            if self.level + 1 > self.capacity:
+                return False
+            self.level += 1
+            return True
+
+
+class QueryLimitExceeded(Exception):
+    pass
+
+
+def parse_bitrix_query(query: str) -> Dict[str, Any]:
+    """Inverse of fill_tender_result.build_bitrix_query: filter[ID]=1&select[0]=ID -> nested dict."""
+    result: Dict[str, Any] = {}
+    for key, value in urllib.parse.parse_qsl(query, keep_blank_values=True):
+        parts = re.findall(r"[^\[\]]+", key)
+        node = result
+        for part in parts[:-1]:
+            node = node.setdefault(part, {})
+        node[parts[-1]] = value
+    return _lists_from_indexed(result)
+
+
+def _lists_from_indexed(value: Any) -> Any:
+    if not isinstance(value, dict):
+        return value
+    converted = {key: _lists_from_indexed(item) for key, item in value.items()}
+    if converted and all(key.isdigit() for key in converted):
+        return [converted[key] for key in sorted(converted, key=int)]
+    return converted
+
+
+def tender_number(index: int) -> str:
+    return f"08732000054260{index:05d}"
+
+
+def format_rub(amount: int) -> str:
+    """EIS money format: 1 001 000,00 ₽."""
+    return f"{amount:,}".replace(",", " ") + ",00 ₽"
+
+
+class MockPortal:
+    def __init__(
+        self,
+        deals: int = 100,
+        *,
+        config: Optional[Dict[str, Any]] = None,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        bucket_capacity: int = 50,
+        drain_per_second: float = 2.0,
+        limit_error_rate: float = 0.0,
+        lots_per_tender: int = 1,
+        seed: int = 0,
+    ) -> None:
+        self.config = config or {"fields": {}}
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.limit_error_rate = limit_error_rate
+        self.bucket = LeakyBucket(bucket_capacity, drain_per_second)
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.calls: Counter = Counter()
+        self.rejected = 0
+        self.deals: Dict[int, Dict[str, Any]] = {}
+        self.tasks: Dict[int, Dict[str, Any]] = {}
+        self.tenders: Dict[str, int] = {}
+        fields = self.config.get("fields", {})
+        for index in range(deals):
+            deal_id = 10000 + index
+            number = tender_number(index // max(1, lots_per_tender))
+            deal = {
+                "ID": str(deal_id),
+                "TITLE": f"ЭА {number} поставка, лот {index % max(1, lots_per_tender) + 1}",
+                "CATEGORY_ID": str(self.config.get("categoryId", 0)),
+                "STAGE_ID": "NEW",
+                "DATE_MODIFY": "2026-01-01T00:00:00+03:00",
+            }
+            for logical in ("winner_name_analytics", "winner_price_analytics", "participants_count_analytics", "tender_specialist_to"):
+                if fields.get(logical):
+                    deal[fields[logical]] = ""
+            self.deals[deal_id] = deal
+            self.tasks[50000 + index] = {"id": str(50000 + index), "title": deal["TITLE"], "ufCrmTask": [f"D_{deal_id}"]}
+            self.tenders[number] = index
+
+    # --- helpers -----------------------------------------------------------------
+
+    def webhook_url(self, base_url: str) -> str:
+        return f"{base_url}/rest/1/mock/"
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {"calls": dict(self.calls), "total_calls": sum(self.calls.values()), "rejected": self.rejected}
+
+    def reset_stats(self) -> None:
+        with self.lock:
+            self.calls.clear()
+            self.rejected = 0
+
+    def _sleep(self) -> None:
+        delay = self.latency_ms + (self.random.uniform(0, self.jitter_ms) if self.jitter_ms else 0.0)
+        if delay > 0:
+            time.sleep(delay / 1000.0)
+
+    # --- REST --------------------------------------------------------------------
+
+    def call(self, method: str, params: Dict[str, Any], *, nested: bool = False) -> Dict[str, Any]:
+        if not nested:
+            self._sleep()
+            with self.lock:
+                self.calls[method] += 1
+            if not self.bucket.admit() or (self.limit_error_rate and self.random.random() < self.limit_error_rate):
+                with self.lock:
+                    self.rejected += 1
+                raise QueryLimitExceeded()
+        handler = getattr(self, "m_" + method.replace(".", "_"), None)
+        if handler is None:
+            return {"error": "ERROR_METHOD_NOT_FOUND", "error_description": f"Method not found: {method}"}
+        return handler(params)
+
+    def m_batch(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        results: Dict[str, Any] = {}
+        errors: Dict[str, Any] = {}
+        for key, command in (params.get("cmd") or {}).items():
+            method, _, query = str(command).partition("?")
+            with self.lock:
+                self.calls[f"batch:{method}"] += 1
+            response = self.call(method, parse_bitrix_query(query), nested=True)
+            if "error" in response:
+                errors[key] = {"error": response["error"], "error_description": response.get("error_description")}
+            else:
+                results[key] = response.get("result")
+        return {"result": {"result": results, "result_error": errors}}
+
+    def m_crm_deal_get(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        deal = self.deals.get(int(params.get("id") or params.get("ID") or 0))
+        if deal is None:
+            return {"error": "NOT_FOUND", "error_description": "Not found"}
+        with self.lock:
+            return {"result": dict(deal)}
+
+    def m_crm_deal_update(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        deal = self.deals.get(int(params.get("id") or 0))
+        if deal is None:
+            return {"error": "NOT_FOUND", "error_description": "Not found"}
+        with self.lock:
+            deal.update(params.get("fields") or {})
+            deal["DATE_MODIFY"] = time.strftime("%Y-%m-%dT%H:%M:%S+03:00")
+        return {"result": True}
+
+    def m_crm_item_update(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        response = self.m_crm_deal_update(params)
+        return {"result": {"item": {"id": int(params.get("id") or 0)}}} if "error" not in response else response
+
+    def _matches(self, deal: Dict[str, Any], filters: Dict[str, Any]) -> bool:
+        for key, expected in filters.items():
+            if key.startswith("%"):
+                if str(expected) not in str(deal.get(key[1:], "")):
+                    return False
+            elif key.startswith(">="):
+                if not str(deal.get(key[2:], "")) >= str(expected):
+                    return False
+            elif key.startswith(">"):
+                if not str(deal.get(key[1:], "")) > str(expected):
+                    return False
+            elif key.startswith("="):
+                if str(deal.get(key[1:], "") or "") != str(expected or ""):
+                    return False
+            elif isinstance(expected, list):
+                if str(deal.get(key, "")) not in {str(item) for item in expected}:
+                    return False
+            elif str(deal.get(key, "") or "") != ("" if expected is None else str(expected)):
+                return False
+        return True
+
+    def m_crm_deal_list(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        filters = params.get("filter") or {}
+        select = params.get("select") or []
+        start = int(params.get("start") or 0)
+        with self.lock:
+            matched = [deal for _, deal in sorted(self.deals.items()) if self._matches(deal, filters)]
+        order = params.get("order") or {}
+        if "DATE_MODIFY" in order:
+            matched.sort(key=lambda deal: str(deal.get("DATE_MODIFY", "")), reverse=str(order["DATE_MODIFY"]).upper() == "DESC")
+        page = matched[start:start + PAGE_SIZE]
+        rows = [{key: deal.get(key) for key in select} if select else dict(deal) for deal in page]
+        response: Dict[str, Any] = {"result": rows, "total": len(matched)}
+        if start + PAGE_SIZE < len(matched):
+            response["next"] = start + PAGE_SIZE
+        return response
+
+    def m_tasks_task_get(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        task = self.tasks.get(int(params.get("taskId") or 0))
+        if task is None:
+            return {"error": "ERROR_CORE", "error_description": "Task not found"}
+        return {"result": {"task": dict(task)}}
+
+    def m_task_item_getdata(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        task = self.tasks.get(int(params.get("TASKID") or 0))
+        if task is None:
+            return {"error": "ERROR_CORE", "error_description": "Task not found"}
+        return {"result": {"ID": task["id"], "UF_CRM_TASK": task["ufCrmTask"]}}
+
+    def m_tasks_task_list(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        ids = (params.get("filter") or {}).get("ID") or []
+        ids = ids if isinstance(ids, list) else [ids]
+        tasks = [dict(self.tasks[int(task_id)]) for task_id in ids if int(task_id) in self.tasks]
+        return {"result": {"tasks": tasks[:PAGE_SIZE]}, "total": len(tasks)}
+
+    # --- EIS ---------------------------------------------------------------------
+
+    def eis_page(self, path: str, reg_number: str) -> Optional[str]:
+        index = self.tenders.get(reg_number)
+        if index is None:
+            return None
+        self._sleep()
+        with self.lock:
+            self.calls["eis:" + path.rsplit("/", 1)[-1]] += 1
+        if path.endswith("supplier-results.html"):
+            return (
+                "<html><body><h2>Сведения о заключенном контракте</h2>"
+                f"<div>Поставщик (подрядчик, исполнитель)</div><div>ООО \"ПОСТАВЩИК {index}\"</div>"
+                f"<div>ИНН 77{index:08d}</div><div>Предложение участника</div><div>{format_rub(1000000 + index * 1000)}</div>"
+                f"<div>Цена контракта</div><div>{format_rub(1000000 + index * 1000)}</div>"
+                f"<div>Реестровый номер контракта</div><div>2{index:018d}</div></body></html>"
+            )
+        if path.endswith("protocol-main-info.html"):
+            return (
+                "<html><body><h1>Протокол подведения итогов определения поставщика (подрядчика, исполнителя) "
+                f"№ИЗК{index}</h1><div>от 12.03.2026</div><div>Количество поданных заявок: {index % 5 + 1}</div></body></html>"
+            )
+        if path.endswith("common-info.html"):
+            return (
+                "<html><body><div>Электронный аукцион</div><div>Наименование объекта закупки</div>"
+                f"<div>Поставка товара {index}</div><div>Этап закупки</div>"
+                f"<div>Начальная (максимальная) цена контракта</div><div>{format_rub(1100000 + index * 1000)}</div></body></html>"
+            )
+        return None
+
+
+def make_handler(portal: MockPortal):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format: str, *args: Any) -> None:  # noqa: A002 - BaseHTTPRequestHandler signature
+            return
+
+        def _send(self, status: int, body: str, content_type: str = "application/json; charset=utf-8", headers: Optional[Dict[str, str]] = None) -> None:
+            data = body.encode("utf-8")
+            self.send_response(status)
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _json(self, status: int, payload: Dict[str, Any]) -> None:
+            self._send(status, json.dumps(payload, ensure_ascii=False))
+
+        def _params(self, parsed: urllib.parse.ParseResult) -> Dict[str, Any]:
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length).decode("utf-8") if length else ""
+            if raw and "json" in (self.headers.get("Content-Type") or ""):
+                return json.loads(raw)
+            return parse_bitrix_query(raw or parsed.query)
+
+        def _handle(self) -> None:
+            parsed = urllib.parse.urlparse(self.path)
+            if parsed.path == "/__stats":
+                self._json(200, portal.stats())
+                return
+            if parsed.path == "/__reset":
+                portal.reset_stats()
+                self._json(200, {"result": True})
+                return
+            if parsed.path.startswith("/epz/"):
+                reg_number = urllib.parse.parse_qs(parsed.query).get("regNumber", [""])[0]
+                page = portal.eis_page(parsed.path, reg_number)
+                if page is None:
+                    self._send(404, "not found", "text/plain; charset=utf-8")
+                    return
+                etag = '"' + hashlib.sha1(page.encode("utf-8")).hexdigest()[:16] + '"'
+                if self.headers.get("If-None-Match") == etag:
+                    self._send(304, "", "text/html; charset=utf-8", {"ETag": etag})
+                else:
+                    self._send(200, page, "text/html; charset=utf-8", {"ETag": etag})
+                return
+            match = REST_PATH_RE.match(parsed.path)
+            if not match:
+                self._json(404, {"error": "NOT_FOUND", "error_description": parsed.path})
+                return
+            try:
+                response = portal.call(match.group("method"), self._params(parsed))
+            except QueryLimitExceeded:
+                self._json(503, {"error": "QUERY_LIMIT_EXCEEDED", "error_description": "Too many requests"})
+                return
+            self._json(400 if "error" in response else 200, response)
+
+        do_GET = _handle
+        do_POST = _handle
+
+    return Handler
+
+
+class MockBitrixServer:
+    """Runs a MockPortal on a background thread; use as a context manager."""
+
+    def __init__(self, portal: MockPortal, host: str = "127.0.0.1", port: int = 0) -> None:
+        self.portal = portal
+        self.httpd = ThreadingHTTPServer((host, port), make_handler(portal))
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def webhook_url(self) -> str:
+        return self.portal.webhook_url(self.base_url)
+
+    def __enter__(self) -> "MockBitrixServer":
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run a local mock of the Bitrix24 REST webhook and EIS pages")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--deals", type=int, default=100)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--bucket-capacity", type=int, default=50, help="0 disables the leaky bucket")
+    parser.add_argument("--drain-per-second", type=float, default=2.0)
+    parser.add_argument("--limit-error-rate", type=float, default=0.0, help="Share of requests answered with QUERY_LIMIT_EXCEEDED")
+    parser.add_argument("--config", default="", help="bitrix_fields.json whose field codes the mock deals should carry")
+    args = parser.parse_args(argv)
+
+    config = json.loads(open(args.config, encoding="utf-8").read()) if args.config else None
+    portal = MockPortal(
+        args.deals,
+        config=config,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        bucket_capacity=args.bucket_capacity,
+        drain_per_second=args.drain_per_second,
+        limit_error_rate=args.limit_error_rate,
+    )
+    with MockBitrixServer(portal, port=args.port) as server:
+        print(f"Webhook: {server.webhook_url}\nEIS base: {server.base_url}", flush=True)
+        try:
+            server.thread.join()
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,96 @@
+"""Local index of analytics values already written to Bitrix24 deals.
+
+After a successful write the (deal_id, fingerprint of the update fields) pair
+is stored in a small SQLite file with the time it was applied. A later item
+for the same deal with the same build_update_fields output is answered from
+the index as `no_op` without reading or writing the deal. Entries older than
+the TTL are treated as misses, so values cleared in Bitrix24 by hand are
+eventually filled again; `forget` and `clear` drop entries explicitly.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+
+
+def fields_fingerprint(update_fields: Dict[str, Any]) -> str:
+    canonical = json.dumps(update_fields, ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class AppliedIndex:
+    def __init__(self, path: Path, ttl_seconds: float = DEFAULT_TTL_SECONDS) -> None:
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path))
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS applied_updates (
+                deal_id INTEGER NOT NULL,
+                fingerprint TEXT NOT NULL,
+                applied_at REAL NOT NULL,
+                PRIMARY KEY (deal_id, fingerprint)
+            )
+            """
+        )
+        self._conn.commit()
+
+    def __enter__(self) -> "AppliedIndex":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def _lookup(self, deal_id: int, update_fields: Dict[str, Any]) -> Optional[float]:
+        row = self._conn.execute(
+            "SELECT applied_at FROM applied_updates WHERE deal_id = ? AND fingerprint = ?",
+            (int(deal_id), fields_fingerprint(update_fields)),
+        ).fetchone()
+        if row is None or time.time() - row[0] > self.ttl_seconds:
+            return None
+        return row[0]
+
+    def applied_at(self, deal_id: int, update_fields: Dict[str, Any]) -> Optional[float]:
+        """Time these exact fields were applied to the deal, or None if not within the TTL."""
+        applied_at = self._lookup(deal_id, update_fields)
+        if applied_at is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return applied_at
+
+    def known(self, deal_id: int, update_fields: Dict[str, Any]) -> bool:
+        """Like applied_at, but does not count towards hit/miss stats."""
+        return self._lookup(deal_id, update_fields) is not None
+
+    def record(self, deal_id: int, update_fields: Dict[str, Any]) -> None:
+        if not update_fields:
+            return
+        # Only the latest values of a deal matter; older fingerprints would mask a later change back.
+        self._conn.execute("DELETE FROM applied_updates WHERE deal_id = ?", (int(deal_id),))
+        self._conn.execute(
+            "INSERT INTO applied_updates (deal_id, fingerprint, applied_at) VALUES (?, ?, ?)",
+            (int(deal_id), fields_fingerprint(update_fields), time.time()),
+        )
+        self._conn.commit()
+
+    def forget(self, deal_ids: Iterable[int]) -> None:
+        self._conn.executemany("DELETE FROM applied_updates WHERE deal_id = ?", [(int(deal_id),) for deal_id in deal_ids])
+        self._conn.commit()
+
+    def clear(self) -> None:
+        self._conn.execute("DELETE FROM applied_updates")
+        self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.close()
@@ -6,32 +6,63 @@ Input is a JSON array or an object with `items`:
   {"procurement_number": "0873200005426000019", "deal_id": 15096, "task_id": 42712}
 ]
 
-The script collects EIS data for each item and then applies the same strict
-three-field Bitrix24 update logic from fill_tender_result.py:
+The script collects EIS data once per procurement number (lots of one tender
+share it, with their own deal_id/task_id) and then applies the same strict
+three-field Bitrix24 update logic from fill_tender_result.py to each item:
 - winner_name_analytics
 - winner_price_analytics
 - participants_count_analytics
 
 Default mode is dry_run.
+
+With --process-pool the EIS pages are downloaded by a thread pool while the
+CPU-bound HTML stripping and extraction run in a ProcessPoolExecutor sized to
+the available cores. Only raw pages go into the worker processes and only the
+payload dict comes back; Bitrix24 writes stay sequential in the main process.
+Both pools are created once per run and shared by all chunks.
+
+With --extraction-memo unchanged pages reuse the payload extracted earlier
+(see extraction_memo.py) instead of being stripped and parsed again. With
+--applied-index items whose fields were already written to the same deal end
+as `no_op` without reading or writing it (see applied_index.py). With
+--result-index procurements found in the EIS XML index (eis_xml_index.py) are
+not downloaded at all.
+
+Collected payloads are kept as payload_model.TenderPayload until the summary is
+written; the results JSON is the same as with plain dicts.
 """
 
 from __future__ import annotations
 
 import argparse
+import contextlib
 import json
 import os
 import sys
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
 SCRIPT_DIR = Path(__file__).resolve().parent
 if str(SCRIPT_DIR) not in sys.path:
     sys.path.insert(0, str(SCRIPT_DIR))
 
+import applied_index  # noqa: E402
+import batch_output  # noqa: E402
+import batch_scheduler  # noqa: E402
+import checkpoint_journal  # noqa: E402
 import collect_44fz_result  # noqa: E402
+import eis_xml_index  # noqa: E402
+import extraction_memo  # noqa: E402
 import fill_tender_result  # noqa: E402
+import payload_model  # noqa: E402
+import timing  # noqa: E402
 
 ALLOWED_MODES = {"dry_run", "update"}
+DEFAULT_FETCH_THREADS = 8
+
+Pools = Tuple[ThreadPoolExecutor, ProcessPoolExecutor]
+CollectedItem = Tuple[int, Optional[payload_model.Payload], Optional[str], timing.Spans]
 
 
 def eprint(message: str) -> None:
@@ -74,9 +105,8 @@ def load_batch(path_or_json: str) -> List[Dict[str, Any]]:
     return normalized
 
 
-def prepare_update(payload: Dict[str, Any], config: Dict[str, Any], config_is_example: bool, mode: str) -> Dict[str, Any]:
-    payload = dict(payload)
-    payload["mode"] = mode
+def prepare_update(payload: payload_model.Payload, config: Dict[str, Any], config_is_example: bool, mode: str) -> Dict[str, Any]:
+    payload = payload_model.updated(payload, mode=mode)
 
     errors = fill_tender_result.validate_payload(payload)
     errors.extend(fill_tender_result.validate_config(config, update_mode=(mode == "update"), config_is_example=config_is_example))
@@ -91,17 +121,29 @@ def prepare_update(payload: Dict[str, Any], config: Dict[str, Any], config_is_ex
     }
 
 
-def apply_update_if_needed(payload: Dict[str, Any], update_fields: Dict[str, Any], config: Dict[str, Any], mode: str) -> Dict[str, Any]:
-    if mode == "dry_run":
-        return {"bitrix_update": "not_sent_dry_run"}
-
+def webhook_url_or_fail() -> str:
     webhook_url = os.environ.get("BITRIX_WEBHOOK_URL", "").strip()
     if not webhook_url:
         raise RuntimeError("BITRIX_WEBHOOK_URL secret is required for update mode")
+    return webhook_url
+
+
+def deal_has_fields(existing_item: Dict[str, Any], update_fields: Dict[str, Any], config: Dict[str, Any]) -> bool:
+    payload_fields = {config["fields"].get(config_field): payload_field for payload_field, config_field in fill_tender_result.PAYLOAD_TO_CONFIG_FIELD.items()}
+    return all(fill_tender_result.values_equal(payload_fields.get(field, ""), existing_item.get(field), value) for field, value in update_fields.items())
+
+
+@timing.timed("apply_update")
+def apply_update_if_needed(payload: Dict[str, Any], update_fields: Dict[str, Any], config: Dict[str, Any], mode: str, existing_item: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    if mode == "dry_run":
+        return {"bitrix_update": "not_sent_dry_run"}
+
+    webhook_url = webhook_url_or_fail()
 
     allow_overwrite = bool(payload.get("allow_overwrite", config.get("automation", {}).get("allow_overwrite_default", False)))
     if not allow_overwrite:
-        existing_item = fill_tender_result.get_existing_deal_fields(webhook_url, int(config["entityTypeId"]), int(payload["deal_id"]))
+        if existing_item is None:
+            existing_item = fill_tender_result.get_existing_deal_fields(webhook_url, int(config["entityTypeId"]), int(payload["deal_id"]))
         filled = fill_tender_result.find_already_filled_fields(existing_item, update_fields)
         if filled:
             return {
@@ -117,20 +159,177 @@ def apply_update_if_needed(payload: Dict[str, Any], update_fields: Dict[str, Any
     return {"bitrix_update": "sent", "response": response.get("result", {})}
 
 
-def process_item(item: Dict[str, Any], config: Dict[str, Any], config_is_example: bool, mode: str) -> Dict[str, Any]:
+def collect_one(item: Dict[str, Any], memo: Optional[extraction_memo.ExtractionMemo]) -> Dict[str, Any]:
+    if memo is None:
+        return collect_44fz_result.collect_44fz(item["procurement_number"], item["deal_id"], item.get("task_id"))
+    indexed = collect_44fz_result.collect_44fz_from_index(item["procurement_number"], item["deal_id"], item.get("task_id"))
+    if indexed is not None:
+        return indexed
+    pages, warnings = collect_44fz_result.fetch_44fz_pages(item["procurement_number"])
+    return memo.collect_44fz_from_pages(item["procurement_number"], item["deal_id"], item.get("task_id"), pages, warnings)
+
+
+def collect_payloads_serial(items: List[Dict[str, Any]], memo: Optional[extraction_memo.ExtractionMemo] = None) -> Iterator[CollectedItem]:
+    for index, item in enumerate(items):
+        try:
+            payload, spans = timing.call_recorded(collect_one, item, memo)
+        except Exception as exc:  # noqa: BLE001 - batch boundary
+            yield index, None, str(exc), {}
+            continue
+        yield index, payload, None, spans
+
+
+def open_pools(fetch_threads: int, extract_processes: int) -> Pools:
+    """Download threads and extraction processes for one run; every chunk reuses them."""
+    initializer = timing.enable if timing.ENABLED else None
+    return ThreadPoolExecutor(max_workers=max(1, fetch_threads)), ProcessPoolExecutor(max_workers=extract_processes or None, initializer=initializer)
+
+
+def collect_payloads_pooled(
+    items: List[Dict[str, Any]],
+    fetch_threads: int,
+    extract_processes: int,
+    memo: Optional[extraction_memo.ExtractionMemo] = None,
+    pools: Optional[Pools] = None,
+) -> Iterator[CollectedItem]:
+    """Fetch pages in threads and extract payloads in processes, yielding items as they finish.
+
+    Without `pools` the executors are created for this call and shut down after it.
+    """
+    remaining: List[int] = []
+    for index, item in enumerate(items):
+        indexed, spans = timing.call_recorded(collect_44fz_result.collect_44fz_from_index, item["procurement_number"], item["deal_id"], item.get("task_id"))
+        if indexed is not None:
+            yield index, indexed, None, spans
+        else:
+            remaining.append(index)
+    if not remaining:
+        return
+    with contextlib.ExitStack() as stack:
+        fetch_pool, extract_pool = pools or tuple(stack.enter_context(pool) for pool in open_pools(fetch_threads, extract_processes))
+        fetches: Dict[Future, int] = {
+            fetch_pool.submit(timing.call_recorded, collect_44fz_result.fetch_44fz_pages, items[index]["procurement_number"]): index
+            for index in remaining
+        }
+        extractions: Dict[Future, int] = {}
+        fetch_spans: Dict[int, timing.Spans] = {}
+        fingerprints: Dict[int, str] = {}
+        pending = set(fetches)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future in fetches:
+                    index = fetches.pop(future)
+                    try:
+                        (pages, warnings), fetch_spans[index] = future.result()
+                    except Exception as exc:  # noqa: BLE001 - batch boundary
+                        yield index, None, str(exc), {}
+                        continue
+                    item = items[index]
+                    if memo is not None:
+                        fingerprints[index] = memo.key_44fz(item["procurement_number"], pages, warnings)
+                        cached = memo.get(fingerprints[index], item["deal_id"], item.get("task_id"))
+                        if cached is not None:
+                            yield index, cached, None, fetch_spans.pop(index)
+                            continue
+                    extraction = extract_pool.submit(
+                        timing.call_recorded,
+                        collect_44fz_result.collect_44fz_from_pages,
+                        item["procurement_number"],
+                        item["deal_id"],
+                        item.get("task_id"),
+                        pages,
+                        warnings,
+                    )
+                    extractions[extraction] = index
+                    pending.add(extraction)
+                    continue
+                index = extractions.pop(future)
+                spans = fetch_spans.pop(index, {})
+                try:
+                    payload, extract_spans = future.result()
+                except Exception as exc:  # noqa: BLE001 - batch boundary
+                    yield index, None, str(exc), spans
+                    continue
+                if index in fingerprints:
+                    memo.put(fingerprints.pop(index), payload)
+                yield index, payload, None, timing.merge(spans, extract_spans)
+
+
+def plan_collection(items: List[Dict[str, Any]]) -> Dict[str, List[int]]:
+    """Procurement number -> indexes of the items (lots/deals) that share it, in input order."""
+    groups: Dict[str, List[int]] = {}
+    for index, item in enumerate(items):
+        groups.setdefault(item["procurement_number"], []).append(index)
+    return groups
+
+
+def fan_out(payload: payload_model.Payload, item: Dict[str, Any]) -> payload_model.Payload:
+    return payload_model.updated(payload, deal_id=item["deal_id"], task_id=item.get("task_id"))
+
+
+def collect_payloads(
+    items: List[Dict[str, Any]],
+    *,
+    process_pool: bool = False,
+    fetch_threads: int = DEFAULT_FETCH_THREADS,
+    extract_processes: int = 0,
+    memo: Optional[extraction_memo.ExtractionMemo] = None,
+    shared: Optional[Dict[str, payload_model.Payload]] = None,
+    pools: Optional[Pools] = None,
+) -> Iterator[CollectedItem]:
+    """Collect every procurement once and fan its payload out to each item that points at it.
+
+    `shared` keeps the payloads collected by earlier calls of the same run, so
+    a tender whose lots fall into different chunks is not collected again.
+    Collection spans are reported on the first item of a group only. Payloads
+    are yielded and kept in `shared` in their compact payload_model form.
+    `pools` (from `open_pools`) are used by `process_pool` instead of new executors.
+    """
+    shared = {} if shared is None else shared
+    groups = plan_collection(items)
+    leaders: List[int] = []
+    for number, indexes in groups.items():
+        if number in shared:
+            for index in indexes:
+                yield index, fan_out(shared[number], items[index]), None, {}
+        else:
+            leaders.append(indexes[0])
+    if not leaders:
+        return
+    unique = [items[index] for index in leaders]
+    collected = collect_payloads_pooled(unique, fetch_threads, extract_processes, memo, pools) if process_pool else collect_payloads_serial(unique, memo)
+    for offset, payload, error, spans in collected:
+        number = unique[offset]["procurement_number"]
+        if payload is not None:
+            payload = shared[number] = payload_model.compact(payload)
+        for position, index in enumerate(groups[number]):
+            yield index, fan_out(payload, items[index]) if payload is not None else None, error, spans if position == 0 else {}
+
+
+def finish_item(
+    item: Dict[str, Any],
+    payload: Optional[payload_model.Payload],
+    collect_error: Optional[str],
+    config: Dict[str, Any],
+    config_is_example: bool,
+    mode: str,
+    existing_item: Optional[Dict[str, Any]] = None,
+    applied: Optional[applied_index.AppliedIndex] = None,
+    verify_applied: bool = False,
+) -> Dict[str, Any]:
     result: Dict[str, Any] = {
         "procurement_number": item["procurement_number"],
         "deal_id": item["deal_id"],
         "task_id": item.get("task_id"),
         "status": "started",
     }
+    if collect_error is not None or payload is None:
+        result["status"] = "error"
+        result["errors"] = [collect_error or "EIS collection returned no payload"]
+        return result
 
     try:
-        payload = collect_44fz_result.collect_44fz(
-            item["procurement_number"],
-            item["deal_id"],
-            item.get("task_id"),
-        )
         prepared = prepare_update(payload, config, config_is_example, mode)
         result["payload"] = prepared["payload"]
         result["update_fields"] = prepared["update_fields"]
@@ -140,9 +339,25 @@ def process_item(item: Dict[str, Any], config: Dict[str, Any], config_is_example
             result["errors"] = prepared["errors"]
             return result
 
-        update_result = apply_update_if_needed(prepared["payload"], prepared["update_fields"], config, mode)
+        applied_at = None
+        if applied is not None and mode == "update" and prepared["update_fields"]:
+            applied_at = applied.applied_at(item["deal_id"], prepared["update_fields"])
+        if applied_at is not None:
+            if not verify_applied:
+                result.update({"status": "no_op", "bitrix_update": "skipped_already_applied", "applied_at": applied_at})
+                return result
+            existing_item = existing_item or fill_tender_result.get_existing_deal_fields(webhook_url_or_fail(), int(item["deal_id"]))
+            if deal_has_fields(existing_item, prepared["update_fields"], config):
+                applied.record(item["deal_id"], prepared["update_fields"])
+                result.update({"status": "no_op", "bitrix_update": "skipped_already_applied", "applied_at": applied_at, "applied_index": "confirmed"})
+                return result
+            result["applied_index"] = "stale"
+
+        update_result = apply_update_if_needed(prepared["payload"], prepared["update_fields"], config, mode, existing_item)
         result.update(update_result)
         result["status"] = "ok" if update_result.get("bitrix_update") != "refused_already_filled" else "manual_check"
+        if applied is not None and update_result.get("bitrix_update") == "sent":
+            applied.record(item["deal_id"], prepared["update_fields"])
         return result
 
     except Exception as exc:  # noqa: BLE001 - batch boundary
@@ -151,40 +366,154 @@ def process_item(item: Dict[str, Any], config: Dict[str, Any], config_is_example
         return result
 
 
+def already_applied(
+    item: Dict[str, Any],
+    payload: Optional[payload_model.Payload],
+    config: Dict[str, Any],
+    applied: Optional[applied_index.AppliedIndex],
+    verify_applied: bool,
+) -> bool:
+    """Whether finish_item will answer the item from the applied index; such deals need no prefetch."""
+    if applied is None or verify_applied or payload is None:
+        return False
+    update_fields = fill_tender_result.build_update_fields(payload, config)
+    return bool(update_fields) and applied.known(item["deal_id"], update_fields)
+
+
+def prefetch_existing_deals(items: List[Dict[str, Any]], mode: str) -> Dict[int, Dict[str, Any]]:
+    """Read all deals of a chunk with one Bitrix24 `batch` request; fall back to per-item reads on failure."""
+    webhook_url = os.environ.get("BITRIX_WEBHOOK_URL", "").strip()
+    if mode != "update" or not webhook_url or not items:
+        return {}
+    try:
+        return fill_tender_result.prefetch_deal_fields(webhook_url, [item["deal_id"] for item in items])
+    except RuntimeError as exc:
+        eprint(f"Chunk prefetch failed, reading deals one by one: {exc}")
+        return {}
+
+
+def process_item(item: Dict[str, Any], config: Dict[str, Any], config_is_example: bool, mode: str) -> Dict[str, Any]:
+    _index, payload, error, _spans = next(collect_payloads_serial([item]))
+    return finish_item(item, payload, error, config, config_is_example, mode)
+
+
 def main(argv: Optional[Iterable[str]] = None) -> int:
     parser = argparse.ArgumentParser(description="Batch collect 44-FZ EIS data and update exactly three Bitrix fields")
     parser.add_argument("--batch-json", required=True, help="JSON string or path to JSON batch file")
     parser.add_argument("--mode", choices=sorted(ALLOWED_MODES), default="dry_run")
-    parser.add_argument("--max-items", type=int, default=20, help="Safety limit for one workflow run")
+    parser.add_argument("--max-items", type=int, default=20, help="Safety limit for one workflow run; 0 disables the limit")
     parser.add_argument("--output", default="bitrix_tender_results/out/batch_results.json")
+    parser.add_argument("--output-format", choices=batch_output.OUTPUT_FORMATS, default="json", help="json: one summary document at the end; ndjson: one line per item as it finishes")
+    parser.add_argument("--process-pool", action="store_true", help="Fetch EIS pages in threads and run extraction in a process pool")
+    parser.add_argument("--fetch-threads", type=int, default=DEFAULT_FETCH_THREADS, help="EIS download threads for --process-pool")
+    parser.add_argument("--extract-processes", type=int, default=0, help="Extraction processes for --process-pool; 0 means one per CPU core")
+    parser.add_argument("--journal", default="", help="Append-only checkpoint journal (NDJSON) of finished items")
+    parser.add_argument("--resume", action="store_true", help="Skip items the journal already records as completed in this mode")
+    parser.add_argument("--chunk-size", type=int, default=fill_tender_result.BITRIX_BATCH_LIMIT, help="Upper bound for items per chunk (Bitrix24 batch limit is 50)")
+    parser.add_argument("--rate-limit", type=float, default=fill_tender_result.BITRIX_RATE_PER_SECOND, help="Bitrix24 requests per second in update mode; 0 disables throttling")
+    parser.add_argument("--rate-burst", type=int, default=fill_tender_result.BITRIX_RATE_BURST, help="Bitrix24 request bucket size")
+    parser.add_argument("--timings", action="store_true", help="Add per-item `timings` blocks and span percentiles to the summary")
+    parser.add_argument("--extraction-memo", default="", help="SQLite memo of extraction results keyed by page fingerprints")
+    parser.add_argument("--result-index", default="", help="SQLite index built by eis_xml_index.py; consulted before downloading pages")
+    parser.add_argument("--stream-pages", action="store_true", help="Download pages compressed and stop once the labels the extractors need have been read")
+    parser.add_argument("--max-page-bytes", type=int, default=collect_44fz_result.DEFAULT_MAX_PAGE_BYTES, help="Hard cap on decompressed bytes read per page with --stream-pages")
+    parser.add_argument("--applied-index", default="", help="SQLite index of fields already written to deals; matching items end as no_op")
+    parser.add_argument("--applied-index-ttl", type=float, default=applied_index.DEFAULT_TTL_SECONDS, help="Seconds an applied-index entry stays valid")
+    parser.add_argument("--verify-applied", action="store_true", help="Audit: re-read deals of items found in --applied-index and report whether the index was right")
     args = parser.parse_args(list(argv) if argv is not None else None)
+    if args.resume and not args.journal:
+        parser.error("--resume requires --journal")
+    if args.timings:
+        timing.enable()
 
     items = load_batch(args.batch_json)
-    if len(items) > args.max_items:
+    if args.max_items and len(items) > args.max_items:
         eprint(f"Batch contains {len(items)} items, max allowed is {args.max_items}")
         return 2
 
     config, config_path, config_is_example = fill_tender_result.load_config(None)
-    results = []
-    for item in items:
-        print(f"Processing {item['procurement_number']} / deal {item['deal_id']} / task {item.get('task_id')}")
-        results.append(process_item(item, config, config_is_example, args.mode))
-
-    summary = {
-        "mode": args.mode,
-        "config_path": str(config_path),
-        "total": len(results),
-        "ok": sum(1 for result in results if result.get("status") == "ok"),
-        "manual_check": sum(1 for result in results if result.get("status") == "manual_check"),
-        "validation_error": sum(1 for result in results if result.get("status") == "validation_error"),
-        "error": sum(1 for result in results if result.get("status") == "error"),
-        "results": results,
-    }
-
-    output_path = Path(args.output)
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    output_path.write_text(json.dumps(summary, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
-    print(json.dumps(summary, ensure_ascii=False, indent=2))
+    journal = checkpoint_journal.CheckpointJournal(Path(args.journal)) if args.journal else None
+    memo = extraction_memo.ExtractionMemo(Path(args.extraction_memo)) if args.extraction_memo else None
+    if args.result_index:
+        collect_44fz_result.configure_result_index(eis_xml_index.EisResultIndex(Path(args.result_index)))
+    collect_44fz_result.configure_streaming(args.stream_pages, args.max_page_bytes)
+    applied = applied_index.AppliedIndex(Path(args.applied_index), args.applied_index_ttl) if args.applied_index and args.mode == "update" else None
+    with batch_output.BatchResultWriter(Path(args.output), args.output_format) as writer, contextlib.ExitStack() as stack:
+        pools = tuple(stack.enter_context(pool) for pool in open_pools(args.fetch_threads, args.extract_processes)) if args.process_pool else None
+        pending_indexes: List[int] = []
+        for index, item in enumerate(items):
+            entry = journal.completed_entry(item["procurement_number"], item["deal_id"], args.mode, item.get("task_id")) if journal and args.resume else None
+            if entry:
+                writer.write(checkpoint_journal.skipped_result(item["procurement_number"], item["deal_id"], item.get("task_id"), entry), index)
+            else:
+                pending_indexes.append(index)
+
+        pending = [items[index] for index in pending_indexes]
+        limiter = fill_tender_result.configure_rate_limit(args.rate_limit, args.rate_burst) if args.mode == "update" else None
+        # One crm.item.update per item; the deal reads of a chunk share one batch request.
+        calls_per_item = 1 if args.mode == "update" else 0
+
+        # Payloads by procurement number; only touched by the chunk collector thread.
+        shared_payloads: Dict[str, payload_model.Payload] = {}
+
+        def collect_chunk(positions: List[int]) -> List[CollectedItem]:
+            chunk = [pending[position] for position in positions]
+            collected = collect_payloads(
+                chunk,
+                process_pool=args.process_pool,
+                fetch_threads=args.fetch_threads,
+                extract_processes=args.extract_processes,
+                memo=memo,
+                shared=shared_payloads,
+                pools=pools,
+            )
+            return [(positions[offset], payload, error, spans) for offset, payload, error, spans in collected]
+
+        chunks = batch_scheduler.pipelined_chunks(
+            range(len(pending)),
+            collect_chunk,
+            lambda: batch_scheduler.next_chunk_size(limiter, calls_per_item, args.chunk_size),
+        )
+        touched_deals: set = set()
+        item_spans: List[timing.Spans] = []
+        chunk_spans: timing.Spans = {}
+        for positions, collected in chunks:
+            to_read = [pending[position] for position, payload, error, _spans in collected if not already_applied(pending[position], payload, config, applied, args.verify_applied)]
+            with timing.recording(chunk_spans):
+                existing = prefetch_existing_deals(to_read, args.mode)
+            for position, payload, error, spans in collected:
+                item = pending[position]
+                print(f"Processing {item['procurement_number']} / deal {item['deal_id']} / task {item.get('task_id')}")
+                # A snapshot taken before another item of this run wrote the same deal is stale.
+                snapshot = existing.get(item["deal_id"]) if item["deal_id"] not in touched_deals else None
+                touched_deals.add(item["deal_id"])
+                with timing.recording(spans):
+                    result = finish_item(item, payload, error, config, config_is_example, args.mode, snapshot, applied, args.verify_applied)
+                if timing.ENABLED:
+                    result["timings"] = timing.as_block(spans)
+                    item_spans.append(spans)
+                writer.write(result, pending_indexes[position])
+                if journal:
+                    journal.record(item["procurement_number"], item["deal_id"], args.mode, result["status"], item.get("task_id"))
+        if journal:
+            journal.close()
+
+        summary = {
+            "mode": args.mode,
+            "config_path": str(config_path),
+            "total": writer.total,
+            "procurements_collected": len(shared_payloads),
+            **writer.counts(["ok", "no_op", "manual_check", "validation_error", "error", checkpoint_journal.SKIPPED_STATUS]),
+        }
+        if applied is not None:
+            summary["applied_index"] = {"hits": applied.hits, "misses": applied.misses}
+            applied.close()
+        if memo is not None:
+            summary["extraction_memo"] = memo.stats()
+            memo.close()
+        if timing.ENABLED:
+            summary["timings"] = {"per_item": timing.summarize(item_spans), "per_run": timing.as_block(chunk_spans)}
+        writer.finish(summary)
 
     if summary["error"] or summary["validation_error"]:
         return 3
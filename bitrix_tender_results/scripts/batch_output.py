@@ -0,0 +1,94 @@
+"""Result output for the batch drivers.
+
+`json` keeps the historical behaviour: every item result is collected and a
+single indented summary document is written at the end. `ndjson` streams one
+compact line per item as soon as it finishes and ends with a summary line
+without the `results` array, so partial progress survives a killed run.
+
+Values with a `to_dict()` method (payload_model.TenderPayload) are written as
+that dict, so compact payloads produce the same text as the dicts they hold.
+"""
+
+from __future__ import annotations
+
+import json
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+OUTPUT_FORMATS = ("json", "ndjson")
+
+
+def encode_default(value: Any) -> Any:
+    to_dict = getattr(value, "to_dict", None)
+    if to_dict is None:
+        raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+    return to_dict()
+
+
+def encode_default_or_str(value: Any) -> Any:
+    return value.to_dict() if hasattr(value, "to_dict") else str(value)
+
+
+class BatchResultWriter:
+    def __init__(self, output_path: Path, output_format: str = "json", *, trailing_newline: bool = True) -> None:
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unsupported output format: {output_format!r}")
+        self.output_path = output_path
+        self.output_format = output_format
+        self.trailing_newline = trailing_newline
+        self.status_counts: Counter = Counter()
+        self.results: Dict[int, Dict[str, Any]] = {}
+        self._stream = None
+        if output_format == "ndjson":
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            self._stream = output_path.open("w", encoding="utf-8")
+
+    def __enter__(self) -> "BatchResultWriter":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    @property
+    def total(self) -> int:
+        return sum(self.status_counts.values())
+
+    def count(self, status: str) -> int:
+        return self.status_counts.get(status, 0)
+
+    def counts(self, statuses: Iterable[str]) -> Dict[str, int]:
+        return {status: self.count(status) for status in statuses}
+
+    def write(self, result: Dict[str, Any], index: Optional[int] = None) -> None:
+        """Record one item result; `index` keeps input order in json mode when items finish out of order."""
+        self.status_counts[str(result.get("status"))] += 1
+        if self._stream is None:
+            self.results[len(self.results) if index is None else index] = result
+            return
+        self._write_line({"type": "result", **result})
+
+    def finish(self, summary: Dict[str, Any]) -> Dict[str, Any]:
+        """Write the closing summary; in json mode `results` is appended to it."""
+        if self._stream is not None:
+            self._write_line({"type": "summary", **summary})
+            self.close()
+            print(json.dumps({"type": "summary", **summary}, ensure_ascii=False))
+            return summary
+
+        document = {**summary, "results": [self.results[index] for index in sorted(self.results)]}
+        text = json.dumps(document, ensure_ascii=False, indent=2, default=encode_default)
+        self.output_path.parent.mkdir(parents=True, exist_ok=True)
+        self.output_path.write_text(text + ("\n" if self.trailing_newline else ""), encoding="utf-8")
+        print(text)
+        return document
+
+    def close(self) -> None:
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+
+    def _write_line(self, record: Dict[str, Any]) -> None:
+        assert self._stream is not None
+        self._stream.write(json.dumps(record, ensure_ascii=False, default=encode_default_or_str) + "\n")
+        self._stream.flush()
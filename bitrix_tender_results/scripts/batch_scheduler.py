@@ -0,0 +1,67 @@
+"""Chunked, pipelined scheduling for large batch runs.
+
+The input is split into chunks no larger than the Bitrix24 `batch` limit and
+no larger than the sustained rate budget serves in `TARGET_CHUNK_SECONDS`.
+Chunk sizes do not depend on the tokens left at the moment: the rate limiter
+paces the calls inside a chunk, so a spent burst slows the writes down instead
+of shrinking every following chunk to one item. While the main thread
+validates and writes chunk N, a background thread already collects chunk N+1,
+so EIS downloads overlap with Bitrix24 writes.
+"""
+
+from __future__ import annotations
+
+import math
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterator, List, Optional, Sequence, Tuple, TypeVar
+
+import fill_tender_result
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Rough Bitrix24 request cost of one item in update mode: read the deal, write
+# the analytics fields, re-read and move the stage.
+DEFAULT_CALLS_PER_ITEM = 4
+# Bitrix24 time one chunk may take at the sustained rate.
+TARGET_CHUNK_SECONDS = 30.0
+
+
+def next_chunk_size(
+    limiter: Optional[fill_tender_result.RateLimiter],
+    calls_per_item: int = DEFAULT_CALLS_PER_ITEM,
+    max_chunk: int = fill_tender_result.BITRIX_BATCH_LIMIT,
+) -> int:
+    """Size a chunk from the batch limit and the calls the limiter allows per `TARGET_CHUNK_SECONDS`."""
+    max_chunk = max(1, min(int(max_chunk), fill_tender_result.BITRIX_BATCH_LIMIT))
+    if limiter is None or calls_per_item <= 0:
+        return max_chunk
+    calls = max(float(limiter.burst), limiter.rate_per_second * TARGET_CHUNK_SECONDS)
+    return max(1, min(max_chunk, math.floor(calls / calls_per_item)))
+
+
+def pipelined_chunks(
+    entries: Sequence[T],
+    collect: Callable[[List[T]], R],
+    chunk_size: Callable[[], int],
+) -> Iterator[Tuple[List[T], R]]:
+    """Yield `(chunk, collect(chunk))` while the following chunk is collected in the background."""
+    position = 0
+
+    def take() -> List[T]:
+        nonlocal position
+        if position >= len(entries):
+            return []
+        chunk = list(entries[position:position + max(1, chunk_size())])
+        position += len(chunk)
+        return chunk
+
+    with ThreadPoolExecutor(max_workers=1) as collector:
+        chunk = take()
+        future = collector.submit(collect, chunk) if chunk else None
+        while future is not None:
+            collected = future.result()
+            following = take()
+            future = collector.submit(collect, following) if following else None
+            yield chunk, collected
+            chunk = following
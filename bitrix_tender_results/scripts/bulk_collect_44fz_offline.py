@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""Re-extract 44-FZ payloads from an archive of saved EIS pages.
+
+Expected layout: any directory named by a 19-digit registry number holds the
+saved pages of that procurement; the directories may be nested at any depth,
+and --archive-dir may point at one such directory:
+
+archive/
+  0873200005426000019/
+    supplier-results.html
+    protocol.html            (protocol-main-info.html is accepted too)
+    common-info.html
+    meta.json                optional: {"deal_id": 15096, "task_id": 42712}
+
+Extraction runs in a process pool. Workers receive only the directory path and
+return only the payload dict, which is streamed as one NDJSON line per
+procurement to stdout or --output. The network is never used.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+if str(SCRIPT_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPT_DIR))
+
+import collect_44fz_result  # noqa: E402
+
+REG_NUMBER_RE = re.compile(r"\d{19}")
+PAGE_FILES = {
+    "supplier_html": ("supplier-results.html",),
+    "protocol_html": ("protocol.html", "protocol-main-info.html"),
+    "common_html": ("common-info.html",),
+}
+
+
+def eprint(message: str) -> None:
+    print(message, file=sys.stderr)
+
+
+def iter_procurement_dirs(root: Path) -> Iterator[Path]:
+    """Yield directories named by a registry number, sorted, without descending into them.
+
+    A root that is itself named by a registry number is the only directory yielded.
+    """
+    if REG_NUMBER_RE.fullmatch(root.resolve().name):
+        yield root
+        return
+    for current, dirnames, _filenames in os.walk(root):
+        dirnames.sort()
+        matched = [name for name in dirnames if REG_NUMBER_RE.fullmatch(name)]
+        for name in matched:
+            yield Path(current) / name
+        dirnames[:] = [name for name in dirnames if name not in matched]
+
+
+def read_optional(directory: Path, names: Iterable[str]) -> str:
+    for name in names:
+        path = directory / name
+        if path.is_file():
+            return path.read_text(encoding="utf-8", errors="replace")
+    return ""
+
+
+def load_meta(directory: Path) -> Dict[str, Any]:
+    path = directory / "meta.json"
+    if not path.is_file():
+        return {}
+    data = json.loads(path.read_text(encoding="utf-8"))
+    return data if isinstance(data, dict) else {}
+
+
+def optional_int(value: Any) -> Optional[int]:
+    return int(value) if value not in (None, "") else None
+
+
+def collect_directory(directory: str) -> Dict[str, Any]:
+    """Worker entry point: read one procurement directory and extract its payload."""
+    path = Path(directory)
+    reg_number = path.name
+    try:
+        meta = load_meta(path)
+        pages: Dict[str, str] = {}
+        warnings: List[str] = []
+        for key, names in PAGE_FILES.items():
+            pages[key] = read_optional(path, names)
+            if not pages[key]:
+                warnings.append(f"Нет сохранённой страницы {names[0]} в {directory}")
+        return collect_44fz_result.collect_44fz_from_pages(
+            reg_number,
+            optional_int(meta.get("deal_id")),
+            optional_int(meta.get("task_id")),
+            pages,
+            warnings,
+        )
+    except Exception as exc:  # noqa: BLE001 - archive boundary
+        return {"procurement_number": reg_number, "result_status": "error", "errors": [str(exc)], "source_dir": directory}
+
+
+def iter_payloads(directories: List[str], workers: int, chunksize: int) -> Iterator[Dict[str, Any]]:
+    if workers == 1:
+        yield from map(collect_directory, directories)
+        return
+    with ProcessPoolExecutor(max_workers=workers or None) as pool:
+        yield from pool.map(collect_directory, directories, chunksize=max(1, chunksize))
+
+
+def write_ndjson(payloads: Iterable[Dict[str, Any]], stream: IO[str]) -> Dict[str, int]:
+    counts: Dict[str, int] = {"total": 0}
+    for payload in payloads:
+        stream.write(json.dumps(payload, ensure_ascii=False) + "\n")
+        stream.flush()
+        status = str(payload.get("result_status") or "unknown")
+        counts["total"] += 1
+        counts[status] = counts.get(status, 0) + 1
+    return counts
+
+
+def main(argv: Optional[Iterable[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Bulk re-extract 44-FZ payloads from saved EIS pages into NDJSON")
+    parser.add_argument("--archive-dir", required=True, help="Root directory with per-registry-number subdirectories")
+    parser.add_argument("--output", default="", help="NDJSON output path; stdout when omitted")
+    parser.add_argument("--workers", type=int, default=0, help="Extraction processes; 0 means one per CPU core, 1 disables the pool")
+    parser.add_argument("--chunksize", type=int, default=16, help="Directories handed to a worker at once")
+    args = parser.parse_args(list(argv) if argv is not None else None)
+
+    root = Path(args.archive_dir)
+    if not root.is_dir():
+        eprint(f"Archive directory not found: {root}")
+        return 2
+
+    directories = [str(path) for path in iter_procurement_dirs(root)]
+    if not directories:
+        eprint(f"No registry-number directories found under {root}")
+        return 2
+
+    payloads = iter_payloads(directories, args.workers, args.chunksize)
+    if args.output:
+        out_path = Path(args.output)
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        with out_path.open("w", encoding="utf-8") as stream:
+            counts = write_ndjson(payloads, stream)
+    else:
+        counts = write_ndjson(payloads, sys.stdout)
+
+    eprint(json.dumps(counts, ensure_ascii=False, sort_keys=True))
+    return 3 if counts.get("error") else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,101 @@
+"""Append-only checkpoint journal for resumable batch runs.
+
+Each processed item appends one JSON line keyed by procurement_number + deal_id
+(+ task_id for items without deal_id, such as lots resolved through their
+task) together with the run mode and the final status. With `--resume` the batch
+drivers skip items whose latest entry for the same mode is a completed status,
+so a re-run after a timeout or runner eviction only does the remaining work.
+A torn last line from a killed process is ignored on load.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+COMPLETED_STATUSES = frozenset({"ok", "no_op", "dry_run"})
+SKIPPED_STATUS = "skipped_completed"
+
+
+def journal_key(procurement_number: Any, deal_id: Any, task_id: Any = None) -> str:
+    number = str(procurement_number or "").strip()
+    if deal_id not in (None, ""):
+        return f"{number}:{int(deal_id)}"
+    if task_id not in (None, ""):
+        return f"{number}::task:{int(task_id)}"
+    return f"{number}:"
+
+
+class CheckpointJournal:
+    def __init__(self, path: Path, completed_statuses: Iterable[str] = COMPLETED_STATUSES) -> None:
+        self.path = path
+        self.completed_statuses = frozenset(completed_statuses)
+        self.latest: Dict[str, Dict[str, Any]] = {}
+        self._load()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._stream = self.path.open("a", encoding="utf-8")
+        if self._needs_newline():
+            self._stream.write("\n")
+
+    def __enter__(self) -> "CheckpointJournal":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            return
+        with self.path.open(encoding="utf-8") as stream:
+            for line in stream:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if isinstance(entry, dict) and entry.get("key"):
+                    self.latest[str(entry["key"])] = entry
+
+    def _needs_newline(self) -> bool:
+        if self.path.stat().st_size == 0:
+            return False
+        with self.path.open("rb") as stream:
+            stream.seek(-1, os.SEEK_END)
+            return stream.read(1) != b"\n"
+
+    def completed_entry(self, procurement_number: Any, deal_id: Any, mode: Optional[str], task_id: Any = None) -> Optional[Dict[str, Any]]:
+        entry = self.latest.get(journal_key(procurement_number, deal_id, task_id))
+        if entry and entry.get("mode") == mode and entry.get("status") in self.completed_statuses:
+            return entry
+        return None
+
+    def record(self, procurement_number: Any, deal_id: Any, mode: Optional[str], status: Any, task_id: Any = None) -> None:
+        entry = {
+            "key": journal_key(procurement_number, deal_id, task_id),
+            "procurement_number": str(procurement_number or ""),
+            "deal_id": deal_id,
+            "task_id": task_id,
+            "mode": mode,
+            "status": status,
+            "recorded_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        }
+        self._stream.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._stream.flush()
+        os.fsync(self._stream.fileno())
+        self.latest[entry["key"]] = entry
+
+    def close(self) -> None:
+        if not self._stream.closed:
+            self._stream.close()
+
+
+def skipped_result(procurement_number: Any, deal_id: Any, task_id: Any, entry: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "procurement_number": procurement_number,
+        "deal_id": deal_id,
+        "task_id": task_id,
+        "status": SKIPPED_STATUS,
+        "reason": f"completed earlier with status {entry.get('status')} at {entry.get('recorded_at')}",
+    }
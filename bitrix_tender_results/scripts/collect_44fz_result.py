@@ -8,33 +8,78 @@ Business rules for MVP:
 - Participant offer is written to Bitrix field "Цена победителя - аналитика" when available.
 - Contract price is kept separately as reference.
 - This script never writes to Bitrix24.
+- With --result-index, results ingested from EIS XML archives (eis_xml_index.py)
+  are used first; EIS pages are downloaded only for procurements missing there.
+- With --stream-pages, pages are requested gzip/deflate-compressed, decompressed
+  while they arrive and read only until the labels the extractors need have
+  been seen plus a tail of text (or --max-page-bytes was reached).
 """
 
 from __future__ import annotations
 
 import argparse
+import codecs
+import contextlib
 import html
 import json
 import re
 import sys
 import urllib.error
 import urllib.request
+import zlib
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Pattern, Sequence, Tuple
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+if str(SCRIPT_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPT_DIR))
+
+import eis_xml_index  # noqa: E402
+import extraction_rules  # noqa: E402
+import http_pool  # noqa: E402
+import timing  # noqa: E402
 
 EIS_BASE = "https://zakupki.gov.ru"
 SUPPLIER_RESULTS_PATH = "/epz/order/notice/zk20/view/supplier-results.html"
 PROTOCOL_MAIN_PATH = "/epz/order/notice/zk20/view/protocol/protocol-main-info.html"
 COMMON_INFO_PATH = "/epz/order/notice/zk20/view/common-info.html"
+CONTRACT_CARD_PATH = "/epz/contract/contractCard/common-info.html"
 
-MONEY_RE = re.compile(r"(?<!\d)(\d{1,3}(?:[\s\u00a0]\d{3})*(?:[,.]\d{2})|\d+(?:[,.]\d{2}))(?:\s*(?:₽|руб\.?|RUB))?", re.IGNORECASE)
-DATE_RE = re.compile(r"\b(\d{2}\.\d{2}\.\d{4})\b")
-INN_RE = re.compile(r"\b(\d{10}|\d{12})\b")
-CONTRACT_REGISTRY_RE = re.compile(r"\b(\d{19,20})\b")
+RULES = extraction_rules.load()["collect_44fz"]
+MONEY_RE = RULES.patterns["money"]
 
 PRICE_BASIS_CONTRACT = "contract_price"
 PRICE_BASIS_PARTICIPANT_OFFER = "participant_offer_unit_price"
 
+FETCH_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (compatible; TenderVest44FZCollector/1.0)",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "ru-RU,ru;q=0.9,en;q=0.5",
+}
+CONNECTION_POOL: Optional[http_pool.ConnectionPool] = None
+
+STREAM_CHUNK_BYTES = 64 * 1024
+DEFAULT_MAX_PAGE_BYTES = 16 * 1024 * 1024
+# Text read after the last target label; covers the widest extractor window (2600 characters).
+STREAM_TAIL_CHARS = 4000
+# Labels the extractors of each page need; reading stops once all of them have been seen.
+PAGE_TARGETS: Dict[str, Sequence[Pattern[str]]] = {
+    "supplier-results": (re.compile(r"Сведения\s+о\s+заключенном\s+контракте", re.IGNORECASE),),
+    "final protocol": (
+        re.compile(r"Протокол\s+подведения\s+итогов", re.IGNORECASE),
+        re.compile(r"Количество\s+(?:поданных\s+)?(?:заявок|участников)\s*[:\-]?\s*\d|Подано\s+заявок|Всего\s+заявок|только\s+одна\s+заявк", re.IGNORECASE),
+    ),
+    "common-info": (
+        re.compile(r"Наименование\s+объекта\s+закупки|Объект\s+закупки", re.IGNORECASE),
+        re.compile(r"Наименование\s+заказчика|Заказчик", re.IGNORECASE),
+        # The NMCK block may follow the generic labels above by more than the tail.
+        re.compile(r"Начальная\s+\(?максимальная\)?\s+цена\s+контракта|НМЦК", re.IGNORECASE),
+    ),
+}
+STREAM_PAGES = False
+MAX_PAGE_BYTES = DEFAULT_MAX_PAGE_BYTES
+RESULT_INDEX: Optional[eis_xml_index.EisResultIndex] = None
+
 
 def eprint(message: str) -> None:
     print(message, file=sys.stderr)
@@ -44,18 +89,28 @@ def build_url(path: str, reg_number: str, extra: str = "") -> str:
     return f"{EIS_BASE}{path}?regNumber={reg_number}" + (f"&{extra}" if extra else "")
 
 
-def fetch_url(url: str) -> str:
-    request = urllib.request.Request(
-        url,
-        headers={
-            "User-Agent": "Mozilla/5.0 (compatible; TenderVest44FZCollector/1.0)",
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-            "Accept-Language": "ru-RU,ru;q=0.9,en;q=0.5",
-        },
-    )
-    with urllib.request.urlopen(request, timeout=45) as response:
-        body = response.read()
-        content_type = response.headers.get("Content-Type", "")
+def configure_connection_pool(pool: Optional[http_pool.ConnectionPool]) -> Optional[http_pool.ConnectionPool]:
+    """Fetch EIS pages over reused keep-alive connections; None restores one urllib request per page."""
+    global CONNECTION_POOL
+    CONNECTION_POOL = pool
+    return CONNECTION_POOL
+
+
+def configure_result_index(index: Optional[eis_xml_index.EisResultIndex]) -> Optional[eis_xml_index.EisResultIndex]:
+    """Answer collect_44fz from the EIS XML index when it has a complete result; None disables the lookup."""
+    global RESULT_INDEX
+    RESULT_INDEX = index
+    return RESULT_INDEX
+
+
+def configure_streaming(enabled: bool, max_page_bytes: int = DEFAULT_MAX_PAGE_BYTES) -> None:
+    """Download pages with fetch_url_streaming instead of reading every body whole."""
+    global STREAM_PAGES, MAX_PAGE_BYTES
+    STREAM_PAGES = enabled
+    MAX_PAGE_BYTES = max_page_bytes
+
+
+def decode_body(body: bytes, content_type: str) -> str:
     encoding = "utf-8"
     match = re.search(r"charset=([\w-]+)", content_type, flags=re.IGNORECASE)
     if match:
@@ -63,48 +118,143 @@ def fetch_url(url: str) -> str:
     return body.decode(encoding, errors="replace")
 
 
-def strip_html(raw_html: str) -> str:
-    text = re.sub(r"(?is)<script.*?</script>", " ", raw_html)
-    text = re.sub(r"(?is)<style.*?</style>", " ", text)
-    text = re.sub(r"(?is)<svg.*?</svg>", " ", text)
-    text = re.sub(r"(?is)<!--.*?-->", " ", text)
-    text = re.sub(r"(?i)</(?:div|p|tr|td|th|li|br|section|article|h\d|span|a)>", "\n", text)
-    text = re.sub(r"(?s)<[^>]+>", " ", text)
-    text = html.unescape(text).replace("\u00a0", " ")
-    text = re.sub(r"[ \t\r\f\v]+", " ", text)
-    text = re.sub(r"\n\s+", "\n", text)
-    text = re.sub(r"\n{2,}", "\n", text)
-    return text.strip()
-
-
-def compact(text: str) -> str:
-    return re.sub(r"\s+", " ", text).strip()
-
-
-def lines(text: str) -> List[str]:
-    return [line.strip(" :-—\t") for line in text.splitlines() if line.strip(" :-—\t")]
+def fetch_raw(url: str, headers: Dict[str, str]) -> Tuple[int, Dict[str, str], bytes]:
+    """GET through the connection pool or urllib; returns status, lower-case headers and body; 304 is not an error."""
+    if CONNECTION_POOL is not None:
+        try:
+            status, reason, response_headers, body = CONNECTION_POOL.request("GET", url, headers=headers, timeout=45)
+        except http_pool.CONNECTION_ERRORS as exc:
+            raise urllib.error.URLError(exc) from exc
+        if status >= 400:
+            raise urllib.error.HTTPError(url, status, reason, None, None)
+        return status, response_headers, body
+    request = urllib.request.Request(url, headers=headers)
+    try:
+        with urllib.request.urlopen(request, timeout=45) as response:
+            return response.status, {name.lower(): value for name, value in response.headers.items()}, response.read()
+    except urllib.error.HTTPError as exc:
+        if exc.code == 304:
+            return 304, {name.lower(): value for name, value in (exc.headers or {}).items()}, b""
+        raise
 
 
-def window(text: str, keyword: str, before: int = 250, after: int = 1800) -> str:
-    index = text.lower().find(keyword.lower())
-    if index < 0:
-        return ""
-    return text[max(0, index - before): min(len(text), index + len(keyword) + after)]
+@timing.timed("fetch_url")
+def fetch_url(url: str) -> str:
+    _status, headers, body = fetch_raw(url, FETCH_HEADERS)
+    return decode_body(body, headers.get("content-type", ""))
+
+
+class TextScanner:
+    """Rough incremental strip_html over a page that arrives in pieces.
+
+    Only whole tags (and whole script/style blocks) are converted, the rest is
+    kept for the next piece. `feed` returns True once every target matched and
+    `tail_chars` of text followed the last match.
+    """
+
+    OVERLAP = 200
+
+    def __init__(self, targets: Sequence[Pattern[str]], tail_chars: int = STREAM_TAIL_CHARS) -> None:
+        self.targets = list(targets)
+        self.tail_chars = tail_chars
+        self.text = ""
+        self.last_match_end = 0
+        self._pending = ""
+
+    def feed(self, piece: str) -> bool:
+        self._pending += piece
+        cut = self._pending.rfind(">") + 1
+        low = self._pending[:cut].lower()
+        block = max(low.rfind("<script"), low.rfind("<style"))
+        if block > max(low.rfind("</script"), low.rfind("</style")):
+            cut = block
+        if cut <= 0:
+            return False
+        fragment, self._pending = self._pending[:cut], self._pending[cut:]
+        fragment = re.sub(r"(?is)<(script|style)\b.*?</\1\s*>", " ", fragment)
+        start = max(0, len(self.text) - self.OVERLAP)
+        self.text += re.sub(r"\s+", " ", html.unescape(re.sub(r"<[^>]+>", " ", fragment)))
+        for target in list(self.targets):
+            match = target.search(self.text, start)
+            if match:
+                self.targets.remove(target)
+                self.last_match_end = max(self.last_match_end, match.end())
+        return not self.targets and len(self.text) - self.last_match_end >= self.tail_chars
+
+
+@contextlib.contextmanager
+def open_stream(url: str, headers: Dict[str, str]) -> Iterator[Any]:
+    if CONNECTION_POOL is not None:
+        try:
+            with CONNECTION_POOL.stream(url, headers=headers, timeout=45) as response:
+                if response.status >= 400:
+                    raise urllib.error.HTTPError(url, response.status, response.reason, None, None)
+                yield response
+        except urllib.error.URLError:
+            raise
+        except http_pool.CONNECTION_ERRORS as exc:
+            raise urllib.error.URLError(exc) from exc
+        return
+    with urllib.request.urlopen(urllib.request.Request(url, headers=headers), timeout=45) as response:
+        yield response
+
+
+@timing.timed("fetch_url")
+def fetch_url_streaming(url: str, targets: Sequence[Pattern[str]] = (), max_bytes: int = DEFAULT_MAX_PAGE_BYTES) -> Tuple[str, str]:
+    """GET a page compressed and decode it while it arrives.
+
+    Returns `(html, outcome)`: outcome is "complete", "early_stop" when all
+    `targets` and the tail were read before the end, or "truncated" when
+    `max_bytes` of decompressed HTML were read first.
+    """
+    headers = {**FETCH_HEADERS, "Accept-Encoding": "gzip, deflate"}
+    with open_stream(url, headers) as response:
+        encoding = (response.getheader("content-encoding") or "").lower()
+        # 32 + MAX_WBITS accepts both gzip and zlib-wrapped deflate.
+        decompressor = zlib.decompressobj(32 + zlib.MAX_WBITS) if encoding in {"gzip", "x-gzip", "deflate"} else None
+        charset = re.search(r"charset=([\w-]+)", response.getheader("content-type") or "", flags=re.IGNORECASE)
+        decoder = codecs.getincrementaldecoder(charset.group(1) if charset else "utf-8")(errors="replace")
+        scanner = TextScanner(targets) if targets else None
+        parts: List[str] = []
+        total = 0
+        while True:
+            raw = response.read(STREAM_CHUNK_BYTES)
+            if not raw:
+                data = decompressor.flush() if decompressor is not None else b""
+                parts.append(decoder.decode(data[: max(0, max_bytes - total)], final=True))
+                return "".join(parts), "complete"
+            data = decompressor.decompress(raw, max_bytes - total) if decompressor is not None else raw[: max_bytes - total]
+            total += len(data)
+            piece = decoder.decode(data)
+            parts.append(piece)
+            if scanner is not None and scanner.feed(piece):
+                return "".join(parts), "early_stop"
+            if total >= max_bytes:
+                return "".join(parts), "truncated"
+
+
+@timing.timed("fetch_url")
+def fetch_url_if_changed(url: str, etag: str = "", last_modified: str = "") -> Tuple[Optional[str], Dict[str, str]]:
+    """Conditional GET: `(None, validators)` on 304 Not Modified, otherwise the page and its new validators."""
+    headers = dict(FETCH_HEADERS)
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    status, response_headers, body = fetch_raw(url, headers)
+    validators = {"etag": response_headers.get("etag", etag), "last_modified": response_headers.get("last-modified", last_modified)}
+    if status == 304:
+        return None, validators
+    return decode_body(body, response_headers.get("content-type", "")), validators
+
+
+@timing.timed("strip_html")
+def strip_html(raw_html: str) -> str:
+    return RULES.strip_html(raw_html)
 
 
-def parse_money(raw: Optional[str]) -> Optional[float]:
-    if not raw:
-        return None
-    cleaned = raw.replace("\u00a0", " ").replace(" ", "")
-    cleaned = re.sub(r"[^\d,.-]", "", cleaned)
-    if "," in cleaned and "." in cleaned:
-        cleaned = cleaned.replace(".", "").replace(",", ".")
-    else:
-        cleaned = cleaned.replace(",", ".")
-    try:
-        return float(cleaned)
-    except ValueError:
-        return None
+compact = extraction_rules.compact
+parse_money = extraction_rules.parse_money
 
 
 def first_money(text: str) -> Optional[float]:
@@ -113,186 +263,54 @@ def first_money(text: str) -> Optional[float]:
 
 
 def money_after(text: str, labels: Iterable[str], after: int = 1200) -> Optional[float]:
-    for label in labels:
-        fragment = window(text, label, before=0, after=after)
-        if not fragment:
-            continue
-        value = first_money(fragment[len(label):])
-        if value is not None:
-            return value
-    return None
-
-
-def label_value(text: str, labels: Iterable[str], stops: Iterable[str], max_lines: int = 10) -> str:
-    src_lines = lines(text)
-    low_labels = [label.lower() for label in labels]
-    low_stops = [stop.lower() for stop in stops]
-    for idx, line in enumerate(src_lines):
-        low_line = line.lower()
-        label = next((label for label in low_labels if label in low_line), None)
-        if not label:
-            continue
-        tail = line[low_line.find(label) + len(label):].strip(" :-—\t")
-        if tail and not any(stop in tail.lower() for stop in low_stops):
-            return compact(tail)
-        collected: List[str] = []
-        for next_line in src_lines[idx + 1: idx + 1 + max_lines]:
-            low_next = next_line.lower()
-            if any(stop in low_next for stop in low_stops):
-                break
-            collected.append(next_line)
-        value = compact(" ".join(collected)).strip(" :-—\t")
-        if value:
-            return value
-    return ""
-
-
-def clean_org(value: str) -> str:
-    value = compact(value)
-    value = re.sub(r"^(поставщик|подрядчик|исполнитель|наименование поставщика|наименование участника закупки|участник)\s*", "", value, flags=re.IGNORECASE)
-    value = re.sub(r"\bИНН\b.*$", "", value, flags=re.IGNORECASE)
-    value = re.sub(r"\bКПП\b.*$", "", value, flags=re.IGNORECASE)
-    value = re.sub(r"\bЦена контракта\b.*$", "", value, flags=re.IGNORECASE)
-    return value.strip(" .;:-—")
-
-
-def inn_near(text: str, keyword: str) -> str:
-    if not keyword:
-        return ""
-    fragment = window(text, keyword, before=0, after=1400)
-    match = INN_RE.search(fragment)
-    return match.group(1) if match else ""
+    return RULES.variant("contract_price", labels=list(labels), after=after).extract(extraction_rules.Document(text), {})
 
 
-def extract_protocol_meta(protocol_text: str, reg_number: str) -> Tuple[str, str, str]:
-    protocol_name = "Протокол подведения итогов определения поставщика (подрядчика, исполнителя)"
-    protocol_date = ""
-    fragment = window(protocol_text, "Протокол подведения итогов", before=100, after=1200)
-    if fragment:
-        date_match = DATE_RE.search(fragment)
-        if date_match:
-            protocol_date = date_match.group(1)
-        name_match = re.search(
-            r"(Протокол\s+подведения\s+итогов[^\n]{0,260}?(?:№\s*[А-ЯA-Z0-9-]+)?)",
-            compact(fragment),
-            flags=re.IGNORECASE,
-        )
-        if name_match:
-            protocol_name = compact(name_match.group(1))
-    protocol_url = build_url(PROTOCOL_MAIN_PATH, reg_number, "type=izk&version=1")
-    return protocol_name, protocol_date, protocol_url
+def extract_field(name: str, **texts: str) -> Any:
+    """One field of config/extraction_rules.json from the given pages."""
+    return RULES.extract(texts, (name,))[name]
 
 
-def extract_applications_count_from_protocol(protocol_text: str) -> Optional[int]:
-    patterns = [
-        r"Количество\s+поданных\s+заявок\s*[:\-]?\s*(\d+)",
-        r"Количество\s+заявок\s*[:\-]?\s*(\d+)",
-        r"Подано\s+заявок\s*[:\-]?\s*(\d+)",
-        r"Количество\s+участников\s*[:\-]?\s*(\d+)",
-        r"Всего\s+заявок\s*[:\-]?\s*(\d+)",
-    ]
-    for pattern in patterns:
-        match = re.search(pattern, protocol_text, flags=re.IGNORECASE)
-        if match:
-            return int(match.group(1))
-    if re.search(r"подан[ао]?\s+только\s+одна\s+заявк", protocol_text, flags=re.IGNORECASE):
-        return 1
-    if re.search(r"только\s+одна\s+заявк", protocol_text, flags=re.IGNORECASE):
-        return 1
-    return None
+def extract_protocol_meta(protocol_text: str, reg_number: str) -> Tuple[str, str, str]:
+    values = RULES.extract({"protocol": protocol_text}, ("protocol_name", "protocol_date"))
+    return values["protocol_name"], values["protocol_date"], build_url(PROTOCOL_MAIN_PATH, reg_number, "type=izk&version=1")
 
 
-def extract_contract_section(supplier_text: str) -> str:
-    section = window(supplier_text, "Сведения о заключенном контракте", before=0, after=2600)
-    return section or supplier_text
+def extract_applications_count_from_protocol(protocol_text: str) -> Optional[int]:
+    return extract_field("participants_count", protocol=protocol_text)
 
 
 def extract_winner_from_supplier_results(supplier_text: str) -> Tuple[str, str]:
-    section = extract_contract_section(supplier_text)
-    name = label_value(
-        section,
-        [
-            "Поставщик (подрядчик, исполнитель)",
-            "Поставщик",
-            "Подрядчик",
-            "Исполнитель",
-            "Наименование поставщика",
-            "Наименование участника",
-        ],
-        ["ИНН", "КПП", "Цена контракта", "Реестровый номер", "Дата размещения", "Предложение участника"],
-        max_lines=10,
-    )
-    name = clean_org(name)
-    return name, inn_near(section, name)
+    values = RULES.extract({"supplier": supplier_text}, ("winner_name", "winner_inn"))
+    return values["winner_name"], values["winner_inn"]
 
 
 def extract_failed_reason(protocol_text: str, supplier_text: str) -> str:
-    combined = protocol_text + "\n" + supplier_text
-    for key in ["признан несостоявшимся", "признана несостоявшейся", "подана только одна заявка", "только одна заявка"]:
-        fragment = window(combined, key, before=250, after=650)
-        if fragment:
-            return compact(fragment)
-    return ""
-
-
-def extract_text_between(text: str, starts: Iterable[str], stops: Iterable[str], max_len: int = 1000) -> str:
-    low = text.lower()
-    best = -1
-    best_start = ""
-    for start in starts:
-        pos = low.find(start.lower())
-        if pos >= 0 and (best < 0 or pos < best):
-            best = pos
-            best_start = start
-    if best < 0:
-        return ""
-    frag = text[best + len(best_start): best + len(best_start) + max_len]
-    low_frag = frag.lower()
-    end = len(frag)
-    for stop in stops:
-        pos = low_frag.find(stop.lower())
-        if pos >= 0:
-            end = min(end, pos)
-    return compact(frag[:end]).strip(" :-—")
+    return extract_field("failed_reason", protocol=protocol_text, supplier=supplier_text)
 
 
 def extract_purchase_name(common_text: str, supplier_text: str) -> str:
-    source = common_text or supplier_text
-    return extract_text_between(source, ["Наименование объекта закупки", "Объект закупки"], ["Этап закупки", "Способ определения", "Заказчик"], 1400)
+    return extract_field("purchase_name", common=common_text, supplier=supplier_text)
 
 
 def extract_customer_name(common_text: str, supplier_text: str) -> str:
-    source = common_text or supplier_text
-    value = extract_text_between(source, ["Наименование заказчика", "Заказчик"], ["Контактная информация", "Размещение осуществляет", "Место нахождения"], 1200)
-    return re.sub(r"^Наименование\s+заказчика\s*", "", value, flags=re.IGNORECASE).strip(" .;:-—")
+    return extract_field("customer_name", common=common_text, supplier=supplier_text)
 
 
 def extract_procedure_type(text: str) -> str:
-    for known in ["Запрос котировок в электронной форме", "Электронный аукцион", "Открытый конкурс в электронной форме"]:
-        if known.lower() in text.lower():
-            return known
-    return ""
+    return extract_field("procedure_type", combined=text)
 
 
 def extract_status(text: str) -> str:
-    for known in ["Определение поставщика завершено", "Работа комиссии", "Подача заявок", "Закупка завершена", "Отменена"]:
-        if known.lower() in text.lower():
-            return known
-    return ""
+    return extract_field("procurement_status", combined=text)
 
 
 def extract_contract_registry_number(supplier_text: str) -> str:
-    section = extract_contract_section(supplier_text)
-    fragment = window(section, "Реестровый номер контракта", before=0, after=500)
-    match = CONTRACT_REGISTRY_RE.search(fragment)
-    return match.group(1) if match else ""
+    return extract_field("contract_registry_number", supplier=supplier_text)
 
 
 def extract_contract_publish_date(supplier_text: str) -> str:
-    section = extract_contract_section(supplier_text)
-    fragment = window(section, "Дата размещения подписанного контракта", before=0, after=500)
-    match = DATE_RE.search(fragment)
-    return match.group(1) if match else ""
+    return extract_field("contract_publish_date", supplier=supplier_text)
 
 
 def determine_price_basis(contract_price: Optional[float], participant_offer: Optional[float], combined_text: str) -> Tuple[str, bool, str]:
@@ -311,31 +329,175 @@ def calculate_reduction(nmck: Optional[float], winner_price: Optional[float], en
 
 
 def fetch_page_or_empty(title: str, url: str, warnings: List[str]) -> str:
+    return strip_html(fetch_raw_page_or_empty(title, url, warnings))
+
+
+def fetch_raw_page_or_empty(title: str, url: str, warnings: List[str]) -> str:
     try:
-        return strip_html(fetch_url(url))
-    except (OSError, urllib.error.URLError, urllib.error.HTTPError) as exc:
+        if not STREAM_PAGES:
+            return fetch_url(url)
+        page, outcome = fetch_url_streaming(url, PAGE_TARGETS.get(title, ()), MAX_PAGE_BYTES)
+        if outcome == "truncated":
+            warnings.append(f"Страница {title} обрезана на {MAX_PAGE_BYTES} байт")
+        return page
+    except (OSError, urllib.error.URLError, urllib.error.HTTPError, zlib.error) as exc:
         warnings.append(f"Не удалось открыть {title}: {exc}")
         return ""
 
 
-def collect_44fz(reg_number: str, deal_id: Optional[int], task_id: Optional[int], supplier_html: str = "", protocol_html: str = "", common_html: str = "") -> Dict[str, Any]:
+def page_urls(reg_number: str) -> Dict[str, Tuple[str, str]]:
+    """collect_44fz page argument -> (title for warnings, URL)."""
+    return {
+        "supplier_html": ("supplier-results", build_url(SUPPLIER_RESULTS_PATH, reg_number)),
+        "protocol_html": ("final protocol", build_url(PROTOCOL_MAIN_PATH, reg_number, "type=izk&version=1")),
+        "common_html": ("common-info", build_url(COMMON_INFO_PATH, reg_number)),
+    }
+
+
+def fetch_44fz_pages(reg_number: str) -> Tuple[Dict[str, str], List[str]]:
+    """Download raw supplier-results, protocol and common-info HTML without parsing it."""
     warnings: List[str] = []
+    pages = {key: fetch_raw_page_or_empty(title, url, warnings) for key, (title, url) in page_urls(reg_number).items()}
+    return pages, warnings
+
+
+def collect_44fz_from_pages(reg_number: str, deal_id: Optional[int], task_id: Optional[int], pages: Dict[str, str], warnings: List[str]) -> Dict[str, Any]:
+    """Extract a payload from already downloaded pages; never touches the network.
+
+    Kept at module level so it can be submitted to a ProcessPoolExecutor.
+    """
+    return collect_44fz(reg_number, deal_id, task_id, fetch_missing=False, warnings=warnings, **pages)
+
+
+def iso_to_ru_date(value: str) -> str:
+    match = re.fullmatch(r"(\d{4})-(\d{2})-(\d{2})", value or "")
+    return f"{match.group(3)}.{match.group(2)}.{match.group(1)}" if match else (value or "")
+
+
+def index_sources(record: Dict[str, Any]) -> List[Dict[str, str]]:
+    """Sources of an index payload: the protocol XML document and the contract registry record."""
+    sources = []
+    if record.get("protocol_source"):
+        sources.append({
+            "title": "XML-протокол из выгрузки ЕИС",
+            "url": record["protocol_source"],
+            "what_confirmed": "победитель, предложение участника, количество заявок, дата протокола",
+        })
+    if record.get("contract_registry_number") or record.get("contract_source"):
+        registry_number = record.get("contract_registry_number") or ""
+        sources.append({
+            "title": "Реестр контрактов ЕИС",
+            "url": f"{EIS_BASE}{CONTRACT_CARD_PATH}?reestrNumber={registry_number}" if registry_number else record["contract_source"],
+            "what_confirmed": "поставщик, цена контракта, реестровый номер и дата размещения контракта",
+        })
+    return sources
+
+
+def collect_44fz_from_index(reg_number: str, deal_id: Optional[int], task_id: Optional[int]) -> Optional[Dict[str, Any]]:
+    """Payload from RESULT_INDEX, or None when the index is off or lacks the winner, price or application count.
+
+    The XML exports carry no NMCK, purchase, customer or procedure data, so
+    such payloads are `confidence: medium` and list what is missing in `warnings`.
+    """
+    record = RESULT_INDEX.get(reg_number) if RESULT_INDEX is not None else None
+    if not record:
+        return None
+    winner_name = record["winner_name"] or record["supplier_name"] or ""
+    participant_offer = record["offer_price"]
+    contract_price = record["contract_price"]
+    winner_price = participant_offer if participant_offer is not None else contract_price
+    participants_count = record["participants_count"]
+    if not winner_name or winner_price is None or participants_count is None:
+        return None
+    protocol_url = build_url(PROTOCOL_MAIN_PATH, reg_number, "type=izk&version=1")
+    price_basis, _auto_reduction, price_comment = determine_price_basis(contract_price, participant_offer, "")
+    warnings = [
+        "XML-выгрузка ЕИС не содержит НМЦК, наименование закупки, заказчика, способ определения поставщика и название протокола; "
+        "эти поля не заполнены, процент снижения не рассчитан."
+    ]
+    if participant_offer is None:
+        warnings.append("В XML-протоколе нет предложения победителя; цена победителя взята из цены контракта.")
+    return {
+        "mode": "dry_run",
+        "deal_id": deal_id,
+        "task_id": task_id,
+        "procurement_number": reg_number,
+        "law": "44-ФЗ",
+        "source_type": "eis_44_open_data_xml",
+        "procedure_type": "",
+        "purchase_name": "",
+        "customer_name": "",
+        "procurement_status": "",
+        "nmck": None,
+        "contract_price": contract_price,
+        "price_basis": price_basis,
+        # Without the NMCK from common-info the reduction cannot be calculated.
+        "auto_calculate_reduction": False,
+        "protocol_url": protocol_url,
+        "protocol_name": "",
+        "protocol_date": iso_to_ru_date(record["protocol_date"]),
+        "failed_procurement_reason": "",
+        "winner_name": winner_name,
+        "winner_inn": record["winner_inn"] or record["supplier_inn"] or "",
+        "winner_price": winner_price,
+        "winner_offer_price": participant_offer,
+        "reduction_percent": None,
+        "participants_count": participants_count,
+        "our_place": None,
+        "contract_registry_number": record["contract_registry_number"] or "",
+        "contract_publish_date": iso_to_ru_date(record["contract_publish_date"]),
+        "result_status": "ok",
+        "confidence": "medium",
+        "comment": (
+            "44-ФЗ: победитель, предложение участника и количество заявок взяты из XML-выгрузки протоколов и контрактов ЕИС. "
+            f"{price_comment} Стадию сделки не менять. Задачу не закрывать."
+        ),
+        "target_stage_id": "",
+        "allow_overwrite": False,
+        "sources": index_sources(record),
+        "warnings": warnings,
+    }
+
+
+@timing.timed("collect_44fz")
+def collect_44fz(
+    reg_number: str,
+    deal_id: Optional[int],
+    task_id: Optional[int],
+    supplier_html: str = "",
+    protocol_html: str = "",
+    common_html: str = "",
+    *,
+    fetch_missing: bool = True,
+    warnings: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    if fetch_missing and not (supplier_html or protocol_html or common_html):
+        indexed = collect_44fz_from_index(reg_number, deal_id, task_id)
+        if indexed is not None:
+            return indexed
+    warnings = list(warnings or [])
     supplier_url = build_url(SUPPLIER_RESULTS_PATH, reg_number)
     protocol_url = build_url(PROTOCOL_MAIN_PATH, reg_number, "type=izk&version=1")
     common_url = build_url(COMMON_INFO_PATH, reg_number)
 
-    supplier_text = strip_html(supplier_html) if supplier_html else fetch_page_or_empty("supplier-results", supplier_url, warnings)
-    protocol_text = strip_html(protocol_html) if protocol_html else fetch_page_or_empty("final protocol", protocol_url, warnings)
-    common_text = strip_html(common_html) if common_html else fetch_page_or_empty("common-info", common_url, warnings)
+    def page_text(raw_html: str, title: str, url: str) -> str:
+        if raw_html:
+            return strip_html(raw_html)
+        return fetch_page_or_empty(title, url, warnings) if fetch_missing else ""
+
+    supplier_text = page_text(supplier_html, "supplier-results", supplier_url)
+    protocol_text = page_text(protocol_html, "final protocol", protocol_url)
+    common_text = page_text(common_html, "common-info", common_url)
 
-    combined = "\n".join([common_text, supplier_text, protocol_text])
-    protocol_name, protocol_date, protocol_url = extract_protocol_meta(protocol_text or supplier_text, reg_number)
+    docs = RULES.documents({"supplier": supplier_text, "protocol": protocol_text, "common": common_text})
+    values = RULES.extract(docs)
+    combined = docs.get("combined").text
 
-    winner_name, winner_inn = extract_winner_from_supplier_results(supplier_text)
-    participants_count = extract_applications_count_from_protocol(protocol_text)
-    participant_offer = money_after(supplier_text, ["Предложение участника", "Предложение о цене", "Цена, предложенная участником"], after=900)
-    contract_price = money_after(supplier_text, ["Цена контракта"], after=900)
-    nmck = money_after(common_text, ["Начальная максимальная цена контракта", "Начальная (максимальная) цена контракта", "НМЦК"], after=900) or contract_price
+    winner_name, winner_inn = values["winner_name"], values["winner_inn"]
+    participants_count = values["participants_count"]
+    participant_offer = values["participant_offer"]
+    contract_price = values["contract_price"]
+    nmck = values["nmck"] or contract_price
 
     winner_price = participant_offer if participant_offer is not None else contract_price
     price_basis, auto_reduction, price_comment = determine_price_basis(contract_price, participant_offer, combined)
@@ -360,18 +522,18 @@ def collect_44fz(reg_number: str, deal_id: Optional[int], task_id: Optional[int]
         "procurement_number": reg_number,
         "law": "44-ФЗ",
         "source_type": "eis_44_supplier_results_and_final_protocol",
-        "procedure_type": extract_procedure_type(combined),
-        "purchase_name": extract_purchase_name(common_text, supplier_text),
-        "customer_name": extract_customer_name(common_text, supplier_text),
-        "procurement_status": extract_status(combined),
+        "procedure_type": values["procedure_type"],
+        "purchase_name": values["purchase_name"],
+        "customer_name": values["customer_name"],
+        "procurement_status": values["procurement_status"],
         "nmck": nmck,
         "contract_price": contract_price,
         "price_basis": price_basis,
         "auto_calculate_reduction": auto_reduction,
         "protocol_url": protocol_url,
-        "protocol_name": protocol_name,
-        "protocol_date": protocol_date,
-        "failed_procurement_reason": extract_failed_reason(protocol_text, supplier_text),
+        "protocol_name": values["protocol_name"],
+        "protocol_date": values["protocol_date"],
+        "failed_procurement_reason": values["failed_reason"],
         "winner_name": winner_name,
         "winner_inn": winner_inn,
         "winner_price": winner_price,
@@ -379,8 +541,8 @@ def collect_44fz(reg_number: str, deal_id: Optional[int], task_id: Optional[int]
         "reduction_percent": reduction_percent,
         "participants_count": participants_count,
         "our_place": None,
-        "contract_registry_number": extract_contract_registry_number(supplier_text),
-        "contract_publish_date": extract_contract_publish_date(supplier_text),
+        "contract_registry_number": values["contract_registry_number"],
+        "contract_publish_date": values["contract_publish_date"],
         "result_status": result_status,
         "confidence": confidence,
         "comment": (
@@ -416,6 +578,9 @@ def main(argv: Optional[Iterable[str]] = None) -> int:
     parser.add_argument("--common-info-html", default="", help="Optional saved common-info HTML")
     parser.add_argument("--output", default="", help="Output JSON path")
     parser.add_argument("--print-json", action="store_true", help="Print JSON to stdout")
+    parser.add_argument("--result-index", default="", help="SQLite index built by eis_xml_index.py; consulted before downloading pages")
+    parser.add_argument("--stream-pages", action="store_true", help="Download pages compressed and stop once the labels the extractors need have been read")
+    parser.add_argument("--max-page-bytes", type=int, default=DEFAULT_MAX_PAGE_BYTES, help="Hard cap on decompressed bytes read per page with --stream-pages")
     args = parser.parse_args(list(argv) if argv is not None else None)
 
     reg_number = args.procurement_number.strip()
@@ -423,6 +588,9 @@ def main(argv: Optional[Iterable[str]] = None) -> int:
         eprint("procurement-number must be a 19-digit EIS notice number")
         return 2
 
+    if args.result_index:
+        configure_result_index(eis_xml_index.EisResultIndex(Path(args.result_index)))
+    configure_streaming(args.stream_pages, args.max_page_bytes)
     payload = collect_44fz(
         reg_number,
         args.deal_id,
@@ -11,7 +11,6 @@ can be reviewed and then passed to fill_tender_result.py.
 from __future__ import annotations
 
 import argparse
-import html
 import json
 import re
 import sys
@@ -20,15 +19,19 @@ import urllib.request
 from pathlib import Path
 from typing import Any, Dict, Iterable, List, Optional, Tuple
 
+SCRIPT_DIR = Path(__file__).resolve().parent
+if str(SCRIPT_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPT_DIR))
+
+import extraction_rules  # noqa: E402
+
 EIS_BASE = "https://zakupki.gov.ru"
 SUPPLIER_RESULTS_PATH = "/epz/order/notice/zk20/view/supplier-results.html"
 COMMON_INFO_PATH = "/epz/order/notice/zk20/view/common-info.html"
 PROTOCOL_MAIN_PATH = "/epz/order/notice/zk20/view/protocol/protocol-main-info.html"
 
-MONEY_RE = re.compile(r"(?<!\d)(\d{1,3}(?:[\s\u00a0]\d{3})*(?:[,.]\d{2})|\d+(?:[,.]\d{2}))(?:\s*(?:₽|руб\.?|RUB))?", re.IGNORECASE)
-INN_RE = re.compile(r"\b(\d{10}|\d{12})\b")
-DATE_RE = re.compile(r"\b(\d{2}\.\d{2}\.\d{4})\b")
-REGISTRY_CONTRACT_RE = re.compile(r"\b(\d{19,20})\b")
+RULES = extraction_rules.load()["collect_eis"]
+MONEY_RE = RULES.patterns["money"]
 
 PRICE_BASIS_CONTRACT = "contract_price"
 PRICE_BASIS_PARTICIPANT_OFFER = "participant_offer_unit_price"
@@ -68,47 +71,11 @@ def read_source_html(path: Path) -> str:
 
 
 def strip_html(raw_html: str) -> str:
-    text = re.sub(r"(?is)<script.*?</script>", " ", raw_html)
-    text = re.sub(r"(?is)<style.*?</style>", " ", text)
-    text = re.sub(r"(?is)<svg.*?</svg>", " ", text)
-    text = re.sub(r"(?is)<!--.*?-->", " ", text)
-    text = re.sub(r"(?i)</(?:div|p|tr|td|th|li|br|section|article|h\d)>", "\n", text)
-    text = re.sub(r"(?s)<[^>]+>", " ", text)
-    text = html.unescape(text)
-    text = text.replace("\u00a0", " ")
-    text = re.sub(r"[ \t\r\f\v]+", " ", text)
-    text = re.sub(r"\n\s+", "\n", text)
-    text = re.sub(r"\n{2,}", "\n", text)
-    return text.strip()
-
-
-def compact_text(text: str) -> str:
-    return re.sub(r"\s+", " ", text).strip()
-
-
-def window_around(text: str, keyword: str, before: int = 300, after: int = 1200) -> str:
-    low_text = text.lower()
-    idx = low_text.find(keyword.lower())
-    if idx < 0:
-        return ""
-    start = max(0, idx - before)
-    end = min(len(text), idx + len(keyword) + after)
-    return text[start:end]
-
-
-def parse_money(value: str | None) -> Optional[float]:
-    if not value:
-        return None
-    cleaned = value.replace("\u00a0", " ").replace(" ", "")
-    cleaned = re.sub(r"[^\d,.-]", "", cleaned)
-    if "," in cleaned and "." in cleaned:
-        cleaned = cleaned.replace(".", "").replace(",", ".")
-    else:
-        cleaned = cleaned.replace(",", ".")
-    try:
-        return float(cleaned)
-    except ValueError:
-        return None
+    return RULES.strip_html(raw_html)
+
+
+compact_text = extraction_rules.compact
+parse_money = extraction_rules.parse_money
 
 
 def find_first_money(text: str) -> Optional[float]:
@@ -119,201 +86,58 @@ def find_first_money(text: str) -> Optional[float]:
 
 
 def find_money_after(text: str, keywords: Iterable[str], window: int = 1400) -> Optional[float]:
-    for keyword in keywords:
-        fragment = window_around(text, keyword, before=0, after=window)
-        if not fragment:
-            continue
-        value = find_first_money(fragment[len(keyword):])
-        if value is not None:
-            return value
-    return None
-
-
-def find_text_between(text: str, start_keywords: Iterable[str], end_keywords: Iterable[str], max_len: int = 800) -> str:
-    low_text = text.lower()
-    start_idx = -1
-    start_word = ""
-    for keyword in start_keywords:
-        idx = low_text.find(keyword.lower())
-        if idx >= 0 and (start_idx < 0 or idx < start_idx):
-            start_idx = idx
-            start_word = keyword
-    if start_idx < 0:
-        return ""
-
-    fragment_start = start_idx + len(start_word)
-    fragment_end = min(len(text), fragment_start + max_len)
-    fragment = text[fragment_start:fragment_end]
-    low_fragment = fragment.lower()
-
-    end_idx = len(fragment)
-    for keyword in end_keywords:
-        idx = low_fragment.find(keyword.lower())
-        if idx >= 0:
-            end_idx = min(end_idx, idx)
-
-    return compact_text(fragment[:end_idx]).strip(" :-—\n\t")
+    return RULES.variant("contract_price", labels=list(keywords), after=window).extract(extraction_rules.Document(text), {})
 
 
 def extract_name_after(text: str, keywords: Iterable[str]) -> str:
-    value = find_text_between(
-        text,
-        keywords,
-        [
-            "ИНН",
-            "КПП",
-            "Почтовый адрес",
-            "Место нахождения",
-            "Предложение участника",
-            "Цена контракта",
-            "Реестровый номер контракта",
-            "Дата размещения",
-        ],
-        max_len=1000,
-    )
-    value = re.sub(r"^(участника|поставщика|подрядчика|исполнителя)\s*", "", value, flags=re.IGNORECASE)
-    return value.strip(" .;:")
+    return RULES.variant("supplier_name", starts=list(keywords)).extract(extraction_rules.Document(text), {})
 
 
-def extract_inn_near(text: str, keyword: str) -> str:
-    fragment = window_around(text, keyword, before=0, after=1200)
-    if not fragment:
-        return ""
-    match = INN_RE.search(fragment)
-    return match.group(1) if match else ""
+def extract_field(name: str, text: str) -> Any:
+    """One field of config/extraction_rules.json from a compacted page text."""
+    return RULES.extract({"page": text}, (name,))[name]
 
 
 def extract_protocol(text: str, procurement_number: str) -> Tuple[str, str, str]:
-    protocol_name = ""
-    protocol_date = ""
-
-    protocol_fragment = window_around(text, "Протокол подведения итогов", before=100, after=900)
-    if protocol_fragment:
-        date_match = DATE_RE.search(protocol_fragment)
-        if date_match:
-            protocol_date = date_match.group(1)
-        name_match = re.search(
-            r"(Протокол\s+подведения\s+итогов[^\n]{0,250}?(?:№\s*[А-ЯA-Z0-9-]+)?)",
-            compact_text(protocol_fragment),
-            flags=re.IGNORECASE,
-        )
-        if name_match:
-            protocol_name = compact_text(name_match.group(1))
-
-    if not protocol_name:
-        protocol_name = "Протокол подведения итогов определения поставщика (подрядчика, исполнителя)"
-
+    values = RULES.extract({"page": text}, ("protocol_name", "protocol_date"))
     protocol_url = build_url(PROTOCOL_MAIN_PATH, procurement_number, "type=izk&version=1")
-    return protocol_name, protocol_date, protocol_url
+    return values["protocol_name"], values["protocol_date"], protocol_url
 
 
 def extract_failed_reason(text: str) -> str:
-    candidates = [
-        "признан несостоявшимся",
-        "признана несостоявшейся",
-        "подана только одна заявка",
-        "только одна заявка",
-    ]
-    for keyword in candidates:
-        fragment = window_around(text, keyword, before=250, after=450)
-        if fragment:
-            return compact_text(fragment)
-    return ""
+    return extract_field("failed_reason", text)
 
 
 def extract_participants_count(text: str) -> Optional[int]:
-    patterns = [
-        r"Количество\s+поданных\s+заявок\s*[:\-]?\s*(\d+)",
-        r"Подано\s+заявок\s*[:\-]?\s*(\d+)",
-        r"Количество\s+участников\s*[:\-]?\s*(\d+)",
-        r"Всего\s+заявок\s*[:\-]?\s*(\d+)",
-    ]
-    for pattern in patterns:
-        match = re.search(pattern, text, flags=re.IGNORECASE)
-        if match:
-            return int(match.group(1))
-
-    if re.search(r"подан[ао]?\s+только\s+одна\s+заявк", text, flags=re.IGNORECASE):
-        return 1
-    if re.search(r"только\s+одна\s+заявк", text, flags=re.IGNORECASE):
-        return 1
-
-    return None
+    return extract_field("participants_count", text)
 
 
 def extract_purchase_name(text: str) -> str:
-    return find_text_between(
-        text,
-        ["Наименование объекта закупки", "Объект закупки", "Наименование закупки"],
-        ["Этап закупки", "Способ определения", "Заказчик", "Организация"],
-        max_len=1200,
-    )
+    return extract_field("purchase_name", text)
 
 
 def extract_customer_name(text: str) -> str:
-    value = find_text_between(
-        text,
-        ["Заказчик", "Наименование заказчика"],
-        ["Контактная информация", "Размещение осуществляет", "Ответственное должностное лицо", "Место нахождения"],
-        max_len=1000,
-    )
-    value = re.sub(r"^Наименование\s+заказчика\s*", "", value, flags=re.IGNORECASE)
-    return value.strip(" .;:")
+    return extract_field("customer_name", text)
 
 
 def extract_procedure_type(text: str) -> str:
-    known = [
-        "Запрос котировок в электронной форме",
-        "Электронный аукцион",
-        "Открытый конкурс в электронной форме",
-        "Закупка у единственного поставщика",
-    ]
-    low = text.lower()
-    for item in known:
-        if item.lower() in low:
-            return item
-    return find_text_between(text, ["Способ определения поставщика", "Способ закупки"], ["Размещение", "Этап", "НМЦК"], max_len=500)
+    return extract_field("procedure_type", text)
 
 
 def extract_status(text: str) -> str:
-    known = [
-        "Определение поставщика завершено",
-        "Работа комиссии",
-        "Подача заявок",
-        "Закупка завершена",
-        "Отменена",
-    ]
-    low = text.lower()
-    for item in known:
-        if item.lower() in low:
-            return item
-    return ""
+    return extract_field("procurement_status", text)
 
 
 def extract_law(text: str) -> str:
-    if "44-ФЗ" in text or "44 ФЗ" in text:
-        return "44-ФЗ"
-    if "223-ФЗ" in text or "223 ФЗ" in text:
-        return "223-ФЗ"
-    return ""
+    return extract_field("law", text)
 
 
 def extract_registry_contract_number(text: str) -> str:
-    fragment = window_around(text, "Реестровый номер контракта", before=0, after=500)
-    if fragment:
-        match = REGISTRY_CONTRACT_RE.search(fragment)
-        if match:
-            return match.group(1)
-    return ""
+    return extract_field("contract_registry_number", text)
 
 
 def extract_contract_publish_date(text: str) -> str:
-    fragment = window_around(text, "Дата размещения подписанного контракта", before=0, after=500)
-    if fragment:
-        match = DATE_RE.search(fragment)
-        if match:
-            return match.group(1)
-    return ""
+    return extract_field("contract_publish_date", text)
 
 
 def determine_price_basis(contract_price: Optional[float], participant_offer_price: Optional[float], text: str) -> Tuple[str, bool, Optional[float], str]:
@@ -346,37 +170,22 @@ def calculate_reduction(nmck: Optional[float], winner_price: Optional[float], au
 
 def collect_from_text(text: str, procurement_number: str, deal_id: Optional[int], task_id: Optional[int]) -> Dict[str, Any]:
     compact = compact_text(text)
-    lower = compact.lower()
-
-    protocol_name, protocol_date, protocol_url = extract_protocol(compact, procurement_number)
-    failed_reason = extract_failed_reason(compact)
-    participants_count = extract_participants_count(compact)
-
-    participant_offer_price = find_money_after(
-        compact,
-        [
-            "Предложение участника",
-            "Предложение о цене",
-            "Цена, предложенная участником",
-        ],
-        window=700,
-    )
-    contract_price = find_money_after(compact, ["Цена контракта"], window=700)
-    nmck = find_money_after(
-        compact,
-        [
-            "Начальная максимальная цена контракта",
-            "Начальная (максимальная) цена контракта",
-            "НМЦК",
-        ],
-        window=700,
-    )
+    docs = RULES.documents({"page": compact})
+    values = RULES.extract(docs)
+    lower = docs.get("page").low
 
-    planned_participant_name = extract_name_after(compact, ["Наименование участника", "Участник, с которым планируется заключить контракт"])
-    planned_participant_inn = extract_inn_near(compact, "Наименование участника")
+    protocol_name, protocol_date = values["protocol_name"], values["protocol_date"]
+    protocol_url = build_url(PROTOCOL_MAIN_PATH, procurement_number, "type=izk&version=1")
+    failed_reason = values["failed_reason"]
+    participants_count = values["participants_count"]
+    participant_offer_price = values["participant_offer"]
+    contract_price = values["contract_price"]
+    nmck = values["nmck"]
 
-    supplier_name = extract_name_after(compact, ["Поставщик", "Подрядчик", "Исполнитель"])
-    supplier_inn = extract_inn_near(compact, supplier_name) if supplier_name else ""
+    planned_participant_name = values["planned_participant_name"]
+    planned_participant_inn = values["planned_participant_inn"]
+    supplier_name = values["supplier_name"]
+    supplier_inn = values["supplier_inn"]
 
     winner_name = supplier_name or planned_participant_name
     winner_inn = supplier_inn or planned_participant_inn
@@ -385,8 +194,8 @@ def collect_from_text(text: str, procurement_number: str, deal_id: Optional[int]
     price_basis, auto_calc, reduction_percent, price_logic_comment = determine_price_basis(contract_price, participant_offer_price, compact)
     reduction_percent = calculate_reduction(nmck or contract_price, winner_price, auto_calc)
 
-    contract_registry_number = extract_registry_contract_number(compact)
-    contract_publish_date = extract_contract_publish_date(compact)
+    contract_registry_number = values["contract_registry_number"]
+    contract_publish_date = values["contract_publish_date"]
 
     warnings: List[str] = []
     if not winner_name:
@@ -408,11 +217,11 @@ def collect_from_text(text: str, procurement_number: str, deal_id: Optional[int]
         "deal_id": deal_id,
         "task_id": task_id,
         "procurement_number": procurement_number,
-        "law": extract_law(compact),
-        "procedure_type": extract_procedure_type(compact),
-        "purchase_name": extract_purchase_name(compact),
-        "customer_name": extract_customer_name(compact),
-        "procurement_status": extract_status(compact),
+        "law": values["law"],
+        "procedure_type": values["procedure_type"],
+        "purchase_name": values["purchase_name"],
+        "customer_name": values["customer_name"],
+        "procurement_status": values["procurement_status"],
         "nmck": nmck or contract_price,
         "contract_price": contract_price,
         "price_basis": price_basis,
@@ -465,6 +274,7 @@ def main(argv: Optional[Iterable[str]] = None) -> int:
     parser.add_argument("--source-html", default=None, help="Optional local saved EIS HTML page")
     parser.add_argument("--output", default=None, help="Output JSON path")
     parser.add_argument("--print-json", action="store_true", help="Print JSON to stdout")
+    parser.add_argument("--extraction-memo", default=None, help="SQLite memo of extraction results keyed by page fingerprints")
     args = parser.parse_args(list(argv) if argv is not None else None)
 
     procurement_number = args.procurement_number.strip()
@@ -482,8 +292,14 @@ def main(argv: Optional[Iterable[str]] = None) -> int:
         eprint(f"Failed to read EIS source page: {exc}")
         return 1
 
-    text = strip_html(raw_html)
-    payload = collect_from_text(text, procurement_number, args.deal_id, args.task_id)
+    if args.extraction_memo:
+        import extraction_memo
+
+        with extraction_memo.ExtractionMemo(Path(args.extraction_memo)) as memo:
+            payload = memo.collect_eis_from_html(raw_html, procurement_number, args.deal_id, args.task_id)
+    else:
+        text = strip_html(raw_html)
+        payload = collect_from_text(text, procurement_number, args.deal_id, args.task_id)
 
     output_text = json.dumps(payload, ensure_ascii=False, indent=2)
 
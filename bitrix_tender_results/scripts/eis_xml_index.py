@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""Local index of 44-FZ results built from EIS open-data XML archives.
+
+EIS publishes protocols and contracts as zipped XML exports (ftp.zakupki.gov.ru,
+`fcs_regions/<region>/protocols` and `.../contracts`). This script streams a
+local mirror of those archives: every `.zip` member is read through
+`zipfile` and `xml.etree.ElementTree.iterparse`, one document at a time, and
+the document is cleared as soon as it is indexed, so neither the archive nor
+an XML file is ever loaded whole.
+
+Per registry (procurement) number the index keeps:
+- from protocols: winner, winner INN, offer price, application count;
+- from contracts: supplier, supplier INN, contract price, registry number;
+- for both: the source document as `<archive>!<member.xml>` (or the XML path).
+
+Tags are matched by local name, so schema namespaces and versions do not
+matter. A protocol that names a winner replaces the figures of an earlier
+protocol without one; cancel/evasion protocols are ignored.
+
+collect_44fz_result.collect_44fz consults the index (see --result-index)
+before downloading any EIS page.
+
+    python bitrix_tender_results/scripts/eis_xml_index.py --index bitrix_tender_results/out/eis_results.sqlite mirror/protocols mirror/contracts
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sqlite3
+import sys
+import threading
+import time
+import zipfile
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+PROTOCOL_PREFIXES = ("fcsProtocol", "epProtocol")
+IGNORED_PROTOCOL_MARKERS = ("Cancel", "Evasion", "Deviation")
+CONTRACT_TAGS = {"contract"}
+APPLICATION_TAGS = {"application", "applicationInfo"}
+PURCHASE_NUMBER_TAGS = ("purchaseNumber", "notificationNumber")
+PRICE_TAGS = ("finalPrice", "winnerPrice", "offerPrice", "price")
+NAME_TAGS = ("fullName", "organizationName", "shortName")
+PERSON_NAME_TAGS = ("lastName", "firstName", "middleName")
+INN_TAGS = ("INN", "inn")
+RATING_TAGS = ("appRating", "rating")
+WINNER_FLAG_TAGS = ("winnerIndication", "isWinner", "winner")
+DATE_TAGS = ("publishDate", "protocolDate", "signDate")
+
+COLUMNS = (
+    "winner_name",
+    "winner_inn",
+    "offer_price",
+    "participants_count",
+    "protocol_date",
+    "supplier_name",
+    "supplier_inn",
+    "contract_price",
+    "contract_registry_number",
+    "contract_publish_date",
+    "protocol_source",
+    "contract_source",
+)
+PROTOCOL_COLUMNS = ("winner_name", "winner_inn", "offer_price", "participants_count", "protocol_date", "protocol_source")
+
+
+def local_name(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def first_text(element: ET.Element, names: Iterable[str]) -> str:
+    """Text of the first descendant with one of `names`, trying the names in order."""
+    for name in names:
+        for node in element.iter():
+            if local_name(node.tag) == name and (node.text or "").strip():
+                return node.text.strip()
+    return ""
+
+
+def top_level(element: ET.Element, names: set) -> Iterator[ET.Element]:
+    """Descendants named `names` that are not nested inside another such element."""
+    for child in element:
+        if local_name(child.tag) in names:
+            yield child
+        else:
+            yield from top_level(child, names)
+
+
+def to_number(text: str) -> Optional[float]:
+    try:
+        return float(text.replace(" ", "").replace(",", "."))
+    except ValueError:
+        return None
+
+
+def party_name(element: ET.Element) -> str:
+    name = first_text(element, NAME_TAGS)
+    if name:
+        return name
+    return " ".join(part for part in (first_text(element, [tag]) for tag in PERSON_NAME_TAGS) if part)
+
+
+def is_protocol(tag: str) -> bool:
+    return tag.startswith(PROTOCOL_PREFIXES) and not any(marker in tag for marker in IGNORED_PROTOCOL_MARKERS)
+
+
+def is_document(tag: str) -> bool:
+    return tag in CONTRACT_TAGS or tag.startswith(PROTOCOL_PREFIXES)
+
+
+def parse_protocol(element: ET.Element) -> Dict[str, Any]:
+    applications = list(top_level(element, APPLICATION_TAGS))
+    winner = None
+    for application in applications:
+        rating = first_text(application, RATING_TAGS)
+        flag = first_text(application, WINNER_FLAG_TAGS).lower()
+        if rating == "1" or flag in {"true", "1", "w"}:
+            winner = application
+            break
+    if winner is None and len(applications) == 1:
+        winner = applications[0]
+    record: Dict[str, Any] = {
+        "participants_count": len(applications) if applications else None,
+        "protocol_date": first_text(element, DATE_TAGS)[:10],
+    }
+    if winner is not None:
+        record.update({
+            "winner_name": party_name(winner),
+            "winner_inn": first_text(winner, INN_TAGS),
+            "offer_price": to_number(first_text(winner, PRICE_TAGS)),
+        })
+    return record
+
+
+def parse_contract(element: ET.Element) -> Dict[str, Any]:
+    supplier = next(top_level(element, {"supplier"}), None)
+    price_info = next(top_level(element, {"priceInfo"}), element)
+    return {
+        "supplier_name": party_name(supplier) if supplier is not None else "",
+        "supplier_inn": first_text(supplier, INN_TAGS) if supplier is not None else "",
+        "contract_price": to_number(first_text(price_info, ["price"])),
+        "contract_registry_number": first_text(element, ["regNum"]),
+        "contract_publish_date": first_text(element, DATE_TAGS)[:10],
+    }
+
+
+def iter_documents(stream: IO[bytes]) -> Iterator[ET.Element]:
+    """Yield protocol/contract elements one by one; each is cleared after the consumer is done with it."""
+    root: Optional[ET.Element] = None
+    open_documents = 0
+    for event, element in ET.iterparse(stream, events=("start", "end")):
+        tag = local_name(element.tag)
+        if event == "start":
+            if root is None:
+                root = element
+            if is_document(tag):
+                open_documents += 1
+            continue
+        if not is_document(tag):
+            continue
+        open_documents -= 1
+        if open_documents == 0:
+            yield element
+            element.clear()
+            if root is not None and root is not element:
+                root.clear()
+
+
+def iter_xml_streams(path: Path) -> Iterator[Tuple[str, IO[bytes]]]:
+    """Yield `(source, stream)` per XML document file; source is the path or `<archive>!<member>`."""
+    if path.is_dir():
+        for child in sorted(path.rglob("*")):
+            if child.suffix.lower() in {".zip", ".xml"}:
+                yield from iter_xml_streams(child)
+        return
+    if path.suffix.lower() == ".xml":
+        with path.open("rb") as stream:
+            yield str(path), stream
+        return
+    with zipfile.ZipFile(path) as archive:
+        for info in archive.infolist():
+            if info.filename.lower().endswith(".xml"):
+                with archive.open(info) as stream:
+                    yield f"{path}!{info.filename}", stream
+
+
+class EisResultIndex:
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Read from collection threads; every access goes through the lock.
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS eis_results (
+                procurement_number TEXT PRIMARY KEY,
+                winner_name TEXT,
+                winner_inn TEXT,
+                offer_price REAL,
+                participants_count INTEGER,
+                protocol_date TEXT,
+                supplier_name TEXT,
+                supplier_inn TEXT,
+                contract_price REAL,
+                contract_registry_number TEXT,
+                contract_publish_date TEXT,
+                protocol_source TEXT,
+                contract_source TEXT,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        # Indexes built before the source columns existed.
+        existing = {row[1] for row in self._conn.execute("PRAGMA table_info(eis_results)")}
+        for column in ("protocol_source", "contract_source"):
+            if column not in existing:
+                self._conn.execute(f"ALTER TABLE eis_results ADD COLUMN {column} TEXT")
+        self._conn.commit()
+
+    def __enter__(self) -> "EisResultIndex":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def get(self, procurement_number: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(f"SELECT {', '.join(COLUMNS)} FROM eis_results WHERE procurement_number = ?", (procurement_number,)).fetchone()
+        return dict(zip(COLUMNS, row)) if row is not None else None
+
+    def merge(self, procurement_number: str, record: Dict[str, Any], *, protocol: bool) -> None:
+        current = self.get(procurement_number) or dict.fromkeys(COLUMNS)
+        if protocol and current.get("winner_name") and not record.get("winner_name"):
+            # A protocol without a winner (e.g. first parts) never overrides the final one.
+            record = {key: value for key, value in record.items() if key not in PROTOCOL_COLUMNS or current.get(key) in (None, "")}
+        merged = {**current, **{key: value for key, value in record.items() if value not in (None, "")}}
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO eis_results (procurement_number, {', '.join(COLUMNS)}, updated_at) VALUES ({', '.join('?' * (len(COLUMNS) + 2))})",
+                (procurement_number, *(merged.get(column) for column in COLUMNS), time.time()),
+            )
+
+    def ingest(self, stream: IO[bytes], source: str = "") -> Dict[str, int]:
+        counts = {"protocols": 0, "contracts": 0, "skipped": 0}
+        for document in iter_documents(stream):
+            tag = local_name(document.tag)
+            number = first_text(document, PURCHASE_NUMBER_TAGS)
+            if not number or not (is_protocol(tag) or tag in CONTRACT_TAGS):
+                counts["skipped"] += 1
+                continue
+            if tag in CONTRACT_TAGS:
+                self.merge(number, {**parse_contract(document), "contract_source": source}, protocol=False)
+                counts["contracts"] += 1
+            else:
+                self.merge(number, {**parse_protocol(document), "protocol_source": source}, protocol=True)
+                counts["protocols"] += 1
+        with self._lock:
+            self._conn.commit()
+        return counts
+
+    def ingest_path(self, path: Path) -> Dict[str, int]:
+        totals = {"files": 0, "protocols": 0, "contracts": 0, "skipped": 0}
+        for source, stream in iter_xml_streams(path):
+            totals["files"] += 1
+            for key, value in self.ingest(stream, source).items():
+                totals[key] += value
+        return totals
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def main(argv: Optional[Iterable[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Index 44-FZ winners, offer prices and application counts from EIS XML archives")
+    parser.add_argument("paths", nargs="+", help="EIS .zip archives, .xml files or directories with them")
+    parser.add_argument("--index", default="bitrix_tender_results/out/eis_results.sqlite", help="SQLite index to create or update")
+    args = parser.parse_args(list(argv) if argv is not None else None)
+
+    totals: List[Dict[str, Any]] = []
+    with EisResultIndex(Path(args.index)) as index:
+        for path in args.paths:
+            try:
+                totals.append({"path": path, **index.ingest_path(Path(path))})
+            except (OSError, zipfile.BadZipFile, ET.ParseError) as exc:
+                print(f"Failed to ingest {path}: {exc}", file=sys.stderr)
+                return 1
+    print(json.dumps(totals, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,137 @@
+"""Memo of extraction results keyed by page fingerprints.
+
+The key is a sha256 over the extractor version, the procurement number, the
+raw pages and the fetch warnings that go into the payload. The extractor
+version is a sha256 of the extraction source files and the rules config, so
+any change to the extraction code or rules makes old entries unreachable;
+they are deleted when the memo is opened. Stored payloads carry no
+deal_id/task_id, which are filled in on a hit, so one entry serves every lot
+of a tender.
+
+A hit returns the stored payload without running strip_html or any extractor.
+The memo is a SQLite file shared by threads of one process.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+if str(SCRIPT_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPT_DIR))
+
+import collect_44fz_result  # noqa: E402
+import collect_eis_result  # noqa: E402
+
+EXTRACTOR_SOURCES = (
+    SCRIPT_DIR / "collect_44fz_result.py",
+    SCRIPT_DIR / "collect_eis_result.py",
+    SCRIPT_DIR / "extraction_rules.py",
+    SCRIPT_DIR / "regex_backend.py",
+    SCRIPT_DIR.parent / "config" / "extraction_rules.json",
+)
+IDENTITY_FIELDS = ("deal_id", "task_id")
+
+
+def extractor_version(sources: Iterable[Path] = EXTRACTOR_SOURCES) -> str:
+    digest = hashlib.sha256()
+    for path in sources:
+        digest.update(path.name.encode("utf-8") + b"\0" + path.read_bytes() + b"\0")
+    return digest.hexdigest()[:16]
+
+
+class ExtractionMemo:
+    def __init__(self, path: Path, version: Optional[str] = None) -> None:
+        self.path = path
+        self.version = version or extractor_version()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS extraction_memo (
+                fingerprint TEXT PRIMARY KEY,
+                version TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                stored_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("DELETE FROM extraction_memo WHERE version != ?", (self.version,))
+        self._conn.commit()
+
+    def __enter__(self) -> "ExtractionMemo":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def fingerprint(self, kind: str, procurement_number: str, parts: Iterable[str]) -> str:
+        digest = hashlib.sha256(f"{self.version}\0{kind}\0{procurement_number}".encode("utf-8"))
+        for part in parts:
+            data = part.encode("utf-8", errors="surrogatepass")
+            digest.update(b"\0" + str(len(data)).encode("ascii") + b"\0" + data)
+        return digest.hexdigest()
+
+    def get(self, fingerprint: str, deal_id: Optional[int], task_id: Optional[int]) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT payload FROM extraction_memo WHERE fingerprint = ?", (fingerprint,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return {**json.loads(row[0]), "deal_id": deal_id, "task_id": task_id}
+
+    def put(self, fingerprint: str, payload: Dict[str, Any]) -> None:
+        stored = {key: value for key, value in payload.items() if key not in IDENTITY_FIELDS}
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO extraction_memo (fingerprint, version, payload, stored_at) VALUES (?, ?, ?, ?)",
+                (fingerprint, self.version, json.dumps(stored, ensure_ascii=False), time.time()),
+            )
+            self._conn.commit()
+
+    def remember(self, fingerprint: str, deal_id: Optional[int], task_id: Optional[int], compute: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        cached = self.get(fingerprint, deal_id, task_id)
+        if cached is not None:
+            return cached
+        payload = compute()
+        self.put(fingerprint, payload)
+        return payload
+
+    def key_44fz(self, reg_number: str, pages: Dict[str, str], warnings: List[str]) -> str:
+        return self.fingerprint("44fz", reg_number, [pages.get("supplier_html", ""), pages.get("protocol_html", ""), pages.get("common_html", ""), *warnings])
+
+    def collect_44fz_from_pages(self, reg_number: str, deal_id: Optional[int], task_id: Optional[int], pages: Dict[str, str], warnings: List[str]) -> Dict[str, Any]:
+        """Memoized collect_44fz_result.collect_44fz_from_pages."""
+        return self.remember(
+            self.key_44fz(reg_number, pages, warnings),
+            deal_id,
+            task_id,
+            lambda: collect_44fz_result.collect_44fz_from_pages(reg_number, deal_id, task_id, pages, warnings),
+        )
+
+    def collect_eis_from_html(self, raw_html: str, procurement_number: str, deal_id: Optional[int], task_id: Optional[int]) -> Dict[str, Any]:
+        """Memoized strip_html + collect_eis_result.collect_from_text."""
+        return self.remember(
+            self.fingerprint("eis", procurement_number, [raw_html]),
+            deal_id,
+            task_id,
+            lambda: collect_eis_result.collect_from_text(collect_eis_result.strip_html(raw_html), procurement_number, deal_id, task_id),
+        )
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,458 @@
+"""Declarative extraction rules shared by collect_44fz_result and collect_eis_result.
+
+config/extraction_rules.json declares, per collector, the fields of the
+payload: labels, stop words, windows and the value type. `load` compiles the
+file once: labels and stops are lower-cased, regexes compiled (patterns with
+`max_chars` through regex_backend), nested rules built. Extraction then only
+slices windows out of `Document`s.
+
+A Document lower-cases its text once and keeps a table of label positions,
+so fields that share a label share one lookup and a field with a new label
+costs one `str.find` on the lower-cased copy, not another copy of the page.
+The stripped lines that `line_value` fields scan are split once per Document
+too. Joined pages look labels up in their parts and get no copy of their own.
+(A single combined-regex scan for all labels measured about twice as slow
+as these finds on the huge_protocol corpus case.)
+
+Sources a field can read from:
+- pages passed in by the collector (`supplier`, `protocol`, `common`, `page`);
+- `joins`: pages joined with newlines;
+- `sections`: a window of a source around a label, or the whole source when
+  the label is missing;
+- a list of sources: the first one with text.
+
+Field types:
+- money_after: first amount after the first label (in order) that has one;
+- pattern_after: group 1 of a named pattern in a window around a label, or
+  around the value of an earlier field (`label_from`);
+- text_between: text after the earliest start label up to the first stop;
+- line_value: value on the label's line, or on the lines below it up to a stop;
+- first_marker: first marker found, or the value paired with it;
+- window_text: compacted window around the first label found;
+- count: group 1 of the first pattern that matches, else 1 if a
+  `single_patterns` entry matches.
+Every field takes `default`, `fallback` (a nested rule on the same source)
+and `clean` (`compact`, `drop` regexes removed in order, `strip` characters).
+"""
+
+from __future__ import annotations
+
+import functools
+import html
+import json
+import re
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+if str(SCRIPT_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPT_DIR))
+
+import regex_backend  # noqa: E402
+
+RULES_PATH = SCRIPT_DIR.parent / "config" / "extraction_rules.json"
+
+TAG_RE = re.compile(r"(?s)<[^>]+>")
+HSPACE_RE = re.compile(r"[ \t\r\f\v]+")
+LINE_INDENT_RE = re.compile(r"\n\s+")
+BLANK_LINES_RE = re.compile(r"\n{2,}")
+SPACE_RE = re.compile(r"\s+")
+NON_MONEY_RE = re.compile(r"[^\d,.-]")
+LINE_STRIP = " :-—\t"
+
+
+def compact(text: str) -> str:
+    return SPACE_RE.sub(" ", text).strip()
+
+
+def stripped_lines(text: str) -> List[Tuple[str, str]]:
+    """Non-empty lines of `text` stripped of LINE_STRIP, each with its lower-case copy."""
+    return [(line, line.lower()) for line in (raw.strip(LINE_STRIP) for raw in text.splitlines()) if line]
+
+
+def parse_money(raw: Optional[str]) -> Optional[float]:
+    if not raw:
+        return None
+    cleaned = raw.replace("\u00a0", " ").replace(" ", "")
+    cleaned = NON_MONEY_RE.sub("", cleaned)
+    if "," in cleaned and "." in cleaned:
+        cleaned = cleaned.replace(".", "").replace(",", ".")
+    else:
+        cleaned = cleaned.replace(",", ".")
+    try:
+        return float(cleaned)
+    except ValueError:
+        return None
+
+
+class Document:
+    """Page text, its lower-case copy, its stripped lines and the positions of labels looked up so far."""
+
+    __slots__ = ("text", "low", "_positions", "_lines")
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.low = text.lower()
+        self._positions: Dict[str, int] = {}
+        self._lines: Optional[List[Tuple[str, str]]] = None
+
+    @property
+    def lines(self) -> List[Tuple[str, str]]:
+        if self._lines is None:
+            self._lines = stripped_lines(self.text)
+        return self._lines
+
+    def find(self, low_label: str) -> int:
+        position = self._positions.get(low_label)
+        if position is None:
+            position = self._positions[low_label] = self.low.find(low_label)
+        return position
+
+    def window(self, label: str, before: int, after: int, low_label: Optional[str] = None) -> str:
+        index = self.find(low_label if low_label is not None else label.lower())
+        if index < 0:
+            return ""
+        return self.text[max(0, index - before): min(len(self.text), index + len(label) + after)]
+
+
+class Joined:
+    """Documents joined with newlines, without a lower-case copy of the whole.
+
+    Labels never contain a newline, so the first occurrence of a label is the
+    first occurrence in the first part that has it. The text itself is only
+    joined when a window or the full text is asked for.
+    """
+
+    __slots__ = ("parts", "_text", "_positions", "_lines")
+
+    def __init__(self, parts: Sequence[Document]) -> None:
+        self.parts = parts
+        self._text: Optional[str] = None
+        self._positions: Dict[str, int] = {}
+        self._lines: Optional[List[Tuple[str, str]]] = None
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = "\n".join(part.text for part in self.parts)
+        return self._text
+
+    @property
+    def lines(self) -> List[Tuple[str, str]]:
+        # Parts are joined with newlines, so the lines of the whole are the lines of the parts.
+        if self._lines is None:
+            self._lines = [line for part in self.parts for line in part.lines]
+        return self._lines
+
+    def find(self, low_label: str) -> int:
+        position = self._positions.get(low_label)
+        if position is None:
+            position = -1
+            offset = 0
+            for part in self.parts:
+                found = part.find(low_label)
+                if found >= 0:
+                    position = offset + found
+                    break
+                offset += len(part.low) + 1
+            self._positions[low_label] = position
+        return position
+
+    window = Document.window
+
+
+EMPTY = Document("")
+
+
+class Rule:
+    __slots__ = ("source", "default", "fallback", "compact", "drop", "strip")
+
+    def __init__(self, spec: Mapping[str, Any], patterns: Mapping[str, Any]) -> None:
+        self.source = spec.get("source")
+        self.default = spec.get("default", "")
+        self.fallback = compile_rule({**spec["fallback"], "source": self.source}, patterns) if "fallback" in spec else None
+        clean = spec.get("clean", {})
+        self.compact = bool(clean.get("compact"))
+        self.drop = [re.compile(pattern, re.IGNORECASE) for pattern in clean.get("drop", ())]
+        self.strip = clean.get("strip")
+
+    def find(self, doc: Document, values: Mapping[str, Any]) -> Any:
+        raise NotImplementedError
+
+    def extract(self, doc: Document, values: Mapping[str, Any]) -> Any:
+        value = self.find(doc, values)
+        if value in (None, "") and self.fallback is not None:
+            value = self.fallback.extract(doc, values)
+        if value in (None, ""):
+            return self.default
+        if self.compact:
+            value = compact(value)
+        for pattern in self.drop:
+            value = pattern.sub("", value)
+        return value.strip(self.strip) if self.strip is not None else value
+
+
+class MoneyAfter(Rule):
+    __slots__ = ("labels", "after", "money")
+
+    def __init__(self, spec: Mapping[str, Any], patterns: Mapping[str, Any]) -> None:
+        super().__init__({"default": None, **spec}, patterns)
+        self.labels = [(label, label.lower()) for label in spec["labels"]]
+        self.after = spec["after"]
+        self.money = patterns["money"]
+
+    def find(self, doc: Document, values: Mapping[str, Any]) -> Optional[float]:
+        for label, low_label in self.labels:
+            fragment = doc.window(label, 0, self.after, low_label)
+            if not fragment:
+                continue
+            match = self.money.search(fragment[len(label):])
+            value = parse_money(match.group(1)) if match else None
+            if value is not None:
+                return value
+        return None
+
+
+class PatternAfter(Rule):
+    __slots__ = ("label", "low_label", "label_from", "before", "after", "pattern", "compact_window")
+
+    def __init__(self, spec: Mapping[str, Any], patterns: Mapping[str, Any]) -> None:
+        super().__init__(spec, patterns)
+        self.label = spec.get("label", "")
+        self.low_label = self.label.lower()
+        self.label_from = spec.get("label_from")
+        self.before = spec["before"]
+        self.after = spec["after"]
+        self.pattern = patterns[spec["pattern"]]
+        self.compact_window = bool(spec.get("compact_window"))
+
+    def find(self, doc: Document, values: Mapping[str, Any]) -> str:
+        if self.label_from:
+            label = values.get(self.label_from) or ""
+            if not label:
+                return ""
+            fragment = doc.window(label, self.before, self.after)
+        else:
+            fragment = doc.window(self.label, self.before, self.after, self.low_label)
+        if not fragment:
+            return ""
+        match = self.pattern.search(compact(fragment) if self.compact_window else fragment)
+        return compact(match.group(1)) if match else ""
+
+
+class TextBetween(Rule):
+    __slots__ = ("starts", "stops", "max_len", "text_strip")
+
+    def __init__(self, spec: Mapping[str, Any], patterns: Mapping[str, Any]) -> None:
+        super().__init__(spec, patterns)
+        self.starts = [(start, start.lower()) for start in spec["starts"]]
+        self.stops = [stop.lower() for stop in spec["stops"]]
+        self.max_len = spec["max_len"]
+        self.text_strip = spec.get("strip", " :-—")
+
+    def find(self, doc: Document, values: Mapping[str, Any]) -> str:
+        best = -1
+        best_start = ""
+        for start, low_start in self.starts:
+            position = doc.find(low_start)
+            if position >= 0 and (best < 0 or position < best):
+                best = position
+                best_start = start
+        if best < 0:
+            return ""
+        fragment = doc.text[best + len(best_start): best + len(best_start) + self.max_len]
+        low_fragment = fragment.lower()
+        end = len(fragment)
+        for stop in self.stops:
+            position = low_fragment.find(stop)
+            if position >= 0:
+                end = min(end, position)
+        return compact(fragment[:end]).strip(self.text_strip)
+
+
+class LineValue(Rule):
+    __slots__ = ("labels", "stops", "max_lines")
+
+    def __init__(self, spec: Mapping[str, Any], patterns: Mapping[str, Any]) -> None:
+        super().__init__(spec, patterns)
+        self.labels = [label.lower() for label in spec["labels"]]
+        self.stops = [stop.lower() for stop in spec["stops"]]
+        self.max_lines = spec.get("max_lines", 10)
+
+    def find(self, doc: Document, values: Mapping[str, Any]) -> str:
+        lines = doc.lines
+        for index, (line, low_line) in enumerate(lines):
+            label = next((label for label in self.labels if label in low_line), None)
+            if not label:
+                continue
+            tail = line[low_line.find(label) + len(label):].strip(LINE_STRIP)
+            if tail and not any(stop in tail.lower() for stop in self.stops):
+                return compact(tail)
+            collected: List[str] = []
+            for next_line, low_next in lines[index + 1: index + 1 + self.max_lines]:
+                if any(stop in low_next for stop in self.stops):
+                    break
+                collected.append(next_line)
+            value = compact(" ".join(collected)).strip(LINE_STRIP)
+            if value:
+                return value
+        return ""
+
+
+class FirstMarker(Rule):
+    __slots__ = ("markers", "case_sensitive")
+
+    def __init__(self, spec: Mapping[str, Any], patterns: Mapping[str, Any]) -> None:
+        super().__init__(spec, patterns)
+        self.case_sensitive = bool(spec.get("case_sensitive"))
+        pairs = [(marker, marker) if isinstance(marker, str) else tuple(marker) for marker in spec["markers"]]
+        self.markers = [(marker if self.case_sensitive else marker.lower(), value) for marker, value in pairs]
+
+    def find(self, doc: Document, values: Mapping[str, Any]) -> str:
+        for marker, value in self.markers:
+            if (marker in doc.text) if self.case_sensitive else doc.find(marker) >= 0:
+                return value
+        return ""
+
+
+class WindowText(Rule):
+    __slots__ = ("labels", "before", "after")
+
+    def __init__(self, spec: Mapping[str, Any], patterns: Mapping[str, Any]) -> None:
+        super().__init__(spec, patterns)
+        self.labels = [(label, label.lower()) for label in spec["labels"]]
+        self.before = spec["before"]
+        self.after = spec["after"]
+
+    def find(self, doc: Document, values: Mapping[str, Any]) -> str:
+        for label, low_label in self.labels:
+            fragment = doc.window(label, self.before, self.after, low_label)
+            if fragment:
+                return compact(fragment)
+        return ""
+
+
+class Count(Rule):
+    __slots__ = ("patterns", "single_patterns")
+
+    def __init__(self, spec: Mapping[str, Any], patterns: Mapping[str, Any]) -> None:
+        super().__init__({"default": None, **spec}, patterns)
+        self.patterns = [re.compile(pattern, re.IGNORECASE) for pattern in spec["patterns"]]
+        self.single_patterns = [re.compile(pattern, re.IGNORECASE) for pattern in spec.get("single_patterns", ())]
+
+    def extract(self, doc: Document, values: Mapping[str, Any]) -> Optional[int]:
+        for pattern in self.patterns:
+            match = pattern.search(doc.text)
+            if match:
+                return int(match.group(1))
+        if any(pattern.search(doc.text) for pattern in self.single_patterns):
+            return 1
+        return self.default
+
+
+RULE_TYPES = {
+    "money_after": MoneyAfter,
+    "pattern_after": PatternAfter,
+    "text_between": TextBetween,
+    "line_value": LineValue,
+    "first_marker": FirstMarker,
+    "window_text": WindowText,
+    "count": Count,
+}
+
+
+def compile_rule(spec: Mapping[str, Any], patterns: Mapping[str, Any]) -> Rule:
+    try:
+        rule_type = RULE_TYPES[spec["type"]]
+    except KeyError:
+        raise ValueError(f"Unknown extraction rule type: {spec.get('type')!r}") from None
+    return rule_type(spec, patterns)
+
+
+def compile_pattern(spec: Mapping[str, Any]) -> Any:
+    flags = re.IGNORECASE if spec.get("ignore_case") else 0
+    if "max_chars" in spec:
+        return regex_backend.compile(spec["regex"], flags, max_chars=spec["max_chars"])
+    return re.compile(spec["regex"], flags)
+
+
+class Documents:
+    """Documents of one collection, built on first use from the pages passed in."""
+
+    __slots__ = ("rules", "texts", "_docs")
+
+    def __init__(self, rules: "RuleSet", texts: Mapping[str, str]) -> None:
+        self.rules = rules
+        self.texts = texts
+        self._docs: Dict[str, Union[Document, Joined]] = {}
+
+    def get(self, source: Union[str, Sequence[str], None]) -> Union[Document, Joined]:
+        if source is None:
+            return EMPTY
+        if not isinstance(source, str):
+            return next((doc for doc in map(self.get, source) if doc.text), EMPTY)
+        doc = self._docs.get(source)
+        if doc is None:
+            if source not in self.texts and source in self.rules.joins:
+                doc = Joined([self.get(part) for part in self.rules.joins[source]])
+            else:
+                doc = Document(self._text(source))
+            self._docs[source] = doc
+        return doc
+
+    def _text(self, source: str) -> str:
+        if source in self.texts:
+            return self.texts[source] or ""
+        section = self.rules.sections.get(source)
+        if section is not None:
+            doc = self.get(section["source"])
+            return doc.window(section["label"], section.get("before", 0), section.get("after", 0)) or doc.text
+        return ""
+
+
+class RuleSet:
+    """Compiled rules of one collector."""
+
+    def __init__(self, spec: Mapping[str, Any], patterns: Mapping[str, Any]) -> None:
+        self.spec = spec
+        self.patterns = patterns
+        self.line_break = re.compile(spec["line_break"])
+        self.joins: Dict[str, List[str]] = dict(spec.get("joins", {}))
+        self.sections: Dict[str, Dict[str, Any]] = dict(spec.get("sections", {}))
+        self.fields: Dict[str, Rule] = {name: compile_rule(field, patterns) for name, field in spec["fields"].items()}
+
+    def strip_html(self, raw_html: str) -> str:
+        text = regex_backend.strip_hidden(raw_html)
+        text = self.line_break.sub("\n", text)
+        text = TAG_RE.sub(" ", text)
+        text = html.unescape(text).replace("\u00a0", " ")
+        text = HSPACE_RE.sub(" ", text)
+        text = LINE_INDENT_RE.sub("\n", text)
+        text = BLANK_LINES_RE.sub("\n", text)
+        return text.strip()
+
+    def documents(self, texts: Mapping[str, str]) -> Documents:
+        return Documents(self, texts)
+
+    def variant(self, name: str, **overrides: Any) -> Rule:
+        """A field rule with some of its settings replaced, e.g. other labels."""
+        return compile_rule({**self.spec["fields"][name], **overrides}, self.patterns)
+
+    def extract(self, docs: Union[Documents, Mapping[str, str]], names: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """Values of the fields (all, or `names`), in declaration order so `label_from` sees earlier values."""
+        if not isinstance(docs, Documents):
+            docs = self.documents(docs)
+        wanted = set(names) if names is not None else None
+        values: Dict[str, Any] = {}
+        for name, rule in self.fields.items():
+            if wanted is None or name in wanted:
+                values[name] = rule.extract(docs.get(rule.source), values)
+        return values
+
+
+@functools.lru_cache(maxsize=None)
+def load(path: Path = RULES_PATH) -> Dict[str, RuleSet]:
+    config = json.loads(Path(path).read_text(encoding="utf-8"))
+    patterns = {name: compile_pattern(spec) for name, spec in config["patterns"].items()}
+    return {name: RuleSet(spec, patterns) for name, spec in config.items() if name != "patterns"}
@@ -6,6 +6,11 @@ This script must be placed inside Aleksanids/bitrix-price-parser at:
 bitrix_tender_results/scripts/fill_batch_payload.py
 
 It reuses fill_tender_result.py and processes payload.items one by one.
+Items are scheduled in chunks sized to the Bitrix24 batch limit and the rate
+budget; the deals of the next chunk are prefetched with one `batch` request
+while the current chunk is being written. With --applied-index items whose
+fields were already written to the same deal answer `no_op` without any
+Bitrix24 call (see applied_index.py).
 """
 
 from __future__ import annotations
@@ -15,13 +20,19 @@ import json
 import os
 import sys
 from pathlib import Path
-from typing import Any, Dict, Iterable, List
+from typing import Any, Dict, Iterable, List, Tuple
 
 SCRIPT_DIR = Path(__file__).resolve().parent
 if str(SCRIPT_DIR) not in sys.path:
     sys.path.insert(0, str(SCRIPT_DIR))
 
+import applied_index  # noqa: E402
+import batch_output  # noqa: E402
+import batch_scheduler  # noqa: E402
+import checkpoint_journal  # noqa: E402
 import fill_tender_result  # noqa: E402
+import task_deal_cache  # noqa: E402
+import timing  # noqa: E402
 
 
 def load_json(path_or_text: str) -> Dict[str, Any]:
@@ -50,7 +61,56 @@ def normalize_items(data: Dict[str, Any]) -> List[Dict[str, Any]]:
     return normalized
 
 
-def process_item(payload: Dict[str, Any], config: Dict[str, Any], webhook_url: str | None) -> Dict[str, Any]:
+def applied_key(item: Dict[str, Any], config: Dict[str, Any]) -> Tuple[int, Dict[str, Any]] | None:
+    """(deal_id, update fields) an update item is indexed under; None when the deal is not given explicitly."""
+    deal_id = item.get("deal_id")
+    if item.get("mode") != "update" or not isinstance(deal_id, int) or deal_id <= 0:
+        return None
+    fields = fill_tender_result.build_update_fields(item, config)
+    return (deal_id, fields) if fields else None
+
+
+def prefetch_chunk(items: List[Dict[str, Any]], webhook_url: str | None) -> Dict[int, Dict[str, Any]]:
+    deal_ids = [item["deal_id"] for item in items if item.get("mode") == "update" and isinstance(item.get("deal_id"), int) and item["deal_id"] > 0]
+    if not webhook_url or not deal_ids:
+        return {}
+    try:
+        return fill_tender_result.prefetch_deal_fields(webhook_url, deal_ids)
+    except RuntimeError as exc:
+        print(f"Chunk prefetch failed, reading deals one by one: {exc}", file=sys.stderr)
+        return {}
+
+
+def prefetch_task_bindings(items: List[Dict[str, Any]], webhook_url: str | None, cache: task_deal_cache.TaskDealCache) -> None:
+    """Fill the cache for tasks of items that will be resolved by task_id, with one tasks.task.list per 50 tasks."""
+    task_ids = [item["task_id"] for item in items if item.get("mode") == "update" and item.get("deal_id") in (None, "") and item.get("task_id") not in (None, "")]
+    missing = cache.missing(task_ids)
+    if not webhook_url or not missing:
+        return
+    try:
+        cache.put_many(fill_tender_result.prefetch_task_deal_bindings(webhook_url, missing))
+    except RuntimeError as exc:
+        print(f"Task binding prefetch failed, resolving tasks one by one: {exc}", file=sys.stderr)
+
+
+def process_item(
+    payload: Dict[str, Any],
+    config: Dict[str, Any],
+    webhook_url: str | None,
+    existing_before: Dict[str, Any] | None = None,
+    deal_index: fill_tender_result.DealIndex | None = None,
+    task_cache: task_deal_cache.TaskDealCache | None = None,
+    optimistic: bool = False,
+    verify_sample_rate: float = 0.0,
+    applied: applied_index.AppliedIndex | None = None,
+    verify_applied: bool = False,
+) -> Dict[str, Any]:
+    """Validate and write one item.
+
+    With `applied`, an item whose fields were already written to its deal is
+    answered as `no_op` without any Bitrix24 call; `verify_applied` runs it
+    through apply_update anyway and reports whether the index was still right.
+    """
     result: Dict[str, Any] = {
         "deal_id": payload.get("deal_id"),
         "task_id": payload.get("task_id"),
@@ -72,8 +132,26 @@ def process_item(payload: Dict[str, Any], config: Dict[str, Any], webhook_url: s
         if not webhook_url:
             result.update({"status": "configuration_error", "reason": "BITRIX_WEBHOOK_URL is required"})
             return result
-        update_result = fill_tender_result.apply_update(payload, config, webhook_url)
+        key = applied_key(payload, config) if applied is not None else None
+        applied_at = applied.applied_at(*key) if key else None
+        if applied_at is not None and not verify_applied:
+            result.update({"status": "no_op", "reason": "already_applied", "applied_at": applied_at})
+            return result
+        update_result = fill_tender_result.apply_update(
+            payload,
+            config,
+            webhook_url,
+            existing_before=existing_before,
+            deal_index=deal_index,
+            task_cache=task_cache,
+            optimistic=optimistic,
+            verify_sample_rate=verify_sample_rate,
+        )
         result.update(update_result)
+        if applied_at is not None:
+            result["applied_index"] = "confirmed" if update_result.get("status") == "no_op" else "stale"
+        if applied is not None and update_result.get("status") in {"ok", "no_op"}:
+            applied.record(update_result["deal_id"], fill_tender_result.build_update_fields(payload, config))
         return result
     except fill_tender_result.ControlledStop as exc:
         result.update({"status": exc.status, "reason": exc.reason, **exc.extra})
@@ -86,34 +164,106 @@ def process_item(payload: Dict[str, Any], config: Dict[str, Any], webhook_url: s
 def main(argv: Iterable[str] | None = None) -> int:
     parser = argparse.ArgumentParser(description="Process batch payload and update Bitrix24 safely")
     parser.add_argument("--payload-json", required=True, help="Path to batch_payload.json or JSON text")
-    parser.add_argument("--max-items", type=int, default=50, help="Safety limit")
+    parser.add_argument("--max-items", type=int, default=50, help="Safety limit; 0 disables the limit")
     parser.add_argument("--output", default="bitrix_tender_results/out/batch_payload_results.json")
+    parser.add_argument("--output-format", choices=batch_output.OUTPUT_FORMATS, default="json", help="json: one summary document at the end; ndjson: one line per item as it finishes")
+    parser.add_argument("--journal", default="", help="Append-only checkpoint journal (NDJSON) of finished items")
+    parser.add_argument("--resume", action="store_true", help="Skip items the journal already records as completed in this mode")
+    parser.add_argument("--chunk-size", type=int, default=fill_tender_result.BITRIX_BATCH_LIMIT, help="Upper bound for items per chunk (Bitrix24 batch limit is 50)")
+    parser.add_argument("--rate-limit", type=float, default=fill_tender_result.BITRIX_RATE_PER_SECOND, help="Bitrix24 requests per second; 0 disables throttling")
+    parser.add_argument("--rate-burst", type=int, default=fill_tender_result.BITRIX_RATE_BURST, help="Bitrix24 request bucket size")
+    parser.add_argument("--bulk-resolve", action="store_true", help="Resolve deals by procurement number from one pass over the category instead of a crm.deal.list search per item")
+    parser.add_argument("--task-cache", default="", help="SQLite file with cached task -> deal bindings")
+    parser.add_argument("--task-cache-ttl", type=float, default=task_deal_cache.DEFAULT_TTL_SECONDS, help="Seconds a cached task binding stays valid")
+    parser.add_argument("--refresh-task-cache", action="store_true", help="Drop cached bindings of this batch's tasks before resolving")
+    parser.add_argument("--optimistic-stage-check", action="store_true", help="Send analytics fields and a due stage move in one crm.deal.update, decided on the locally merged deal")
+    parser.add_argument("--verify-sample-rate", type=float, default=0.0, help="Share of optimistic writes re-read for verification (0..1)")
+    parser.add_argument("--timings", action="store_true", help="Add per-item `timings` blocks and span percentiles to the summary")
+    parser.add_argument("--applied-index", default="", help="SQLite index of fields already written to deals; matching items are answered as no_op")
+    parser.add_argument("--applied-index-ttl", type=float, default=applied_index.DEFAULT_TTL_SECONDS, help="Seconds an applied-index entry stays valid")
+    parser.add_argument("--verify-applied", action="store_true", help="Audit: run items found in --applied-index through the normal update and report whether the index was right")
     args = parser.parse_args(list(argv) if argv is not None else None)
+    if args.resume and not args.journal:
+        parser.error("--resume requires --journal")
+    if args.timings:
+        timing.enable()
 
     data = load_json(args.payload_json)
     items = normalize_items(data)
-    if len(items) > args.max_items:
+    if args.max_items and len(items) > args.max_items:
         print(json.dumps({"status": "validation_error", "reason": f"too many items: {len(items)} > {args.max_items}"}, ensure_ascii=False, indent=2))
         return 2
 
     config, _config_path, _is_example = fill_tender_result.load_config(None)
     webhook_url = os.environ.get("BITRIX_WEBHOOK_URL", "").strip()
 
-    results = [process_item(item, config, webhook_url) for item in items]
-    summary = {
-        "total": len(results),
-        "ok": sum(1 for r in results if r.get("status") == "ok"),
-        "no_op": sum(1 for r in results if r.get("status") == "no_op"),
-        "dry_run": sum(1 for r in results if r.get("status") == "dry_run"),
-        "manual_check": sum(1 for r in results if r.get("status") == "manual_check"),
-        "validation_error": sum(1 for r in results if r.get("status") == "validation_error"),
-        "error": sum(1 for r in results if r.get("status") == "error"),
-        "results": results,
-    }
-    out = Path(args.output)
-    out.parent.mkdir(parents=True, exist_ok=True)
-    out.write_text(json.dumps(summary, ensure_ascii=False, indent=2), encoding="utf-8")
-    print(json.dumps(summary, ensure_ascii=False, indent=2))
+    journal = checkpoint_journal.CheckpointJournal(Path(args.journal)) if args.journal else None
+    limiter = fill_tender_result.configure_rate_limit(args.rate_limit, args.rate_burst) if webhook_url else None
+    deal_index = fill_tender_result.DealIndex(webhook_url, config) if args.bulk_resolve and webhook_url else None
+    task_cache = task_deal_cache.TaskDealCache(Path(args.task_cache), args.task_cache_ttl) if args.task_cache else None
+    applied = applied_index.AppliedIndex(Path(args.applied_index), args.applied_index_ttl) if args.applied_index else None
+    run_spans: timing.Spans = {}
+    if task_cache is not None:
+        if args.refresh_task_cache:
+            task_cache.invalidate(item["task_id"] for item in items if item.get("task_id") not in (None, ""))
+        with timing.recording(run_spans):
+            prefetch_task_bindings(items, webhook_url, task_cache)
+    with batch_output.BatchResultWriter(Path(args.output), args.output_format, trailing_newline=False) as writer:
+        pending: List[Dict[str, Any]] = []
+        for index, item in enumerate(items):
+            entry = journal.completed_entry(item.get("procurement_number"), item.get("deal_id"), item.get("mode"), item.get("task_id")) if journal and args.resume else None
+            if entry:
+                writer.write(checkpoint_journal.skipped_result(item.get("procurement_number"), item.get("deal_id"), item.get("task_id"), entry), index)
+            else:
+                pending.append({"index": index, "item": item})
+
+        # Items answered from the applied index never look at their deal. Checked up front:
+        # the prefetch runs on another thread and the index connection stays on this one.
+        indexed: set = set()
+        if applied is not None and not args.verify_applied:
+            indexed = {entry["index"] for entry in pending if (key := applied_key(entry["item"], config)) and applied.known(*key)}
+
+        # Per item: crm.deal.update for the fields, a re-read and the stage move; reads are batched per chunk.
+        # The optimistic path needs only the single update.
+        calls_per_item = 1 if args.optimistic_stage_check else 3
+        chunks = batch_scheduler.pipelined_chunks(
+            pending,
+            lambda chunk: timing.call_recorded(prefetch_chunk, [entry["item"] for entry in chunk if entry["index"] not in indexed], webhook_url),
+            lambda: batch_scheduler.next_chunk_size(limiter, calls_per_item, args.chunk_size),
+        )
+        touched_deals: set = set()
+        item_spans: List[timing.Spans] = []
+        for chunk, (existing, chunk_spans) in chunks:
+            timing.merge(run_spans, chunk_spans)
+            for entry in chunk:
+                item = entry["item"]
+                # A snapshot taken before another item of this run wrote the same deal is stale.
+                snapshot = existing.get(item.get("deal_id")) if item.get("deal_id") not in touched_deals else None
+                with timing.recording() as spans:
+                    result = process_item(
+                        item, config, webhook_url, snapshot, deal_index, task_cache, args.optimistic_stage_check, args.verify_sample_rate, applied, args.verify_applied
+                    )
+                if timing.ENABLED:
+                    result["timings"] = timing.as_block(spans)
+                    item_spans.append(spans)
+                touched_deals.add(result.get("deal_id"))
+                writer.write(result, entry["index"])
+                if journal:
+                    journal.record(item.get("procurement_number"), item.get("deal_id"), item.get("mode"), result.get("status"), item.get("task_id"))
+        if journal:
+            journal.close()
+        if task_cache is not None:
+            task_cache.close()
+        summary = {
+            "total": writer.total,
+            **writer.counts(["ok", "no_op", "dry_run", "manual_check", "validation_error", "error", checkpoint_journal.SKIPPED_STATUS]),
+        }
+        if applied is not None:
+            summary["applied_index"] = {"hits": applied.hits, "misses": applied.misses}
+            applied.close()
+        if timing.ENABLED:
+            summary["timings"] = {"per_item": timing.summarize(item_spans), "per_run": timing.as_block(run_spans)}
+        writer.finish(summary)
 
     return 0
 
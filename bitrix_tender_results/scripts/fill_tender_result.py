@@ -14,14 +14,25 @@ from __future__ import annotations
 import argparse
 import json
 import os
+import random
 import re
 import sys
+import threading
+import time
 import urllib.error
+import urllib.parse
 import urllib.request
 from decimal import Decimal, InvalidOperation
 from pathlib import Path
 from typing import Any, Dict, Iterable, List, Optional, Tuple
 
+SCRIPT_DIR = Path(__file__).resolve().parent
+if str(SCRIPT_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPT_DIR))
+
+import http_pool  # noqa: E402
+import timing  # noqa: E402
+
 ALLOWED_MODES = {"dry_run", "update"}
 ALLOWED_STATUSES = {
     "ok",
@@ -57,6 +68,16 @@ ROOT = Path(__file__).resolve().parents[1]
 DEFAULT_CONFIG_PATH = ROOT / "config" / "bitrix_fields.json"
 EXAMPLE_CONFIG_PATH = ROOT / "config" / "bitrix_fields.example.json"
 
+# Bitrix24 REST: at most 50 commands per `batch` call; the portal drains its
+# request bucket at 2 requests/s with a bucket size of 50.
+BITRIX_BATCH_LIMIT = 50
+BITRIX_RATE_PER_SECOND = 2.0
+BITRIX_RATE_BURST = 50
+# `error` codes crm.deal.update answers with when it refuses the field values
+# themselves (e.g. fields the target stage requires), as opposed to limits,
+# auth or server failures.
+UPDATE_REJECTION_CODES = frozenset({"", "ERROR_ARGUMENT", "ERROR_CORE"})
+
 PAYLOAD_TO_CONFIG_FIELD = {
     "winner_name": "winner_name_analytics",
     "winner_price": "winner_price_analytics",
@@ -64,6 +85,15 @@ PAYLOAD_TO_CONFIG_FIELD = {
 }
 
 
+class BitrixApiError(RuntimeError):
+    """Error answer of the Bitrix24 REST API; `code` is its `error` field."""
+
+    def __init__(self, message: str, code: str = "", description: str = "") -> None:
+        super().__init__(message)
+        self.code = code
+        self.description = description
+
+
 class ControlledStop(Exception):
     def __init__(self, status: str, reason: str, extra: Optional[Dict[str, Any]] = None) -> None:
         super().__init__(reason)
@@ -72,6 +102,57 @@ class ControlledStop(Exception):
         self.extra = extra or {}
 
 
+class RateLimiter:
+    """Client-side leaky bucket so a long batch never trips QUERY_LIMIT_EXCEEDED."""
+
+    def __init__(self, rate_per_second: float = BITRIX_RATE_PER_SECOND, burst: int = BITRIX_RATE_BURST) -> None:
+        self.rate_per_second = float(rate_per_second)
+        self.burst = max(1, int(burst))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(float(self.burst), self._tokens + (now - self._updated) * self.rate_per_second)
+        self._updated = now
+
+    def available(self) -> float:
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait_seconds = (1 - self._tokens) / self.rate_per_second
+            time.sleep(wait_seconds)
+
+
+RATE_LIMITER: Optional[RateLimiter] = None
+
+
+def configure_rate_limit(rate_per_second: float, burst: int = BITRIX_RATE_BURST) -> Optional[RateLimiter]:
+    """Install the process-wide Bitrix24 rate budget; a non-positive rate disables it."""
+    global RATE_LIMITER
+    RATE_LIMITER = RateLimiter(rate_per_second, burst) if rate_per_second > 0 else None
+    return RATE_LIMITER
+
+
+CONNECTION_POOL: Optional[http_pool.ConnectionPool] = None
+
+
+def configure_connection_pool(pool: Optional[http_pool.ConnectionPool]) -> Optional[http_pool.ConnectionPool]:
+    """Send Bitrix24 requests over reused keep-alive connections; None restores one urllib request per call."""
+    global CONNECTION_POOL
+    CONNECTION_POOL = pool
+    return CONNECTION_POOL
+
+
 def eprint(message: str) -> None:
     print(message, file=sys.stderr)
 
@@ -265,26 +346,92 @@ def bitrix_url(webhook_url: str, method: str) -> str:
     return f"{webhook_url.rstrip('/')}/{method}.json"
 
 
-def bitrix_call(webhook_url: str, method: str, params: Dict[str, Any]) -> Dict[str, Any]:
-    data = json.dumps(params, ensure_ascii=False).encode("utf-8")
-    request = urllib.request.Request(
-        bitrix_url(webhook_url, method),
-        data=data,
-        headers={"Content-Type": "application/json; charset=utf-8"},
-        method="POST",
-    )
+def http_error(status: int, body: str) -> RuntimeError:
+    """BitrixApiError when the error body carries a REST `error`, a plain RuntimeError otherwise."""
+    message = f"Bitrix24 HTTP error {status}: {body}"
     try:
-        with urllib.request.urlopen(request, timeout=30) as response:
-            body = response.read().decode("utf-8")
-    except urllib.error.HTTPError as exc:
-        body = exc.read().decode("utf-8", errors="replace")
-        raise RuntimeError(f"Bitrix24 HTTP error {exc.code}: {body}") from exc
-    except urllib.error.URLError as exc:
-        raise RuntimeError(f"Bitrix24 connection error: {exc.reason}") from exc
-    result = json.loads(body)
-    if "error" in result:
-        raise RuntimeError(f"Bitrix24 API error: {result.get('error')} - {result.get('error_description')}")
-    return result
+        answer = json.loads(body)
+    except ValueError:
+        answer = None
+    if isinstance(answer, dict) and "error" in answer:
+        return BitrixApiError(message, str(answer.get("error") or ""), str(answer.get("error_description") or ""))
+    return RuntimeError(message)
+
+
+def bitrix_call(webhook_url: str, method: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    with timing.span("bitrix_call", method):
+        if RATE_LIMITER is not None:
+            RATE_LIMITER.acquire()
+        data = json.dumps(params, ensure_ascii=False).encode("utf-8")
+        headers = {"Content-Type": "application/json; charset=utf-8"}
+        if CONNECTION_POOL is not None:
+            try:
+                status, _reason, _headers, raw = CONNECTION_POOL.request("POST", bitrix_url(webhook_url, method), data, headers, timeout=30)
+            except http_pool.CONNECTION_ERRORS as exc:
+                raise RuntimeError(f"Bitrix24 connection error: {exc}") from exc
+            body = raw.decode("utf-8", errors="replace")
+            if status >= 400:
+                raise http_error(status, body)
+        else:
+            request = urllib.request.Request(bitrix_url(webhook_url, method), data=data, headers=headers, method="POST")
+            try:
+                with urllib.request.urlopen(request, timeout=30) as response:
+                    body = response.read().decode("utf-8")
+            except urllib.error.HTTPError as exc:
+                body = exc.read().decode("utf-8", errors="replace")
+                raise http_error(exc.code, body) from exc
+            except urllib.error.URLError as exc:
+                raise RuntimeError(f"Bitrix24 connection error: {exc.reason}") from exc
+        result = json.loads(body)
+        if "error" in result:
+            raise BitrixApiError(
+                f"Bitrix24 API error: {result.get('error')} - {result.get('error_description')}",
+                str(result.get("error") or ""),
+                str(result.get("error_description") or ""),
+            )
+        return result
+
+
+def build_bitrix_query(params: Dict[str, Any], prefix: str = "") -> List[Tuple[str, str]]:
+    """Flatten params into PHP-style query pairs (filter[ID]=1, select[0]=ID) for batch commands."""
+    pairs: List[Tuple[str, str]] = []
+    for key, value in params.items():
+        name = f"{prefix}[{key}]" if prefix else str(key)
+        if isinstance(value, dict):
+            pairs.extend(build_bitrix_query(value, name))
+        elif isinstance(value, (list, tuple)):
+            pairs.extend(build_bitrix_query(dict(enumerate(value)), name))
+        else:
+            pairs.append((name, "" if value is None else str(value)))
+    return pairs
+
+
+def bitrix_batch_call(webhook_url: str, commands: Dict[str, Tuple[str, Dict[str, Any]]]) -> Dict[str, Any]:
+    """Run up to BITRIX_BATCH_LIMIT commands in one `batch` request and return results by command key."""
+    if len(commands) > BITRIX_BATCH_LIMIT:
+        raise ValueError(f"Bitrix24 batch accepts at most {BITRIX_BATCH_LIMIT} commands, got {len(commands)}")
+    cmd = {key: f"{method}?{urllib.parse.urlencode(build_bitrix_query(params))}" for key, (method, params) in commands.items()}
+    response = bitrix_call(webhook_url, "batch", {"halt": 0, "cmd": cmd})
+    result = response.get("result", {})
+    errors = result.get("result_error") or {}
+    if isinstance(errors, dict) and errors:
+        raise RuntimeError(f"Bitrix24 batch error: {json.dumps(errors, ensure_ascii=False)}")
+    results = result.get("result") or {}
+    return results if isinstance(results, dict) else {}
+
+
+def prefetch_deal_fields(webhook_url: str, deal_ids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+    """Read several deals with `batch` calls of crm.deal.get instead of one request per deal."""
+    unique_ids = list(dict.fromkeys(int(deal_id) for deal_id in deal_ids))
+    snapshots: Dict[int, Dict[str, Any]] = {}
+    for start in range(0, len(unique_ids), BITRIX_BATCH_LIMIT):
+        chunk = unique_ids[start:start + BITRIX_BATCH_LIMIT]
+        results = bitrix_batch_call(webhook_url, {f"deal_{deal_id}": ("crm.deal.get", {"id": deal_id}) for deal_id in chunk})
+        for deal_id in chunk:
+            deal = results.get(f"deal_{deal_id}")
+            if isinstance(deal, dict):
+                snapshots[deal_id] = deal
+    return snapshots
 
 
 def get_existing_deal_fields(webhook_url: str, entity_type_id_or_deal_id: int, deal_id: Optional[int] = None) -> Dict[str, Any]:
@@ -324,6 +471,88 @@ def search_deals_by_procurement_number(webhook_url: str, procurement_number: str
     return list(found.values())
 
 
+def procurement_number_fields(config: Dict[str, Any]) -> List[str]:
+    fields = (config.get("deal_search", {}) or {}).get("procurement_number_fields", []) or []
+    return [field for field in fields if isinstance(field, str) and field.strip()]
+
+
+def iter_category_deals(
+    webhook_url: str,
+    config: Dict[str, Any],
+    select: List[str],
+    filters: Optional[Dict[str, Any]] = None,
+    order: Optional[Dict[str, str]] = None,
+) -> Iterable[Dict[str, Any]]:
+    """Page through crm.deal.list of the configured deal category, optionally narrowed by `filters`."""
+    category_id = config.get("categoryId", (config.get("analytics_stage", {}) or {}).get("category_id"))
+    params: Dict[str, Any] = {"select": select, "order": order or {"ID": "ASC"}, "filter": dict(filters or {})}
+    if category_id not in (None, ""):
+        params["filter"]["CATEGORY_ID"] = category_id
+    if not params["filter"]:
+        del params["filter"]
+    start: Any = 0
+    while start is not None:
+        response = bitrix_call(webhook_url, "crm.deal.list", {**params, "start": start})
+        for deal in response.get("result", []) if isinstance(response.get("result"), list) else []:
+            if isinstance(deal, dict) and deal.get("ID"):
+                yield deal
+        start = response.get("next")
+
+
+class DealIndex:
+    """In-memory procurement number -> deals index built from one pass over the category.
+
+    Matches the same deals as search_deals_by_procurement_number: the number
+    anywhere in TITLE (whitespace ignored) or an exact value of one of the
+    configured procurement number fields. The deal list is read lazily on the
+    first lookup, so a batch where every item has deal_id costs nothing.
+
+    Titles are indexed by every 19-digit window of their digit runs (44-FZ
+    notice numbers); numbers of any other length (223-FZ and others) are
+    matched by the same substring check over the loaded titles.
+    """
+
+    def __init__(self, webhook_url: str, config: Dict[str, Any]) -> None:
+        self.webhook_url = webhook_url
+        self.config = config
+        self._by_number: Optional[Dict[str, Dict[str, Dict[str, Any]]]] = None
+        self._titles: List[Tuple[str, Dict[str, Any]]] = []
+
+    def _add(self, number: str, deal: Dict[str, Any]) -> None:
+        assert self._by_number is not None
+        self._by_number.setdefault(number, {})[str(deal["ID"])] = deal
+
+    def load(self) -> "DealIndex":
+        fields = procurement_number_fields(self.config)
+        self._by_number = {}
+        self._titles = []
+        for deal in iter_category_deals(self.webhook_url, self.config, ["ID", "TITLE", *fields]):
+            title = normalize_procurement_number(deal.get("TITLE"))
+            self._titles.append((title, deal))
+            for run in re.findall(r"\d{19,}", title):
+                for start in range(len(run) - 18):
+                    self._add(run[start:start + 19], deal)
+            for field in fields:
+                number = normalize_procurement_number(deal.get(field))
+                if number:
+                    self._add(number, deal)
+        return self
+
+    def find(self, procurement_number: str) -> List[Dict[str, Any]]:
+        if self._by_number is None:
+            self.load()
+        assert self._by_number is not None
+        number = normalize_procurement_number(procurement_number)
+        if not number:
+            return []
+        deals = dict(self._by_number.get(number, {}))
+        if not (len(number) == 19 and number.isdigit()):
+            for title, deal in self._titles:
+                if number in title:
+                    deals.setdefault(str(deal["ID"]), deal)
+        return list(deals.values())
+
+
 def extract_deal_ids_from_task_crm(value: Any) -> List[int]:
     """Extract Bitrix deal IDs from task CRM bindings such as D_15096."""
     if value in (None, ""):
@@ -360,11 +589,23 @@ def task_response_to_deal_ids(response: Dict[str, Any]) -> List[int]:
     return []
 
 
-def find_deal_ids_by_task_id(webhook_url: str, task_id: Any) -> List[int]:
+def find_deal_ids_by_task_id(webhook_url: str, task_id: Any, task_cache: Any = None) -> List[int]:
+    """Resolve task CRM bindings; `task_cache` is an optional TaskDealCache-like object (get/put)."""
     if task_id in (None, ""):
         return []
     task_id_int = int(task_id)
+    if task_cache is not None:
+        cached = task_cache.get(task_id_int)
+        if cached:
+            return cached
+
+    deal_ids = fetch_deal_ids_by_task_id(webhook_url, task_id_int)
+    if task_cache is not None and deal_ids:
+        task_cache.put(task_id_int, deal_ids)
+    return deal_ids
 
+
+def fetch_deal_ids_by_task_id(webhook_url: str, task_id_int: int) -> List[int]:
     response = bitrix_call(
         webhook_url,
         "tasks.task.get",
@@ -378,20 +619,45 @@ def find_deal_ids_by_task_id(webhook_url: str, task_id: Any) -> List[int]:
     return task_response_to_deal_ids(response)
 
 
-def resolve_deal_id(payload: Dict[str, Any], webhook_url: str, config: Dict[str, Any]) -> Tuple[int, str, List[Dict[str, Any]]]:
+def prefetch_task_deal_bindings(webhook_url: str, task_ids: Iterable[Any]) -> Dict[int, List[int]]:
+    """Read CRM bindings of many tasks with tasks.task.list, 50 IDs per request."""
+    unique_ids = list(dict.fromkeys(int(task_id) for task_id in task_ids if task_id not in (None, "")))
+    bindings: Dict[int, List[int]] = {}
+    for start in range(0, len(unique_ids), BITRIX_BATCH_LIMIT):
+        chunk = unique_ids[start:start + BITRIX_BATCH_LIMIT]
+        response = bitrix_call(webhook_url, "tasks.task.list", {"filter": {"ID": chunk}, "select": ["ID", "UF_CRM_TASK"]})
+        result = response.get("result")
+        tasks = result.get("tasks", []) if isinstance(result, dict) else []
+        for task in tasks if isinstance(tasks, list) else []:
+            if not isinstance(task, dict) or task.get("id", task.get("ID")) in (None, ""):
+                continue
+            deal_ids = task_response_to_deal_ids({"result": task})
+            if deal_ids:
+                bindings[int(task.get("id", task.get("ID")))] = deal_ids
+    return bindings
+
+
+@timing.timed("resolve_deal_id")
+def resolve_deal_id(
+    payload: Dict[str, Any],
+    webhook_url: str,
+    config: Dict[str, Any],
+    deal_index: Optional[DealIndex] = None,
+    task_cache: Any = None,
+) -> Tuple[int, str, List[Dict[str, Any]]]:
     if payload.get("deal_id") not in (None, ""):
         return int(payload["deal_id"]), "payload", []
 
     task_id = payload.get("task_id")
     if task_id not in (None, ""):
-        task_deal_ids = find_deal_ids_by_task_id(webhook_url, task_id)
+        task_deal_ids = find_deal_ids_by_task_id(webhook_url, task_id, task_cache)
         if len(task_deal_ids) == 1:
             return int(task_deal_ids[0]), "found_by_task_id", []
         if len(task_deal_ids) > 1:
             raise ControlledStop("manual_check", "multiple_deals_found_by_task_id", {"task_id": task_id, "matched_deal_ids": task_deal_ids})
 
     number = normalize_procurement_number(payload.get("procurement_number"))
-    deals = search_deals_by_procurement_number(webhook_url, number, config)
+    deals = deal_index.find(number) if deal_index is not None and number else search_deals_by_procurement_number(webhook_url, number, config)
     if not deals:
         raise ControlledStop("manual_check", "deal_not_found_by_procurement_number", {"procurement_number": number})
     if len(deals) > 1:
@@ -434,6 +700,34 @@ def build_stage_update_after_result_fields(existing_item: Dict[str, Any], config
     return {"STAGE_ID": target_stage_id}, True, "analytics_fields_filled_and_tender_specialist_to_empty"
 
 
+def merge_update_into_snapshot(existing_item: Dict[str, Any], fields: Dict[str, Any]) -> Dict[str, Any]:
+    """Expected deal state after `fields` are written, without reading the deal back."""
+    return {**existing_item, **fields}
+
+
+def plan_single_call_update(existing_item: Dict[str, Any], analytics_fields: Dict[str, Any], config: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any], bool, str]:
+    """Precompute the one crm.deal.update that writes the analytics fields and, if due, the stage.
+
+    The stage rule is the usual one, applied to the deal as it will look after
+    the write: all three analytics fields filled and the tender specialist ТО
+    field present and empty. Returns (fields_to_send, stage_fields, required, reason).
+    """
+    stage_fields, stage_required, stage_reason = build_stage_update_after_result_fields(
+        merge_update_into_snapshot(existing_item, analytics_fields), config
+    )
+    return {**analytics_fields, **stage_fields}, stage_fields, stage_required, stage_reason
+
+
+def verify_optimistic_update(webhook_url: str, deal_id: int, sent_fields: Dict[str, Any]) -> Dict[str, Any]:
+    """Re-read a deal and check that every field sent by the optimistic path actually landed."""
+    actual = get_existing_deal_fields(webhook_url, deal_id)
+    mismatched = [
+        field for field, value in sent_fields.items()
+        if is_empty_value(actual.get(field)) or (field == "STAGE_ID" and normalize_text(actual.get(field)) != normalize_text(value))
+    ]
+    return {"status": "mismatch" if mismatched else "match", "mismatched_fields": sorted(mismatched)}
+
+
 def build_comment_preview(payload: Dict[str, Any]) -> str:
     price = get_winner_price_for_bitrix(payload)
     return (
@@ -471,9 +765,36 @@ def dry_run_log(payload: Dict[str, Any], config: Dict[str, Any], config_path: Pa
     }
 
 
-def apply_update(payload: Dict[str, Any], config: Dict[str, Any], webhook_url: str) -> Dict[str, Any]:
-    deal_id, source, matches = resolve_deal_id(payload, webhook_url, config)
-    existing_before = get_existing_deal_fields(webhook_url, deal_id)
+@timing.timed("apply_update")
+def apply_update(
+    payload: Dict[str, Any],
+    config: Dict[str, Any],
+    webhook_url: str,
+    *,
+    existing_before: Optional[Dict[str, Any]] = None,
+    deal_index: Optional[DealIndex] = None,
+    task_cache: Any = None,
+    optimistic: bool = False,
+    verify_sample_rate: float = 0.0,
+) -> Dict[str, Any]:
+    """Write the analytics fields and, if allowed, move the stage.
+
+    `existing_before` may carry a deal snapshot prefetched for a whole chunk;
+    it is used only when it belongs to the resolved deal. `deal_index` replaces
+    the per-item crm.deal.list search by procurement number and `task_cache`
+    the task binding lookups.
+
+    With `optimistic` the stage rule is evaluated on the snapshot merged with
+    the analytics fields instead of a second crm.deal.get, and a required stage
+    move is sent in the same crm.deal.update. If Bitrix24 refuses that combined
+    update (an `UPDATE_REJECTION_CODES` error), the analytics fields are resent
+    alone and the stage is decided and moved the usual way, after a re-read.
+    Any other error is raised. `verify_sample_rate` re-reads that share of
+    optimistic writes and reports whether they landed.
+    """
+    deal_id, source, matches = resolve_deal_id(payload, webhook_url, config, deal_index, task_cache)
+    if existing_before is None or str(existing_before.get("ID", deal_id)) != str(deal_id):
+        existing_before = get_existing_deal_fields(webhook_url, deal_id)
     allow_overwrite = bool(payload.get("allow_overwrite", config.get("automation", {}).get("allow_overwrite_default", False)))
     analytics_fields, skipped, conflicts = build_update_fields_with_overwrite_policy(
         payload,
@@ -507,23 +828,48 @@ def apply_update(payload: Dict[str, Any], config: Dict[str, Any], webhook_url: s
         })
         return log
 
+    stage_fields: Dict[str, Any] = {}
+    sent_fields = analytics_fields
+    # Without `optimistic` the stage is decided on a re-read once the analytics fields are written.
+    decide_after_write = not optimistic
+    if optimistic:
+        # Same rule as below, evaluated on the state the deal will have once the analytics fields land.
+        sent_fields, stage_fields, stage_required, stage_reason = plan_single_call_update(existing_before, analytics_fields, config)
+        log["stage_decision"] = "optimistic_local_merge"
+
     analytics_sent = False
     if analytics_fields:
-        response = bitrix_call(webhook_url, "crm.deal.update", {"id": deal_id, "fields": analytics_fields})
+        try:
+            response = bitrix_call(webhook_url, "crm.deal.update", {"id": deal_id, "fields": sent_fields})
+        except BitrixApiError as exc:
+            if not stage_fields or exc.code not in UPDATE_REJECTION_CODES:
+                raise
+            # Bitrix refused the fields together with the stage move: write the fields alone,
+            # then decide and move the stage separately as without `optimistic`.
+            log["combined_update_error"] = str(exc)
+            log["stage_decision"] = "reread_after_combined_update_rejected"
+            decide_after_write = True
+            sent_fields = analytics_fields
+            response = bitrix_call(webhook_url, "crm.deal.update", {"id": deal_id, "fields": sent_fields})
         analytics_sent = True
         log["analytics_update"] = "sent"
         log["analytics_response"] = response.get("result", {})
+        if optimistic and verify_sample_rate > 0 and random.random() < verify_sample_rate:
+            log["optimistic_verification"] = verify_optimistic_update(webhook_url, deal_id, sent_fields)
     else:
         log["analytics_update"] = "not_sent_no_new_values"
 
-    # Stage transition is deliberately evaluated only after the result fields are filled.
-    existing_after_analytics = get_existing_deal_fields(webhook_url, deal_id) if analytics_sent else existing_before
-    stage_fields, stage_required, stage_reason = build_stage_update_after_result_fields(existing_after_analytics, config)
+    if decide_after_write:
+        # Stage transition is deliberately evaluated only after the result fields are filled.
+        existing_after_analytics = get_existing_deal_fields(webhook_url, deal_id) if analytics_sent else existing_before
+        stage_fields, stage_required, stage_reason = build_stage_update_after_result_fields(existing_after_analytics, config)
     log["stage_move_required"] = stage_required
     log["stage_move_reason"] = stage_reason
     log["stage_fields_to_update"] = sorted(stage_fields)
 
-    if stage_fields:
+    if stage_fields and not decide_after_write and analytics_sent:
+        log["stage_update"] = "sent_with_analytics_update"
+    elif stage_fields:
         stage_response = bitrix_call(webhook_url, "crm.deal.update", {"id": deal_id, "fields": stage_fields})
         log["stage_update"] = "sent"
         log["stage_response"] = stage_response.get("result", {})
@@ -543,7 +889,14 @@ def main(argv: Iterable[str] | None = None) -> int:
     parser.add_argument("--payload", dest="payload_json", default=None, help="Alias for --payload-json")
     parser.add_argument("--mode", choices=sorted(ALLOWED_MODES), default=None, help="Override payload mode")
     parser.add_argument("--config", default=None, help="Path to bitrix_fields.json")
+    parser.add_argument("--task-cache", default="", help="SQLite file with cached task -> deal bindings")
+    parser.add_argument("--refresh-task-cache", action="store_true", help="Drop the cached binding of this payload's task before resolving")
+    parser.add_argument("--optimistic-stage-check", action="store_true", help="Send analytics fields and a due stage move in one crm.deal.update, decided on the locally merged deal")
+    parser.add_argument("--verify-sample-rate", type=float, default=0.0, help="Share of optimistic writes re-read for verification (0..1)")
+    parser.add_argument("--timings", action="store_true", help="Add a `timings` block with per-span durations to the log")
     args = parser.parse_args(list(argv) if argv is not None else None)
+    if args.timings:
+        timing.enable()
 
     try:
         if not args.payload_json:
@@ -585,7 +938,28 @@ def main(argv: Iterable[str] | None = None) -> int:
             safe_log({"payload_loaded": True, "mode": mode, "status": "configuration_error", "reason": "BITRIX_WEBHOOK_URL secret is required for update mode"})
             return 3
 
-        result = apply_update(payload, config, webhook_url)
+        task_cache = None
+        if args.task_cache:
+            from task_deal_cache import TaskDealCache
+
+            task_cache = TaskDealCache(Path(args.task_cache))
+            if args.refresh_task_cache and payload.get("task_id") not in (None, ""):
+                task_cache.invalidate([payload["task_id"]])
+        try:
+            with timing.recording() as spans:
+                result = apply_update(
+                    payload,
+                    config,
+                    webhook_url,
+                    task_cache=task_cache,
+                    optimistic=args.optimistic_stage_check,
+                    verify_sample_rate=args.verify_sample_rate,
+                )
+        finally:
+            if task_cache is not None:
+                task_cache.close()
+        if timing.ENABLED:
+            result["timings"] = timing.as_block(spans)
         safe_log(result)
         return 0 if result.get("status") in {"ok", "no_op"} else 4 if result.get("status") == "manual_check" else 1
 
@@ -0,0 +1,133 @@
+"""Keep-alive HTTP(S) connections reused across requests, one per host and thread.
+
+urllib.request opens a new TCP (and TLS) connection for every call, which is
+most of the cost of a small Bitrix24 request. `ConnectionPool` keeps one
+`http.client` connection per scheme/host/port in each thread and reuses it
+while the server keeps it open. A request that fails on a reused connection
+before any response arrived (the server dropped an idle keep-alive) is sent
+once more on a fresh connection. GET redirects are followed. Proxies from
+the environment are not used.
+
+`stream` hands out the response with its body unread, for callers that may
+stop reading early; such a connection is closed instead of being reused.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import http.client
+import threading
+import urllib.parse
+from typing import Dict, Iterator, Optional, Tuple
+
+MAX_REDIRECTS = 5
+REDIRECT_STATUSES = {301, 302, 303, 307, 308}
+STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)
+# Everything a pooled request raises for network and protocol failures.
+CONNECTION_ERRORS = (OSError, http.client.HTTPException)
+
+Response = Tuple[int, str, Dict[str, str], bytes]
+
+
+class ConnectionPool:
+    def __init__(self, timeout: float = 30.0) -> None:
+        self.timeout = timeout
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.opened = 0
+
+    def _connections(self) -> Dict[Tuple[str, str, int], http.client.HTTPConnection]:
+        connections = getattr(self._local, "connections", None)
+        if connections is None:
+            connections = self._local.connections = {}
+        return connections
+
+    def _open(self, scheme: str, host: str, port: int, timeout: float) -> http.client.HTTPConnection:
+        with self._lock:
+            self.opened += 1
+        if scheme == "https":
+            return http.client.HTTPSConnection(host, port, timeout=timeout)
+        return http.client.HTTPConnection(host, port, timeout=timeout)
+
+    def request(self, method: str, url: str, body: Optional[bytes] = None, headers: Optional[Dict[str, str]] = None, timeout: Optional[float] = None) -> Response:
+        """Send one request; returns `(status, reason, headers, body)` with lower-case header names."""
+        for _redirect in range(MAX_REDIRECTS + 1):
+            status, reason, response_headers, data = self._send(method, url, body, headers or {}, timeout or self.timeout)
+            location = response_headers.get("location")
+            if method != "GET" or status not in REDIRECT_STATUSES or not location:
+                return status, reason, response_headers, data
+            url = urllib.parse.urljoin(url, location)
+        return status, reason, response_headers, data
+
+    def _send(self, method: str, url: str, body: Optional[bytes], headers: Dict[str, str], timeout: float) -> Response:
+        key, connection, response = self._open_response(method, url, body, headers, timeout)
+        try:
+            data = response.read()
+        except BaseException:
+            connection.close()
+            raise
+        self._release(key, connection, response)
+        return response.status, response.reason, {name.lower(): value for name, value in response.getheaders()}, data
+
+    @contextlib.contextmanager
+    def stream(self, url: str, headers: Optional[Dict[str, str]] = None, timeout: Optional[float] = None) -> Iterator[http.client.HTTPResponse]:
+        """GET with the body left to the caller; follows redirects like `request`."""
+        for _redirect in range(MAX_REDIRECTS + 1):
+            key, connection, response = self._open_response("GET", url, None, headers or {}, timeout or self.timeout)
+            location = response.getheader("location")
+            if response.status not in REDIRECT_STATUSES or not location or _redirect == MAX_REDIRECTS:
+                break
+            response.read()
+            self._release(key, connection, response)
+            url = urllib.parse.urljoin(url, location)
+        try:
+            yield response
+        except BaseException:
+            connection.close()
+            raise
+        # A body that was not read to the end leaves the connection unusable.
+        if response.isclosed():
+            self._release(key, connection, response)
+        else:
+            connection.close()
+
+    def _open_response(
+        self, method: str, url: str, body: Optional[bytes], headers: Dict[str, str], timeout: float
+    ) -> Tuple[Tuple[str, str, int], http.client.HTTPConnection, http.client.HTTPResponse]:
+        parsed = urllib.parse.urlsplit(url)
+        scheme = parsed.scheme.lower()
+        if scheme not in {"http", "https"}:
+            raise ValueError(f"Unsupported URL scheme: {url}")
+        port = parsed.port or (443 if scheme == "https" else 80)
+        key = (scheme, parsed.hostname or "", port)
+        path = parsed.path or "/"
+        if parsed.query:
+            path += f"?{parsed.query}"
+
+        connections = self._connections()
+        while True:
+            reused = key in connections
+            connection = connections.pop(key, None) or self._open(scheme, key[1], port, timeout)
+            try:
+                connection.request(method, path, body=body, headers=headers)
+                return key, connection, connection.getresponse()
+            except STALE_CONNECTION_ERRORS:
+                connection.close()
+                if reused:
+                    continue
+                raise
+            except BaseException:
+                connection.close()
+                raise
+
+    def _release(self, key: Tuple[str, str, int], connection: http.client.HTTPConnection, response: http.client.HTTPResponse) -> None:
+        if response.will_close:
+            connection.close()
+        else:
+            self._connections()[key] = connection
+
+    def close(self) -> None:
+        """Close the calling thread's connections."""
+        connections = self._connections()
+        while connections:
+            connections.popitem()[1].close()
@@ -0,0 +1,205 @@
+"""Compact in-memory form of the 44-FZ payloads kept by batch runs.
+
+A payload from collect_44fz_result is a dict of 34 keys; a batch run keeps one
+per procurement and one prepared copy per item until the summary is written.
+`TenderPayload` holds the same values in a slotted dataclass:
+
+- repeated strings (statuses, source titles, customer names, warnings) are
+  interned, so equal values of different payloads share one object;
+- the comment is kept as a tuple of interned sentences and joined only when
+  it is read, because every payload repeats the same few sentences;
+- sources are `Source` slots instead of dicts.
+
+`TenderPayload` is a read-only mapping, so code that reads payloads with `[]`
+or `.get()` takes it unchanged, and `to_dict()` rebuilds the original dict
+with the keys in their original order: `json.dumps(payload.to_dict())` is the
+text the dict would have produced (batch_output passes it as the `default`
+hook). Payloads with other keys stay dicts.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import re
+import sys
+from collections.abc import Mapping
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, Optional, Tuple, Union
+
+KEYS = (
+    "mode",
+    "deal_id",
+    "task_id",
+    "procurement_number",
+    "law",
+    "source_type",
+    "procedure_type",
+    "purchase_name",
+    "customer_name",
+    "procurement_status",
+    "nmck",
+    "contract_price",
+    "price_basis",
+    "auto_calculate_reduction",
+    "protocol_url",
+    "protocol_name",
+    "protocol_date",
+    "failed_procurement_reason",
+    "winner_name",
+    "winner_inn",
+    "winner_price",
+    "winner_offer_price",
+    "reduction_percent",
+    "participants_count",
+    "our_place",
+    "contract_registry_number",
+    "contract_publish_date",
+    "result_status",
+    "confidence",
+    "comment",
+    "target_stage_id",
+    "allow_overwrite",
+    "sources",
+    "warnings",
+)
+KEY_SET = frozenset(KEYS)
+SOURCE_KEYS = ("title", "url", "what_confirmed")
+INTERNED_KEYS = frozenset(
+    {
+        "mode",
+        "law",
+        "source_type",
+        "procedure_type",
+        "customer_name",
+        "procurement_status",
+        "price_basis",
+        "protocol_name",
+        "protocol_date",
+        "contract_publish_date",
+        "result_status",
+        "confidence",
+        "target_stage_id",
+    }
+)
+SENTENCE_END = re.compile(r"(?<=[.;] )")
+
+
+def intern(value: Any) -> Any:
+    return sys.intern(value) if type(value) is str else value
+
+
+def split_comment(comment: str) -> Tuple[str, ...]:
+    """Interned sentences that join back into `comment`."""
+    return tuple(sys.intern(part) for part in SENTENCE_END.split(comment) if part)
+
+
+@dataclass(slots=True, frozen=True)
+class Source:
+    title: str
+    url: str
+    what_confirmed: str
+
+    def to_dict(self) -> Dict[str, str]:
+        return {"title": self.title, "url": self.url, "what_confirmed": self.what_confirmed}
+
+
+@dataclass(slots=True, eq=False)
+class TenderPayload(Mapping):
+    mode: str
+    deal_id: Optional[int]
+    task_id: Optional[int]
+    procurement_number: str
+    law: str
+    source_type: str
+    procedure_type: str
+    purchase_name: str
+    customer_name: str
+    procurement_status: str
+    nmck: Optional[float]
+    contract_price: Optional[float]
+    price_basis: str
+    auto_calculate_reduction: bool
+    protocol_url: str
+    protocol_name: str
+    protocol_date: str
+    failed_procurement_reason: str
+    winner_name: str
+    winner_inn: str
+    winner_price: Optional[float]
+    winner_offer_price: Optional[float]
+    reduction_percent: Optional[float]
+    participants_count: Optional[int]
+    our_place: Optional[int]
+    contract_registry_number: str
+    contract_publish_date: str
+    result_status: str
+    confidence: str
+    comment_parts: Tuple[str, ...]
+    target_stage_id: str
+    allow_overwrite: bool
+    sources: Tuple[Source, ...]
+    warnings: Tuple[str, ...]
+
+    @classmethod
+    def from_dict(cls, payload: Dict[str, Any]) -> "TenderPayload":
+        values = {key: intern(payload[key]) if key in INTERNED_KEYS else payload[key] for key in KEYS}
+        values["comment_parts"] = split_comment(values.pop("comment"))
+        values["sources"] = tuple(Source(intern(source["title"]), source["url"], intern(source["what_confirmed"])) for source in payload["sources"])
+        values["warnings"] = tuple(intern(warning) for warning in payload["warnings"])
+        return cls(**values)
+
+    @property
+    def comment(self) -> str:
+        return "".join(self.comment_parts)
+
+    def __getitem__(self, key: str) -> Any:
+        if key == "comment":
+            return self.comment
+        if key == "sources":
+            return [source.to_dict() for source in self.sources]
+        if key == "warnings":
+            return list(self.warnings)
+        if key not in KEY_SET:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(KEYS)
+
+    def __len__(self) -> int:
+        return len(KEYS)
+
+    def __contains__(self, key: object) -> bool:
+        return key in KEY_SET
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {key: self[key] for key in KEYS}
+
+
+Payload = Union[Dict[str, Any], TenderPayload]
+
+
+def compact(payload: Payload) -> Payload:
+    """`TenderPayload` for a collector payload; any other mapping is returned as is."""
+    if isinstance(payload, TenderPayload) or not is_collector_payload(payload):
+        return payload
+    return TenderPayload.from_dict(payload)
+
+
+def is_collector_payload(payload: Any) -> bool:
+    return (
+        isinstance(payload, dict)
+        and tuple(payload) == KEYS
+        and isinstance(payload["comment"], str)
+        and isinstance(payload["warnings"], list)
+        and isinstance(payload["sources"], list)
+        and all(isinstance(source, dict) and tuple(source) == SOURCE_KEYS for source in payload["sources"])
+    )
+
+
+def updated(payload: Payload, **changes: Any) -> Payload:
+    """Copy of `payload` with top-level scalar fields replaced; the copy shares everything else."""
+    if isinstance(payload, TenderPayload):
+        return dataclasses.replace(payload, **changes)
+    return {**payload, **changes}
+
@@ -0,0 +1,104 @@
+"""Regex engine for extractor patterns that run on uncontrolled EIS pages.
+
+`compile` uses RE2 (the optional `google-re2` package) when it is installed:
+RE2 matches in time linear in the input, so a malformed page cannot make a
+pattern backtrack for minutes. Patterns RE2 rejects (lookarounds,
+backreferences) fall back to the standard `re` module, as does every pattern
+when RE2 is missing. `re` cannot be interrupted, so there a pattern's budget
+is `max_chars`: only that many leading characters of the input are searched.
+
+RE2 classes are ASCII-only (`\\d`, `\\s`, `\\b`) and it has no `\\uXXXX`
+escape, so patterns compiled here are written to mean the same in both
+engines on the text they are applied to.
+
+`strip_blocks` replaces the `(?is)<script.*?</script>` family: it removes the
+blocks with `str.find` in one pass, where the lazy regex rescans to the end of
+the page for every opening tag that is never closed.
+"""
+
+from __future__ import annotations
+
+import re
+import string
+from typing import Any, Iterator, Optional
+
+try:
+    import re2  # type: ignore[import-not-found]
+except ImportError:  # pragma: no cover - depends on the environment
+    re2 = None
+
+ENGINE = "re2" if re2 is not None else "re"
+DEFAULT_MAX_CHARS = 200_000
+INLINE_FLAGS = ((re.IGNORECASE, "i"), (re.DOTALL, "s"), (re.MULTILINE, "m"))
+HIDDEN_BLOCKS = (("<script", "</script>"), ("<style", "</style>"), ("<svg", "</svg>"), ("<!--", "-->"))
+ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+
+class Pattern:
+    """Compiled pattern with the subset of the `re.Pattern` API the extractors use."""
+
+    __slots__ = ("pattern", "engine", "max_chars", "_compiled")
+
+    def __init__(self, pattern: str, flags: int = 0, max_chars: int = DEFAULT_MAX_CHARS) -> None:
+        self.pattern = pattern
+        self.max_chars = max_chars
+        self._compiled: Any = None
+        if re2 is not None:
+            prefix = "".join(letter for flag, letter in INLINE_FLAGS if flags & flag)
+            try:
+                self._compiled = re2.compile(f"(?{prefix}){pattern}" if prefix else pattern)
+                self.engine = "re2"
+            except re2.error:
+                self._compiled = None
+        if self._compiled is None:
+            self._compiled = re.compile(pattern, flags)
+            self.engine = "re"
+
+    def _bounded(self, text: str) -> str:
+        if self.engine == "re" and len(text) > self.max_chars:
+            return text[: self.max_chars]
+        return text
+
+    def search(self, text: str, pos: int = 0) -> Optional[Any]:
+        return self._compiled.search(self._bounded(text), pos)
+
+    def finditer(self, text: str) -> Iterator[Any]:
+        return self._compiled.finditer(self._bounded(text))
+
+    def __repr__(self) -> str:
+        return f"regex_backend.Pattern({self.pattern!r}, engine={self.engine!r}, max_chars={self.max_chars})"
+
+
+def compile(pattern: str, flags: int = 0, max_chars: int = DEFAULT_MAX_CHARS) -> Pattern:  # noqa: A001
+    return Pattern(pattern, flags, max_chars)
+
+
+def strip_blocks(text: str, opening: str, closing: str, replacement: str = " ") -> str:
+    """Same result as `re.sub(f"(?is){opening}.*?{closing}", replacement, text)` for literal tags, in linear time.
+
+    Tags are matched ASCII-case-insensitively.
+    """
+    low = text.translate(ASCII_LOWER)
+    opening, closing = opening.lower(), closing.lower()
+    parts = []
+    pos = 0
+    start = low.find(opening)
+    while start >= 0:
+        end = low.find(closing, start + len(opening))
+        if end < 0:
+            break  # no later opening tag can be closed either
+        parts.append(text[pos:start])
+        parts.append(replacement)
+        pos = end + len(closing)
+        start = low.find(opening, pos)
+    if not parts:
+        return text
+    parts.append(text[pos:])
+    return "".join(parts)
+
+
+def strip_hidden(raw_html: str) -> str:
+    """Replace script, style, svg blocks and comments with a space, in that order."""
+    for opening, closing in HIDDEN_BLOCKS:
+        raw_html = strip_blocks(raw_html, opening, closing)
+    return raw_html
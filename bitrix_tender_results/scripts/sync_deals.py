@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""Incremental sync: fill analytics fields of deals whose EIS results changed.
+
+Every cycle:
+1. crm.deal.list of the configured category with `>=DATE_MODIFY` of the
+   watermark saved by the previous cycle (the first cycle reads the whole
+   category). Listed deals with an empty analytics field and a procurement
+   number in TITLE (or a configured number field) join the pending set; filled
+   ones leave it.
+2. For every pending deal the three EIS pages are requested conditionally
+   (If-None-Match / If-Modified-Since from the previous check). When no page
+   changed and the deal was not modified since, nothing else happens.
+3. Otherwise the payload is collected and, if the result is final (`ok`),
+   written through the same overwrite-safe apply_update path as
+   fill_batch_payload.py. Deals written successfully leave the pending set.
+
+State (watermark, pending deals, page validators) lives in a SQLite file, so
+a cycle costs one paged deal list of recent changes plus mostly-304 EIS
+requests for the pending deals. Default mode is dry_run.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+import urllib.error
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+if str(SCRIPT_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPT_DIR))
+
+import collect_44fz_result  # noqa: E402
+import fill_batch_payload  # noqa: E402
+import fill_tender_result  # noqa: E402
+import http_pool  # noqa: E402
+
+ALLOWED_MODES = {"dry_run", "update"}
+DEFAULT_STATE_PATH = fill_tender_result.ROOT / "out" / "sync_state.sqlite"
+FINAL_STATUSES = {"ok", "no_op"}
+
+
+def eprint(message: str) -> None:
+    print(message, file=sys.stderr)
+
+
+class SyncState:
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path))
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS sync_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS pending_deals (
+                deal_id INTEGER PRIMARY KEY,
+                procurement_number TEXT NOT NULL,
+                date_modify TEXT NOT NULL,
+                checked_date_modify TEXT NOT NULL DEFAULT '',
+                last_status TEXT NOT NULL DEFAULT '',
+                checked_at REAL NOT NULL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS eis_pages (
+                url TEXT PRIMARY KEY,
+                etag TEXT NOT NULL,
+                last_modified TEXT NOT NULL,
+                body_sha256 TEXT NOT NULL,
+                checked_at REAL NOT NULL
+            );
+            """
+        )
+        self._conn.commit()
+
+    def __enter__(self) -> "SyncState":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def watermark(self) -> str:
+        row = self._conn.execute("SELECT value FROM sync_meta WHERE key = 'watermark'").fetchone()
+        return row[0] if row else ""
+
+    def set_watermark(self, value: str) -> None:
+        self._conn.execute("INSERT OR REPLACE INTO sync_meta (key, value) VALUES ('watermark', ?)", (value,))
+        self._conn.commit()
+
+    def upsert_pending(self, deal_id: int, procurement_number: str, date_modify: str) -> None:
+        self._conn.execute(
+            """
+            INSERT INTO pending_deals (deal_id, procurement_number, date_modify) VALUES (?, ?, ?)
+            ON CONFLICT(deal_id) DO UPDATE SET procurement_number = excluded.procurement_number, date_modify = excluded.date_modify
+            """,
+            (deal_id, procurement_number, date_modify),
+        )
+
+    def drop_pending(self, deal_id: int) -> None:
+        self._conn.execute("DELETE FROM pending_deals WHERE deal_id = ?", (deal_id,))
+
+    def pending(self) -> List[Dict[str, Any]]:
+        rows = self._conn.execute("SELECT deal_id, procurement_number, date_modify, checked_date_modify, last_status FROM pending_deals ORDER BY deal_id").fetchall()
+        return [{"deal_id": row[0], "procurement_number": row[1], "date_modify": row[2], "checked_date_modify": row[3], "last_status": row[4]} for row in rows]
+
+    def mark_checked(self, deal_id: int, date_modify: str, status: str) -> None:
+        self._conn.execute(
+            "UPDATE pending_deals SET checked_date_modify = ?, last_status = ?, checked_at = ? WHERE deal_id = ?",
+            (date_modify, status, time.time(), deal_id),
+        )
+
+    def page(self, url: str) -> Optional[Dict[str, str]]:
+        row = self._conn.execute("SELECT etag, last_modified, body_sha256 FROM eis_pages WHERE url = ?", (url,)).fetchone()
+        return {"etag": row[0], "last_modified": row[1], "body_sha256": row[2]} if row else None
+
+    def save_page(self, url: str, etag: str, last_modified: str, body_sha256: str) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO eis_pages (url, etag, last_modified, body_sha256, checked_at) VALUES (?, ?, ?, ?, ?)",
+            (url, etag, last_modified, body_sha256, time.time()),
+        )
+
+    def commit(self) -> None:
+        self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.commit()
+        self._conn.close()
+
+
+def analytics_field_codes(config: Dict[str, Any]) -> List[str]:
+    return [code for code in (config["fields"].get(field) for field in fill_tender_result.PAYLOAD_TO_CONFIG_FIELD.values()) if code]
+
+
+def deal_procurement_number(deal: Dict[str, Any], config: Dict[str, Any]) -> str:
+    for field in fill_tender_result.procurement_number_fields(config):
+        number = fill_tender_result.normalize_procurement_number(deal.get(field))
+        if re.fullmatch(r"\d{19}", number):
+            return number
+    match = re.search(r"(?<!\d)\d{19}(?!\d)", str(deal.get("TITLE") or ""))
+    return match.group(0) if match else ""
+
+
+def refresh_pending(webhook_url: str, config: Dict[str, Any], state: SyncState) -> Dict[str, int]:
+    """Read deals changed since the watermark and update the pending set; returns counters."""
+    watermark = state.watermark()
+    select = ["ID", "TITLE", "DATE_MODIFY", *analytics_field_codes(config), *fill_tender_result.procurement_number_fields(config)]
+    # >= rather than >: deals modified in the same second as the last one seen are read again instead of missed.
+    filters = {">=DATE_MODIFY": watermark} if watermark else {}
+    counts = {"listed": 0, "added": 0, "dropped": 0}
+    newest = watermark
+    for deal in fill_tender_result.iter_category_deals(webhook_url, config, select, filters, {"DATE_MODIFY": "ASC"}):
+        counts["listed"] += 1
+        date_modify = str(deal.get("DATE_MODIFY") or "")
+        newest = max(newest, date_modify)
+        filled, _missing = fill_tender_result.all_analytics_fields_filled(deal, config)
+        number = deal_procurement_number(deal, config)
+        if filled or not number:
+            state.drop_pending(int(deal["ID"]))
+            counts["dropped"] += 1
+        else:
+            state.upsert_pending(int(deal["ID"]), number, date_modify)
+            counts["added"] += 1
+    state.set_watermark(newest)
+    return counts
+
+
+def fetch_changed_pages(reg_number: str, state: SyncState, conditional: bool) -> Tuple[Optional[Dict[str, str]], List[str], Dict[str, Dict[str, str]]]:
+    """Conditionally fetch the three pages; None when none changed, otherwise full pages, warnings and new validators."""
+    warnings: List[str] = []
+    pages: Dict[str, Optional[str]] = {}
+    validators: Dict[str, Dict[str, str]] = {}
+    changed = False
+    for key, (title, url) in collect_44fz_result.page_urls(reg_number).items():
+        previous = state.page(url) if conditional else None
+        try:
+            text, page_validators = collect_44fz_result.fetch_url_if_changed(url, (previous or {}).get("etag", ""), (previous or {}).get("last_modified", ""))
+        except (OSError, urllib.error.URLError, urllib.error.HTTPError) as exc:
+            warnings.append(f"Не удалось открыть {title}: {exc}")
+            pages[key] = ""
+            changed = True
+            continue
+        if text is not None:
+            digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+            changed = changed or previous is None or digest != previous["body_sha256"]
+            validators[url] = {**page_validators, "body_sha256": digest}
+        pages[key] = text
+    if not changed:
+        return None, warnings, validators
+    for key, (title, url) in collect_44fz_result.page_urls(reg_number).items():
+        if pages[key] is None:
+            # Unchanged (304) but needed because another page changed.
+            pages[key] = collect_44fz_result.fetch_raw_page_or_empty(title, url, warnings)
+    return {key: text or "" for key, text in pages.items()}, warnings, validators
+
+
+def sync_deal(entry: Dict[str, Any], webhook_url: str, config: Dict[str, Any], state: SyncState, mode: str, optimistic: bool = False) -> str:
+    """Check one pending deal; returns the outcome counted in the cycle summary."""
+    deal_id = entry["deal_id"]
+    # A deal only previewed in dry_run is written on the first update cycle even if nothing changed.
+    recheck = entry["date_modify"] != entry["checked_date_modify"] or (mode == "update" and entry["last_status"] == "dry_run")
+    pages, warnings, validators = fetch_changed_pages(entry["procurement_number"], state, conditional=not recheck)
+    if pages is None:
+        return "unchanged"
+
+    payload = collect_44fz_result.collect_44fz(entry["procurement_number"], deal_id, None, fetch_missing=False, warnings=warnings, **pages)
+    if payload.get("result_status") != "ok":
+        outcome = f"not_final:{payload.get('result_status')}"
+    else:
+        result = fill_batch_payload.process_item({**payload, "mode": mode}, config, webhook_url, optimistic=optimistic)
+        outcome = str(result.get("status"))
+        if mode == "update" and outcome in FINAL_STATUSES:
+            state.drop_pending(deal_id)
+    if outcome not in {"error", "configuration_error"}:
+        # A failed write keeps the old validators so the next cycle tries again.
+        for url, values in validators.items():
+            state.save_page(url, values.get("etag", ""), values.get("last_modified", ""), values["body_sha256"])
+        state.mark_checked(deal_id, entry["date_modify"], outcome)
+    state.commit()
+    return outcome
+
+
+def run_cycle(webhook_url: str, config: Dict[str, Any], state: SyncState, mode: str, *, max_deals: int = 0, optimistic: bool = False) -> Dict[str, Any]:
+    started = time.monotonic()
+    summary: Dict[str, Any] = {"mode": mode, **refresh_pending(webhook_url, config, state)}
+    pending = state.pending()
+    summary["pending"] = len(pending)
+    outcomes: Dict[str, int] = {}
+    for entry in pending[:max_deals] if max_deals else pending:
+        try:
+            outcome = sync_deal(entry, webhook_url, config, state, mode, optimistic)
+        except Exception as exc:  # noqa: BLE001 - deal boundary
+            eprint(f"Deal {entry['deal_id']}: {exc}")
+            outcome = "error"
+        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+    summary["outcomes"] = dict(sorted(outcomes.items()))
+    summary["elapsed_seconds"] = round(time.monotonic() - started, 3)
+    return summary
+
+
+def main(argv: Optional[Iterable[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Incrementally fill analytics fields of deals whose EIS results changed")
+    parser.add_argument("--mode", choices=sorted(ALLOWED_MODES), default="dry_run")
+    parser.add_argument("--config", default=None, help="Path to bitrix_fields.json")
+    parser.add_argument("--state", default=str(DEFAULT_STATE_PATH), help="SQLite file with the watermark, pending deals and EIS page validators")
+    parser.add_argument("--interval", type=float, default=0.0, help="Seconds between cycles; 0 runs one cycle and exits")
+    parser.add_argument("--max-deals", type=int, default=0, help="Pending deals checked per cycle; 0 means all")
+    parser.add_argument("--reset-watermark", action="store_true", help="Read the whole category again on the next cycle")
+    parser.add_argument("--optimistic-stage-check", action="store_true", help="Send analytics fields and a due stage move in one crm.deal.update")
+    parser.add_argument("--rate-limit", type=float, default=fill_tender_result.BITRIX_RATE_PER_SECOND, help="Bitrix24 requests per second; 0 disables throttling")
+    parser.add_argument("--rate-burst", type=int, default=fill_tender_result.BITRIX_RATE_BURST, help="Bitrix24 request bucket size")
+    args = parser.parse_args(list(argv) if argv is not None else None)
+
+    config, _config_path, is_example = fill_tender_result.load_config(Path(args.config) if args.config else None)
+    errors = fill_tender_result.validate_config(config, update_mode=(args.mode == "update"), config_is_example=is_example)
+    if errors:
+        print(json.dumps({"status": "validation_error", "errors": errors}, ensure_ascii=False))
+        return 2
+    webhook_url = os.environ.get("BITRIX_WEBHOOK_URL", "").strip()
+    if not webhook_url:
+        print(json.dumps({"status": "configuration_error", "reason": "BITRIX_WEBHOOK_URL is required to list deals"}, ensure_ascii=False))
+        return 3
+
+    pool = http_pool.ConnectionPool()
+    collect_44fz_result.configure_connection_pool(pool)
+    fill_tender_result.configure_connection_pool(pool)
+    fill_tender_result.configure_rate_limit(args.rate_limit, args.rate_burst)
+    with SyncState(Path(args.state)) as state:
+        if args.reset_watermark:
+            state.set_watermark("")
+        while True:
+            try:
+                summary = run_cycle(webhook_url, config, state, args.mode, max_deals=args.max_deals, optimistic=args.optimistic_stage_check)
+            except RuntimeError as exc:
+                summary = {"status": "error", "reason": str(exc)}
+            print(json.dumps(summary, ensure_ascii=False), flush=True)
+            if args.interval <= 0:
+                return 0 if summary.get("status") != "error" else 1
+            time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
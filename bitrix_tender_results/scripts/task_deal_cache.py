@@ -0,0 +1,87 @@
+"""Persistent task -> deal binding cache for Bitrix24 deal resolution.
+
+Bindings found through tasks.task.get / task.item.getdata / tasks.task.list are
+stored in a small SQLite file with the time they were seen. Entries older than
+the TTL are treated as misses; `invalidate` and `clear` drop entries explicitly.
+Only non-empty bindings are cached, so a task that gets its deal attached later
+is looked up again.
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+
+
+class TaskDealCache:
+    def __init__(self, path: Path, ttl_seconds: float = DEFAULT_TTL_SECONDS) -> None:
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path))
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS task_deal_bindings (
+                task_id INTEGER PRIMARY KEY,
+                deal_ids TEXT NOT NULL,
+                fetched_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+
+    def __enter__(self) -> "TaskDealCache":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def get(self, task_id: int) -> Optional[List[int]]:
+        row = self._conn.execute("SELECT deal_ids, fetched_at FROM task_deal_bindings WHERE task_id = ?", (int(task_id),)).fetchone()
+        if row is None or time.time() - row[1] > self.ttl_seconds:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return [int(deal_id) for deal_id in json.loads(row[0])]
+
+    def put(self, task_id: int, deal_ids: Iterable[int]) -> None:
+        deal_ids = [int(deal_id) for deal_id in deal_ids]
+        if not deal_ids:
+            return
+        self._conn.execute(
+            "INSERT OR REPLACE INTO task_deal_bindings (task_id, deal_ids, fetched_at) VALUES (?, ?, ?)",
+            (int(task_id), json.dumps(deal_ids), time.time()),
+        )
+        self._conn.commit()
+
+    def put_many(self, bindings: Dict[int, List[int]]) -> None:
+        for task_id, deal_ids in bindings.items():
+            self.put(task_id, deal_ids)
+
+    def missing(self, task_ids: Iterable[int]) -> List[int]:
+        """Task IDs without a fresh entry; does not count towards hit/miss stats."""
+        now = time.time()
+        result: List[int] = []
+        for task_id in dict.fromkeys(int(task_id) for task_id in task_ids):
+            row = self._conn.execute("SELECT fetched_at FROM task_deal_bindings WHERE task_id = ?", (task_id,)).fetchone()
+            if row is None or now - row[0] > self.ttl_seconds:
+                result.append(task_id)
+        return result
+
+    def invalidate(self, task_ids: Iterable[int]) -> None:
+        self._conn.executemany("DELETE FROM task_deal_bindings WHERE task_id = ?", [(int(task_id),) for task_id in task_ids])
+        self._conn.commit()
+
+    def clear(self) -> None:
+        self._conn.execute("DELETE FROM task_deal_bindings")
+        self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.close()
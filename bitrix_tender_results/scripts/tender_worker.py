@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""Resident tender worker with a local HTTP/JSON API.
+
+One long-running process instead of a fresh interpreter per procurement:
+config is loaded once, EIS and Bitrix24 requests go over reused keep-alive
+connections (http_pool), EIS pages are cached for `--page-cache-ttl` seconds,
+and the task -> deal cache and (with --bulk-resolve) the deal index stay warm
+between requests. With --extraction-memo pages that did not change since an
+earlier collection reuse its payload without being parsed again.
+
+API (JSON, bound to 127.0.0.1 by default):
+    POST /items   {"items": [{"procurement_number": "...", "deal_id": 1, "task_id": 2}], "mode": "dry_run", "wait": false}
+                  -> 202 {"ids": [...]}; with "wait": true -> 200 {"results": [...]}
+    GET  /items/<id>  -> the job with its state and, when done, its result
+    GET  /health      -> queue and cache counters
+
+EIS pages are collected in a thread pool; Bitrix24 writes run one at a time
+in a dedicated thread, through the same overwrite-safe apply_update as
+fill_batch_payload.py, so writes stay ordered and within the rate budget.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+if str(SCRIPT_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPT_DIR))
+
+import collect_44fz_result  # noqa: E402
+import extraction_memo  # noqa: E402
+import fill_batch_payload  # noqa: E402
+import fill_tender_result  # noqa: E402
+import http_pool  # noqa: E402
+import task_deal_cache  # noqa: E402
+import timing  # noqa: E402
+
+ALLOWED_MODES = {"dry_run", "update"}
+DEFAULT_PORT = 8765
+DEFAULT_PAGE_CACHE_TTL = 600.0
+DEFAULT_PAGE_CACHE_SIZE = 1000
+DEFAULT_MAX_RESULTS = 10000
+
+
+def eprint(message: str) -> None:
+    print(message, file=sys.stderr)
+
+
+class PageCache:
+    """LRU of downloaded EIS pages per procurement number; only complete downloads are kept."""
+
+    def __init__(self, ttl_seconds: float = DEFAULT_PAGE_CACHE_TTL, max_entries: int = DEFAULT_PAGE_CACHE_SIZE) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, str]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def fetch(self, reg_number: str) -> Tuple[Dict[str, str], List[str]]:
+        with self._lock:
+            entry = self._entries.get(reg_number)
+            if entry is not None and time.monotonic() - entry[0] <= self.ttl_seconds:
+                self._entries.move_to_end(reg_number)
+                self.hits += 1
+                return dict(entry[1]), []
+            self.misses += 1
+        pages, warnings = collect_44fz_result.fetch_44fz_pages(reg_number)
+        if not warnings and self.ttl_seconds > 0 and self.max_entries > 0:
+            with self._lock:
+                self._entries[reg_number] = (time.monotonic(), dict(pages))
+                self._entries.move_to_end(reg_number)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return pages, warnings
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def normalize_item(item: Any, default_mode: str) -> Dict[str, Any]:
+    if not isinstance(item, dict):
+        raise ValueError("every item must be an object")
+    number = str(item.get("procurement_number") or item.get("reg_number") or "").strip()
+    if not re.fullmatch(r"\d{19}", number):
+        raise ValueError(f"procurement_number must be a 19-digit EIS notice number: {number!r}")
+    mode = item.get("mode") or default_mode
+    if mode not in ALLOWED_MODES:
+        raise ValueError(f"unknown mode: {mode!r}")
+    return {
+        "procurement_number": number,
+        "deal_id": int(item["deal_id"]) if item.get("deal_id") not in (None, "") else None,
+        "task_id": int(item["task_id"]) if item.get("task_id") not in (None, "") else None,
+        "mode": mode,
+    }
+
+
+class TenderWorker:
+    def __init__(
+        self,
+        config: Dict[str, Any],
+        *,
+        webhook_url: str = "",
+        fetch_threads: int = 8,
+        page_cache: Optional[PageCache] = None,
+        memo: Optional[extraction_memo.ExtractionMemo] = None,
+        task_cache_path: Optional[Path] = None,
+        bulk_resolve: bool = False,
+        deal_index_ttl: float = 3600.0,
+        optimistic: bool = False,
+        max_results: int = DEFAULT_MAX_RESULTS,
+    ) -> None:
+        self.config = config
+        self.webhook_url = webhook_url
+        self.page_cache = page_cache or PageCache()
+        self.memo = memo
+        self.task_cache_path = task_cache_path
+        self.bulk_resolve = bulk_resolve
+        self.deal_index_ttl = deal_index_ttl
+        self.optimistic = optimistic
+        self.max_results = max_results
+        self.started_at = time.time()
+        self._jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._done: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+        self._collectors = ThreadPoolExecutor(max_workers=max(1, fetch_threads), thread_name_prefix="collect")
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="write")
+        # Created and used only on the writer thread: sqlite3 connections are bound to their thread.
+        self._task_cache: Optional[task_deal_cache.TaskDealCache] = None
+        self._deal_index: Optional[fill_tender_result.DealIndex] = None
+        self._deal_index_at = 0.0
+
+    def submit(self, items: Iterable[Dict[str, Any]]) -> List[str]:
+        ids: List[str] = []
+        for item in items:
+            job_id = uuid.uuid4().hex
+            job = {"id": job_id, **item, "state": "queued", "submitted_at": time.time()}
+            with self._lock:
+                self._jobs[job_id] = job
+                self._done[job_id] = threading.Event()
+            self._collectors.submit(self._collect, job)
+            ids.append(job_id)
+        return ids
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def wait(self, ids: Iterable[str], timeout: Optional[float] = None) -> List[Optional[Dict[str, Any]]]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        jobs = []
+        for job_id in ids:
+            event = self._done.get(job_id)
+            if event is not None:
+                event.wait(None if deadline is None else max(0.0, deadline - time.monotonic()))
+            jobs.append(self.get(job_id))
+        return jobs
+
+    def health(self) -> Dict[str, Any]:
+        with self._lock:
+            states: Dict[str, int] = {}
+            for job in self._jobs.values():
+                states[job["state"]] = states.get(job["state"], 0) + 1
+        health = {
+            "status": "ok",
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+            "jobs": states,
+            "page_cache": {"entries": len(self.page_cache), "hits": self.page_cache.hits, "misses": self.page_cache.misses},
+        }
+        if self.memo is not None:
+            health["extraction_memo"] = self.memo.stats()
+        return health
+
+    def close(self) -> None:
+        self._collectors.shutdown(wait=True)
+        self._writer.submit(self._close_writer_state).result()
+        self._writer.shutdown(wait=True)
+        if self.memo is not None:
+            self.memo.close()
+
+    def _set(self, job: Dict[str, Any], **changes: Any) -> None:
+        with self._lock:
+            job.update(changes)
+
+    def _finish(self, job: Dict[str, Any], result: Dict[str, Any]) -> None:
+        self._set(job, state="done", finished_at=time.time(), result=result)
+        with self._lock:
+            event = self._done.pop(job["id"], None)
+            finished = [job_id for job_id, entry in self._jobs.items() if entry["state"] == "done"]
+            for job_id in finished[: max(0, len(finished) - self.max_results)]:
+                del self._jobs[job_id]
+        if event is not None:
+            event.set()
+
+    def _collect(self, job: Dict[str, Any]) -> None:
+        self._set(job, state="collecting")
+        try:
+            (pages, warnings), spans = timing.call_recorded(self.page_cache.fetch, job["procurement_number"])
+            extract = self.memo.collect_44fz_from_pages if self.memo is not None else collect_44fz_result.collect_44fz_from_pages
+            payload, extract_spans = timing.call_recorded(extract, job["procurement_number"], job["deal_id"], job["task_id"], pages, warnings)
+        except Exception as exc:  # noqa: BLE001 - job boundary
+            self._finish(job, {"procurement_number": job["procurement_number"], "deal_id": job["deal_id"], "status": "error", "errors": [str(exc)]})
+            return
+        self._set(job, state="writing")
+        self._writer.submit(self._apply, job, payload, timing.merge(spans, extract_spans))
+
+    def _writer_state(self) -> Tuple[Optional[fill_tender_result.DealIndex], Optional[task_deal_cache.TaskDealCache]]:
+        if self.task_cache_path is not None and self._task_cache is None:
+            self._task_cache = task_deal_cache.TaskDealCache(self.task_cache_path)
+        if self.bulk_resolve and self.webhook_url and (self._deal_index is None or time.monotonic() - self._deal_index_at > self.deal_index_ttl):
+            # The index is loaded lazily on its first lookup; rebuilding it picks up deals created since.
+            self._deal_index = fill_tender_result.DealIndex(self.webhook_url, self.config)
+            self._deal_index_at = time.monotonic()
+        return self._deal_index, self._task_cache
+
+    def _close_writer_state(self) -> None:
+        if self._task_cache is not None:
+            self._task_cache.close()
+            self._task_cache = None
+
+    def _apply(self, job: Dict[str, Any], payload: Dict[str, Any], spans: timing.Spans) -> None:
+        try:
+            payload = {**payload, "mode": job["mode"]}
+            deal_index, task_cache = self._writer_state()
+            with timing.recording(spans):
+                result = fill_batch_payload.process_item(
+                    payload, self.config, self.webhook_url or None, deal_index=deal_index, task_cache=task_cache, optimistic=self.optimistic
+                )
+            result["payload"] = payload
+            if timing.ENABLED:
+                result["timings"] = timing.as_block(spans)
+        except Exception as exc:  # noqa: BLE001 - job boundary
+            result = {"procurement_number": job["procurement_number"], "deal_id": job["deal_id"], "status": "error", "errors": [str(exc)]}
+        self._finish(job, result)
+
+
+def make_handler(worker: TenderWorker, default_mode: str) -> type:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format: str, *args: Any) -> None:  # noqa: A002 - BaseHTTPRequestHandler signature
+            return
+
+        def send_json(self, status: int, data: Any) -> None:
+            body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self) -> None:
+            if self.path == "/health":
+                self.send_json(200, worker.health())
+                return
+            match = re.fullmatch(r"/items/([0-9a-f]{32})", self.path)
+            job = worker.get(match.group(1)) if match else None
+            if job is None:
+                self.send_json(404, {"error": "not_found"})
+                return
+            self.send_json(200, job)
+
+        def do_POST(self) -> None:
+            if self.path != "/items":
+                self.send_json(404, {"error": "not_found"})
+                return
+            try:
+                request = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+                if not isinstance(request, dict):
+                    raise ValueError("request body must be a JSON object")
+                raw_items = request.get("items", [request] if "procurement_number" in request else [])
+                if not isinstance(raw_items, list) or not raw_items:
+                    raise ValueError("items must be a non-empty array")
+                items = [normalize_item({"mode": request.get("mode"), **item} if isinstance(item, dict) else item, default_mode) for item in raw_items]
+            except (ValueError, TypeError) as exc:
+                self.send_json(400, {"error": "validation_error", "reason": str(exc)})
+                return
+            ids = worker.submit(items)
+            if request.get("wait"):
+                timeout = request.get("timeout")
+                self.send_json(200, {"results": worker.wait(ids, float(timeout) if timeout is not None else None)})
+                return
+            self.send_json(202, {"ids": ids})
+
+    return Handler
+
+
+def main(argv: Optional[Iterable[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Resident 44-FZ collection and Bitrix24 update worker with a local HTTP API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--mode", choices=sorted(ALLOWED_MODES), default="dry_run", help="Mode for items that do not set their own")
+    parser.add_argument("--config", default=None, help="Path to bitrix_fields.json")
+    parser.add_argument("--fetch-threads", type=int, default=8, help="Concurrent EIS collections")
+    parser.add_argument("--page-cache-ttl", type=float, default=DEFAULT_PAGE_CACHE_TTL, help="Seconds downloaded EIS pages are reused; 0 disables the cache")
+    parser.add_argument("--page-cache-size", type=int, default=DEFAULT_PAGE_CACHE_SIZE, help="Procurements kept in the page cache")
+    parser.add_argument("--extraction-memo", default="", help="SQLite memo of extraction results keyed by page fingerprints")
+    parser.add_argument("--stream-pages", action="store_true", help="Download pages compressed and stop once the labels the extractors need have been read")
+    parser.add_argument("--max-page-bytes", type=int, default=collect_44fz_result.DEFAULT_MAX_PAGE_BYTES, help="Hard cap on decompressed bytes read per page with --stream-pages")
+    parser.add_argument("--task-cache", default="", help="SQLite file with cached task -> deal bindings")
+    parser.add_argument("--bulk-resolve", action="store_true", help="Resolve deals by procurement number from an in-memory index of the category")
+    parser.add_argument("--deal-index-ttl", type=float, default=3600.0, help="Seconds before the --bulk-resolve index is rebuilt")
+    parser.add_argument("--optimistic-stage-check", action="store_true", help="Send analytics fields and a due stage move in one crm.deal.update")
+    parser.add_argument("--rate-limit", type=float, default=fill_tender_result.BITRIX_RATE_PER_SECOND, help="Bitrix24 requests per second; 0 disables throttling")
+    parser.add_argument("--rate-burst", type=int, default=fill_tender_result.BITRIX_RATE_BURST, help="Bitrix24 request bucket size")
+    parser.add_argument("--timings", action="store_true", help="Add a `timings` block to every result")
+    args = parser.parse_args(list(argv) if argv is not None else None)
+
+    if args.timings:
+        timing.enable()
+    config, config_path, _is_example = fill_tender_result.load_config(Path(args.config) if args.config else None)
+    webhook_url = os.environ.get("BITRIX_WEBHOOK_URL", "").strip()
+    pool = http_pool.ConnectionPool()
+    collect_44fz_result.configure_connection_pool(pool)
+    collect_44fz_result.configure_streaming(args.stream_pages, args.max_page_bytes)
+    fill_tender_result.configure_connection_pool(pool)
+    fill_tender_result.configure_rate_limit(args.rate_limit, args.rate_burst)
+
+    worker = TenderWorker(
+        config,
+        webhook_url=webhook_url,
+        fetch_threads=args.fetch_threads,
+        page_cache=PageCache(args.page_cache_ttl, args.page_cache_size),
+        memo=extraction_memo.ExtractionMemo(Path(args.extraction_memo)) if args.extraction_memo else None,
+        task_cache_path=Path(args.task_cache) if args.task_cache else None,
+        bulk_resolve=args.bulk_resolve,
+        deal_index_ttl=args.deal_index_ttl,
+        optimistic=args.optimistic_stage_check,
+    )
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(worker, args.mode))
+    server.daemon_threads = True
+    eprint(f"Tender worker on http://{args.host}:{server.server_address[1]} (config {config_path}, default mode {args.mode})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        worker.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
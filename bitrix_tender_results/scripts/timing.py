@@ -0,0 +1,150 @@
+"""Lightweight timing spans for the tender pipeline.
+
+Disabled by default: `span()` then returns a shared no-op context manager and
+functions wrapped with `timed()` pay one global check per call. After
+`enable()`, spans are accumulated into the recorder that `recording()` made
+active on the current thread, as `{name: [count, seconds]}`; spans outside any
+recording are dropped. Span times are wall-clock and include nested spans.
+"""
+
+from __future__ import annotations
+
+import functools
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+F = TypeVar("F", bound=Callable[..., Any])
+Spans = Dict[str, List[float]]
+
+ENABLED = False
+_local = threading.local()
+
+
+def enable(enabled: bool = True) -> None:
+    """Switch recording on or off for this process; also used as a process-pool initializer."""
+    global ENABLED
+    ENABLED = bool(enabled)
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc_info: Any) -> None:
+        return None
+
+
+NO_SPAN = _NoSpan()
+
+
+class _Span:
+    __slots__ = ("spans", "name", "started")
+
+    def __init__(self, spans: Spans, name: str) -> None:
+        self.spans = spans
+        self.name = name
+        self.started = 0.0
+
+    def __enter__(self) -> None:
+        self.started = time.perf_counter()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        elapsed = time.perf_counter() - self.started
+        entry = self.spans.get(self.name)
+        if entry is None:
+            self.spans[self.name] = [1, elapsed]
+        else:
+            entry[0] += 1
+            entry[1] += elapsed
+
+
+def span(name: str, detail: Optional[str] = None) -> Any:
+    """Context manager timing `name` (or `name:detail`) into the current recording."""
+    if not ENABLED:
+        return NO_SPAN
+    spans = getattr(_local, "spans", None)
+    if spans is None:
+        return NO_SPAN
+    return _Span(spans, f"{name}:{detail}" if detail else name)
+
+
+def timed(name: str) -> Callable[[F], F]:
+    """Decorator form of `span` for whole functions."""
+
+    def decorate(fn: F) -> F:
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not ENABLED:
+                return fn(*args, **kwargs)
+            with span(name):
+                return fn(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
+
+
+@contextmanager
+def recording(spans: Optional[Spans] = None) -> Iterator[Spans]:
+    """Make `spans` (a new dict by default) the target of spans on this thread."""
+    target: Spans = {} if spans is None else spans
+    previous = getattr(_local, "spans", None)
+    _local.spans = target
+    try:
+        yield target
+    finally:
+        _local.spans = previous
+
+
+def merge(target: Spans, other: Optional[Spans]) -> Spans:
+    for name, (count, seconds) in (other or {}).items():
+        entry = target.setdefault(name, [0, 0.0])
+        entry[0] += count
+        entry[1] += seconds
+    return target
+
+
+def as_block(spans: Spans) -> Dict[str, Dict[str, float]]:
+    """Per-item `timings` block: `{name: {"count": n, "ms": total}}`."""
+    return {name: {"count": int(count), "ms": round(seconds * 1000, 3)} for name, (count, seconds) in sorted(spans.items())}
+
+
+def percentile(values: List[float], share: float) -> Optional[float]:
+    """Nearest-rank percentile; None for an empty sample."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(share * len(ordered)) - 1)]
+
+
+def summarize(items: Iterable[Spans]) -> Dict[str, Dict[str, Any]]:
+    """Aggregate per-item spans into p50/p90/p99 of the per-item milliseconds for every span name."""
+    per_name: Dict[str, List[float]] = {}
+    calls: Dict[str, int] = {}
+    for spans in items:
+        for name, (count, seconds) in spans.items():
+            per_name.setdefault(name, []).append(seconds * 1000)
+            calls[name] = calls.get(name, 0) + int(count)
+    summary: Dict[str, Dict[str, Any]] = {}
+    for name in sorted(per_name):
+        values = per_name[name]
+        summary[name] = {
+            "items": len(values),
+            "calls": calls[name],
+            "total_ms": round(sum(values), 3),
+            **{key: round(percentile(values, share) or 0.0, 3) for key, share in (("p50_ms", 0.50), ("p90_ms", 0.90), ("p99_ms", 0.99))},
+        }
+    return summary
+
+
+def call_recorded(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Tuple[Any, Spans]:
+    """Run `fn` under a fresh recording and return `(result, spans)`; picklable for process pools."""
+    if not ENABLED:
+        return fn(*args, **kwargs), {}
+    with recording() as spans:
+        return fn(*args, **kwargs), spans
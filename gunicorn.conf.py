@@ -0,0 +1,8 @@
+# Настройки gunicorn для метрик Prometheus при нескольких воркерах.
+# Перед запуском задайте PROMETHEUS_MULTIPROC_DIR (пустой каталог, доступный на запись).
+from prometheus_client import multiprocess
+
+
+def child_exit(server, worker):
+    # Убираем livesum-значения (поиски в работе) завершившегося воркера.
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,50 @@
+import io
+import os
+from pathlib import Path
+
+import pytest
+
+from script_loader import load
+
+APP_PATH = Path(__file__).resolve().parents[1] / "app.py"
+
+
+@pytest.fixture(scope="session")
+def price_app(tmp_path_factory):
+    """app.py loaded once: its Prometheus metrics register in the default registry on import."""
+    for name in ("flask", "pandas", "openpyxl", "prometheus_client"):
+        pytest.importorskip(name)
+    # app.py creates uploads/ and results/ relative to the working directory on import.
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp("price_app"))
+    try:
+        return load("price_app", APP_PATH)
+    finally:
+        os.chdir(cwd)
+
+
+@pytest.fixture
+def price_client(price_app, tmp_path, monkeypatch):
+    """Test client with its own upload/result folders and a stub `process_article` (app.py defines none)."""
+    for folder in ("uploads", "results"):
+        (tmp_path / folder).mkdir()
+    monkeypatch.setattr(price_app, "UPLOAD_FOLDER", str(tmp_path / "uploads"))
+    monkeypatch.setattr(price_app, "RESULT_FOLDER", str(tmp_path / "results"))
+    monkeypatch.setattr(price_app, "column_mapping", {})
+    monkeypatch.setattr(price_app, "process_article", lambda article, price: (100.0, round(float(price) - 100.0, 2), "Цена найдена"), raising=False)
+    return price_app.app.test_client()
+
+
+@pytest.fixture
+def upload_prices(price_app):
+    """Upload a price list of (article, price) rows and map its columns; returns the file_id."""
+
+    def upload(client, rows):
+        buffer = io.BytesIO()
+        price_app.pd.DataFrame(rows, columns=["Артикул", "Цена"]).to_excel(buffer, index=False)
+        buffer.seek(0)
+        response = client.post("/upload", data={"file": (buffer, "prices.xlsx")}, content_type="multipart/form-data").get_json()
+        client.post("/confirm-mapping", json={"article_column": "Артикул", "price_column": "Цена"})
+        return response["file_id"]
+
+    return upload
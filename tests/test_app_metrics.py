@@ -0,0 +1,75 @@
+import types
+import uuid
+from pathlib import Path
+
+import pytest
+
+from script_loader import load
+
+pytest.importorskip("prometheus_client")
+from prometheus_client.parser import text_string_to_metric_families  # noqa: E402
+
+
+def scrape(client):
+    samples = {}
+    for family in text_string_to_metric_families(client.get("/metrics").get_data(as_text=True)):
+        for sample in family.samples:
+            samples[(sample.name, tuple(sorted(sample.labels.items())))] = sample.value
+    return samples
+
+
+def value(samples, name, **labels):
+    return samples.get((name, tuple(sorted(labels.items()))), 0.0)
+
+
+def test_pipeline_is_measured_per_route_template(price_app, price_client, upload_prices, monkeypatch):
+    def process_article(article, price):
+        if article == "BROKEN":
+            raise ValueError("marketplace refused")
+        return 100.0, 0.0, "Цена найдена"
+
+    monkeypatch.setattr(price_app, "process_article", process_article, raising=False)
+    before = scrape(price_client)
+    file_id = upload_prices(price_client, [("A-1", 100), ("BROKEN", 100), ("A-2", 100)])
+    assert price_client.post("/process", json={"file_id": file_id}).status_code == 200
+    assert price_client.get(f"/download/{file_id}").status_code == 200
+    after = scrape(price_client)
+
+    def delta(name, **labels):
+        return value(after, name, **labels) - value(before, name, **labels)
+
+    assert delta("price_http_request_seconds_count", route="/download/<file_id>", method="GET", status="200") == 1
+    assert delta("price_http_request_seconds_count", route="/upload", method="POST", status="200") == 1
+    assert not [labels for name, labels in after if name == "price_http_request_seconds_count" and ("route", f"/download/{file_id}") in labels]
+    assert delta("price_lookup_seconds_count", source="marketplace") == 3
+    assert delta("price_lookup_errors_total", source="marketplace") == 1
+    assert value(after, "price_lookups_in_flight", source="marketplace") == 0
+    assert delta("price_rows_processed_total") == 3
+    assert delta("price_job_seconds_count", status="success") == 1
+
+
+def test_failed_jobs_are_timed_as_errors(price_app, price_client, monkeypatch):
+    before = scrape(price_client)
+    assert price_client.post("/process", json={"file_id": str(uuid.uuid4())}).status_code == 400
+
+    def crash():
+        raise RuntimeError("disk full")
+
+    monkeypatch.setattr(price_app, "run_process_job", crash)
+    assert price_client.post("/process", json={"file_id": str(uuid.uuid4())}).status_code == 500
+    after = scrape(price_client)
+
+    assert value(after, "price_job_seconds_count", status="error") - value(before, "price_job_seconds_count", status="error") == 2
+    assert value(after, "price_job_seconds_count", status="success") == value(before, "price_job_seconds_count", status="success")
+    assert value(after, "price_http_request_seconds_count", route="/process", method="POST", status="500") - value(before, "price_http_request_seconds_count", route="/process", method="POST", status="500") == 1
+
+
+def test_gunicorn_drops_live_gauges_of_exited_workers(tmp_path, monkeypatch):
+    gunicorn_conf = load("gunicorn_conf", Path(__file__).resolve().parents[1] / "gunicorn.conf.py")
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+    for name in ("gauge_livesum_4242.db", "counter_4242.db", "gauge_livesum_4343.db"):
+        (tmp_path / name).write_bytes(b"")
+
+    gunicorn_conf.child_exit(None, types.SimpleNamespace(pid=4242))
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["counter_4242.db", "gauge_livesum_4343.db"]
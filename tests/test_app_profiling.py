@@ -0,0 +1,71 @@
+import os
+import threading
+import uuid
+
+
+def profile_file(price_app, file_id):
+    return os.path.join(price_app.RESULT_FOLDER, f"{file_id}_profile.pstats")
+
+
+def test_profiled_job_stores_pstats_and_serves_them(price_app, price_client, upload_prices):
+    by_header = upload_prices(price_client, [("A-1", 120), ("A-2", 90)])
+    by_json = upload_prices(price_client, [("A-3", 100)])
+    plain = upload_prices(price_client, [("A-4", 100)])
+
+    header_response = price_client.post("/process", json={"file_id": by_header}, headers={"X-Profile": "1"}).get_json()
+    json_response = price_client.post("/process", json={"file_id": by_json, "profile": True}).get_json()
+    plain_response = price_client.post("/process", json={"file_id": plain}, headers={"X-Profile": "no"}).get_json()
+
+    assert header_response == {"status": "success", "download_url": f"/download/{by_header}", "profile_url": f"/profile/{by_header}"}
+    assert json_response["profile_url"] == f"/profile/{by_json}"
+    assert plain_response == {"status": "success", "download_url": f"/download/{plain}"}
+    assert [os.path.exists(profile_file(price_app, file_id)) for file_id in (by_header, by_json, plain)] == [True, True, False]
+
+    download = price_client.get(f"/profile/{by_header}")
+    report = price_client.get(f"/profile/{by_header}?format=text")
+    assert download.status_code == 200 and "attachment" in download.headers["Content-Disposition"]
+    assert report.mimetype == "text/plain" and "cumulative" in report.get_data(as_text=True)
+    assert price_client.get(f"/profile/{plain}").status_code == 404
+    assert price_client.get("/profile/not-a-file-id").status_code == 404
+
+
+def test_failed_and_non_uuid_jobs_are_not_profiled(price_app, price_client, upload_prices):
+    missing = str(uuid.uuid4())
+    upload_prices(price_client, [("A-1", 100)])
+    # A saved upload whose name is not a UUID: the job runs, the profile path is never built from it.
+    os.rename(os.path.join(price_app.UPLOAD_FOLDER, os.listdir(price_app.UPLOAD_FOLDER)[0]), os.path.join(price_app.UPLOAD_FOLDER, "prices.xlsx"))
+
+    failed = price_client.post("/process", json={"file_id": missing}, headers={"X-Profile": "1"})
+    unsafe = price_client.post("/process", json={"file_id": "prices", "profile": True})
+
+    assert failed.status_code == 400 and "profile_url" not in failed.get_json()
+    assert unsafe.status_code == 200 and "profile_url" not in unsafe.get_json()
+    assert os.listdir(price_app.RESULT_FOLDER) == ["prices_result.xlsx"]
+    assert not price_app.profile_lock.locked()
+
+
+def test_concurrent_profile_request_runs_without_profile(price_app, price_client, upload_prices, monkeypatch):
+    slow = upload_prices(price_client, [("SLOW-1", 100)])
+    fast = upload_prices(price_client, [("A-1", 100)])
+    started, release = threading.Event(), threading.Event()
+
+    def process_article(article, price):
+        if article.startswith("SLOW"):
+            started.set()
+            release.wait(10)
+        return 100.0, 0.0, "Цена найдена"
+
+    monkeypatch.setattr(price_app, "process_article", process_article, raising=False)
+    responses = {}
+    first = threading.Thread(target=lambda: responses.update(slow=price_app.app.test_client().post("/process", json={"file_id": slow}, headers={"X-Profile": "1"}).get_json()))
+    first.start()
+    try:
+        assert started.wait(10)
+        responses["fast"] = price_client.post("/process", json={"file_id": fast}, headers={"X-Profile": "1"}).get_json()
+    finally:
+        release.set()
+        first.join(10)
+
+    assert responses["slow"]["profile_url"] == f"/profile/{slow}"
+    assert responses["fast"] == {"status": "success", "download_url": f"/download/{fast}"}
+    assert (os.path.exists(profile_file(price_app, slow)), os.path.exists(profile_file(price_app, fast))) == (True, False)
@@ -0,0 +1,149 @@
+import importlib.util
+from pathlib import Path
+
+MODULE_PATH = Path(__file__).resolve().parents[1] / "bitrix_tender_results" / "scripts" / "batch_44fz_results.py"
+spec = importlib.util.spec_from_file_location("batch_44fz_results", MODULE_PATH)
+batch = importlib.util.module_from_spec(spec)
+assert spec.loader is not None
+spec.loader.exec_module(batch)
+
+SUPPLIER_HTML = """
+<html><body>
+<div>Сведения о заключенном контракте</div>
+<div>Поставщик (подрядчик, исполнитель)</div>
+<div>ООО "ВИТА-АВТО"</div>
+<div>ИНН 7701234567</div>
+<div>Предложение участника</div><div>795 073 736,00 ₽</div>
+<div>Цена контракта</div><div>550 000,00 ₽</div>
+</body></html>
+"""
+PROTOCOL_HTML = "<div>Протокол подведения итогов определения поставщика от 12.03.2026</div><div>Количество поданных заявок: 1</div>"
+
+
+def items():
+    return [
+        {"procurement_number": "0873200005426000019", "deal_id": 15096, "task_id": 42712},
+        {"procurement_number": "0873200005426000020", "deal_id": 15097, "task_id": None},
+    ]
+
+
+def fake_pages(reg_number):
+    return {"supplier_html": SUPPLIER_HTML, "protocol_html": PROTOCOL_HTML, "common_html": ""}, []
+
+
+def test_pooled_collection_matches_inline_extraction(monkeypatch):
+    monkeypatch.setattr(batch.collect_44fz_result, "fetch_44fz_pages", fake_pages)
+
+    expected = {
+        index: batch.collect_44fz_result.collect_44fz_from_pages(item["procurement_number"], item["deal_id"], item["task_id"], *fake_pages(item["procurement_number"]))
+        for index, item in enumerate(items())
+    }
+    pooled = {index: payload for index, payload, _error, _spans in batch.collect_payloads(items(), process_pool=True, fetch_threads=2, extract_processes=2)}
+
+    assert pooled == expected
+    assert pooled[0]["winner_name"] == 'ООО "ВИТА-АВТО"'
+    assert pooled[0]["winner_price"] == 795073736.0
+    assert pooled[0]["participants_count"] == 1
+    assert pooled[1]["deal_id"] == 15097
+
+
+def test_collection_error_becomes_item_error():
+    result = batch.finish_item(items()[0], None, "boom", {"fields": {}}, False, "dry_run")
+
+    assert result["status"] == "error"
+    assert result["errors"] == ["boom"]
+
+
+def test_ndjson_writer_streams_items_and_summary(tmp_path, capsys):
+    output = tmp_path / "results.ndjson"
+    with batch.batch_output.BatchResultWriter(output, "ndjson") as writer:
+        writer.write({"procurement_number": "0873200005426000019", "status": "ok"})
+        assert output.read_text(encoding="utf-8").count("\n") == 1
+        writer.write({"procurement_number": "0873200005426000020", "status": "error"})
+        writer.finish({"total": writer.total, **writer.counts(["ok", "error"])})
+
+    lines = [batch.json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()]
+    assert [line["type"] for line in lines] == ["result", "result", "summary"]
+    assert lines[-1] == {"type": "summary", "total": 2, "ok": 1, "error": 1}
+    assert "results" not in capsys.readouterr().out
+
+
+def test_journal_resume_skips_only_completed_items_in_same_mode(tmp_path):
+    path = tmp_path / "journal.ndjson"
+    with batch.checkpoint_journal.CheckpointJournal(path) as journal:
+        journal.record("0873200005426000019", 15096, "update", "ok")
+        journal.record("0873200005426000020", 15097, "update", "error")
+    with path.open("a", encoding="utf-8") as stream:
+        stream.write('{"key": "torn')
+
+    journal = batch.checkpoint_journal.CheckpointJournal(path)
+    try:
+        assert journal.completed_entry("0873200005426000019", 15096, "update") is not None
+        assert journal.completed_entry("0873200005426000019", 15096, "dry_run") is None
+        assert journal.completed_entry("0873200005426000020", 15097, "update") is None
+    finally:
+        journal.close()
+    with batch.checkpoint_journal.CheckpointJournal(path) as journal:
+        journal.record("0873200005426000020", 15097, "update", "ok")
+    assert batch.checkpoint_journal.CheckpointJournal(path).completed_entry("0873200005426000020", 15097, "update") is not None
+
+
+def test_chunks_follow_rate_budget_and_batch_limit():
+    limiter = batch.fill_tender_result.RateLimiter(rate_per_second=0.001, burst=10)
+
+    assert batch.batch_scheduler.next_chunk_size(None, 1, 500) == 50
+    assert batch.batch_scheduler.next_chunk_size(limiter, 3, 50) == 3
+    assert batch.batch_scheduler.next_chunk_size(limiter, 0, 20) == 20
+
+
+def test_chunk_size_does_not_shrink_when_the_burst_is_spent():
+    limiter = batch.fill_tender_result.RateLimiter(rate_per_second=2, burst=50)
+    for _ in range(50):
+        limiter.acquire()
+
+    assert batch.batch_scheduler.next_chunk_size(limiter, 1, 50) == 50
+    assert batch.batch_scheduler.next_chunk_size(limiter, 3, 50) == 20
+
+
+def test_pipelined_chunks_cover_input_in_order():
+    sizes = iter([2, 3, 100])
+    collected = []
+
+    chunks = batch.batch_scheduler.pipelined_chunks(list(range(7)), lambda chunk: [value * 10 for value in chunk], lambda: next(sizes))
+    for chunk, values in chunks:
+        collected.append((chunk, values))
+
+    assert collected == [([0, 1], [0, 10]), ([2, 3, 4], [20, 30, 40]), ([5, 6], [50, 60])]
+
+
+def test_lots_of_one_procurement_are_collected_once(monkeypatch):
+    fetched = []
+
+    def counting_pages(reg_number):
+        fetched.append(reg_number)
+        return fake_pages(reg_number)
+
+    monkeypatch.setattr(batch.collect_44fz_result, "fetch_44fz_pages", counting_pages)
+    lots = items() + [{"procurement_number": "0873200005426000019", "deal_id": 15098, "task_id": 42713}]
+    shared = {}
+
+    first = {index: payload for index, payload, _error, _spans in batch.collect_payloads(lots, process_pool=True, fetch_threads=2, extract_processes=1, shared=shared)}
+    later = list(batch.collect_payloads([{"procurement_number": "0873200005426000020", "deal_id": 15099}], shared=shared))
+
+    assert sorted(fetched) == ["0873200005426000019", "0873200005426000020"]
+    assert [(first[index]["deal_id"], first[index]["task_id"]) for index in range(3)] == [(15096, 42712), (15097, None), (15098, 42713)]
+    assert first[2]["winner_name"] == first[0]["winner_name"] == 'ООО "ВИТА-АВТО"'
+    assert [(index, payload["deal_id"], spans) for index, payload, _error, spans in later] == [(0, 15099, {})]
+
+
+def test_run_pools_are_shared_by_chunks(monkeypatch):
+    monkeypatch.setattr(batch.collect_44fz_result, "fetch_44fz_pages", fake_pages)
+    fetch_pool, extract_pool = pools = batch.open_pools(2, 1)
+    with fetch_pool, extract_pool:
+        for item in items():
+            collected = list(batch.collect_payloads([item], process_pool=True, pools=pools))
+            assert collected[0][1]["participants_count"] == 1
+
+        # Neither executor was shut down by a chunk.
+        assert fetch_pool.submit(int).result() == 0
+        assert extract_pool.submit(int).result() == 0
@@ -0,0 +1,47 @@
+import argparse
+import importlib.util
+import urllib.parse
+from pathlib import Path
+
+MODULE_PATH = Path(__file__).resolve().parents[1] / "bitrix_tender_results" / "bench" / "load_test.py"
+spec = importlib.util.spec_from_file_location("load_test", MODULE_PATH)
+load_test = importlib.util.module_from_spec(spec)
+assert spec.loader is not None
+spec.loader.exec_module(load_test)
+
+import mock_bitrix_server as mock  # noqa: E402  (importable once load_test put bench/ on sys.path)
+
+fill = load_test.fill_tender_result
+
+
+def test_batch_query_round_trips_through_mock_parser():
+    params = {"filter": {"ID": [1, 2], "%TITLE": "0873"}, "select": ["ID", "TITLE"], "start": 50}
+    query = urllib.parse.urlencode(fill.build_bitrix_query(params))
+
+    assert mock.parse_bitrix_query(query) == {"filter": {"ID": ["1", "2"], "%TITLE": "0873"}, "select": ["ID", "TITLE"], "start": "50"}
+
+
+def test_mock_portal_rejects_requests_over_the_bucket():
+    with mock.MockBitrixServer(mock.MockPortal(1, bucket_capacity=2, drain_per_second=0.001)) as server:
+        fill.bitrix_call(server.webhook_url, "crm.deal.get", {"id": 10000})
+        fill.bitrix_call(server.webhook_url, "crm.deal.get", {"id": 10000})
+        try:
+            fill.bitrix_call(server.webhook_url, "crm.deal.get", {"id": 10000})
+        except RuntimeError as exc:
+            assert "QUERY_LIMIT_EXCEEDED" in str(exc)
+        else:
+            raise AssertionError("third request should exceed the bucket")
+
+
+def test_load_test_reports_throughput_and_calls_per_deal():
+    args = argparse.Namespace(
+        deals=5, resolve_by="deal_id", latency_ms=0.0, jitter_ms=0.0, bucket_capacity=0,
+        drain_per_second=2.0, limit_error_rate=0.0, client_rate_limit=0.0,
+    )
+
+    report = load_test.run_driver("fill_batch_payload", args)
+
+    assert report["statuses"] == {"ok": 5}
+    assert report["calls_by_method"]["batch"] == 1
+    assert report["calls_per_deal"] == 3.2
+    assert report["item_latency_ms"]["p99"] is not None
@@ -0,0 +1,58 @@
+import json
+import shutil
+import sys
+
+from script_loader import ROOT, load
+
+offline = load("bulk_collect_44fz_offline", ROOT / "scripts" / "bulk_collect_44fz_offline.py")
+# Pool workers unpickle collect_directory by module name.
+sys.modules.setdefault(offline.__name__, offline)
+
+CASE = ROOT / "bench" / "eis_corpus" / "multi_bid"
+REG = "0311300012326000044"
+
+
+def build_archive(root):
+    saved = root / "region" / REG
+    saved.mkdir(parents=True)
+    shutil.copy(CASE / "supplier-results.html", saved / "supplier-results.html")
+    shutil.copy(CASE / "protocol.html", saved / "protocol-main-info.html")
+    shutil.copy(CASE / "common-info.html", saved / "common-info.html")
+    (saved / "meta.json").write_text(json.dumps({"deal_id": 15120, "task_id": "42712"}), encoding="utf-8")
+    (saved / "0000000000000000001").mkdir()
+    partial = root / "1111111111111111111"
+    partial.mkdir()
+    shutil.copy(CASE / "supplier-results.html", partial / "supplier-results.html")
+    broken = root / "other" / "2222222222222222222"
+    broken.mkdir(parents=True)
+    (broken / "meta.json").write_text("{not json", encoding="utf-8")
+    return saved, partial, broken
+
+
+def test_archive_is_reextracted_into_ndjson(tmp_path, capsys):
+    saved, partial, broken = build_archive(tmp_path / "archive")
+
+    assert list(offline.iter_procurement_dirs(tmp_path / "archive")) == [partial, broken, saved]
+    assert list(offline.iter_procurement_dirs(saved)) == [saved]
+
+    texts = []
+    for workers in ("1", "2"):
+        output = tmp_path / f"workers{workers}.ndjson"
+        assert offline.main(["--archive-dir", str(tmp_path / "archive"), "--output", str(output), "--workers", workers, "--chunksize", "1"]) == 3
+        texts.append(output.read_text(encoding="utf-8"))
+    assert texts[0] == texts[1]
+    assert json.loads(capsys.readouterr().err.splitlines()[-1]) == {"total": 3, "ok": 1, "manual_check": 1, "error": 1}
+
+    partial_payload, broken_payload, saved_payload = [json.loads(line) for line in texts[0].splitlines()]
+    expected = json.loads((CASE / "expected_44fz.json").read_text(encoding="utf-8"))
+    assert saved_payload == {**expected, "task_id": 42712}
+    assert partial_payload["warnings"][:2] == [f"Нет сохранённой страницы {name} в {partial}" for name in ("protocol.html", "common-info.html")]
+    assert (broken_payload["procurement_number"], broken_payload["result_status"], broken_payload["source_dir"]) == ("2222222222222222222", "error", str(broken))
+
+
+def test_single_procurement_directory_is_accepted(tmp_path):
+    saved, _partial, _broken = build_archive(tmp_path / "archive")
+    output = tmp_path / "one.ndjson"
+
+    assert offline.main(["--archive-dir", str(saved), "--output", str(output), "--workers", "1"]) == 0
+    assert [json.loads(line)["deal_id"] for line in output.read_text(encoding="utf-8").splitlines()] == [15120]
@@ -0,0 +1,65 @@
+import zipfile
+
+from script_loader import ROOT, load
+
+
+collect = load("collect_44fz_result", ROOT / "scripts" / "collect_44fz_result.py")
+index_module = collect.eis_xml_index
+
+REG = "0873200005426000019"
+FIRST_PARTS = f"""<export xmlns="http://zakupki.gov.ru/oos/export/1" xmlns:ns2="http://zakupki.gov.ru/oos/types/1">
+<fcsProtocolEF1><ns2:purchaseNumber>{REG}</ns2:purchaseNumber><ns2:applications>
+<ns2:application><ns2:journalNumber>1</ns2:journalNumber></ns2:application>
+<ns2:application><ns2:journalNumber>2</ns2:journalNumber></ns2:application>
+<ns2:application><ns2:journalNumber>3</ns2:journalNumber></ns2:application>
+</ns2:applications></fcsProtocolEF1></export>"""
+FINAL = f"""<export xmlns="http://zakupki.gov.ru/oos/export/1" xmlns:ns2="http://zakupki.gov.ru/oos/types/1">
+<fcsProtocolEF3><ns2:purchaseNumber>{REG}</ns2:purchaseNumber><ns2:publishDate>2026-03-15T10:00:00+03:00</ns2:publishDate><ns2:applications>
+<ns2:application><ns2:appRating>2</ns2:appRating><ns2:price>1200.00</ns2:price><ns2:appParticipant><ns2:organizationName>ООО "ВТОРОЙ"</ns2:organizationName></ns2:appParticipant></ns2:application>
+<ns2:application><ns2:appRating>1</ns2:appRating><ns2:price>1000.50</ns2:price><ns2:appParticipant><ns2:inn>7701000000</ns2:inn><ns2:organizationName>ООО "ПОБЕДИТЕЛЬ"</ns2:organizationName></ns2:appParticipant></ns2:application>
+</ns2:applications></fcsProtocolEF3>
+<fcsProtocolCancel><ns2:purchaseNumber>{REG}</ns2:purchaseNumber></fcsProtocolCancel></export>"""
+CONTRACT = f"""<export xmlns="http://zakupki.gov.ru/oos/export/1" xmlns:ns2="http://zakupki.gov.ru/oos/types/1">
+<contract><ns2:regNum>3770100000026000123</ns2:regNum><ns2:publishDate>2026-03-25T09:00:00+03:00</ns2:publishDate>
+<ns2:foundation><ns2:fcsOrder><ns2:order><ns2:notificationNumber>{REG}</ns2:notificationNumber></ns2:order></ns2:fcsOrder></ns2:foundation>
+<ns2:priceInfo><ns2:price>1000.50</ns2:price></ns2:priceInfo>
+<ns2:suppliers><ns2:supplier><ns2:legalEntityRF><ns2:EGRULInfo><ns2:fullName>ООО "ПОБЕДИТЕЛЬ"</ns2:fullName><ns2:INN>7701000000</ns2:INN></ns2:EGRULInfo></ns2:legalEntityRF></ns2:supplier></ns2:suppliers>
+</contract></export>"""
+
+
+def test_archives_are_indexed_and_answer_collect_44fz(tmp_path, monkeypatch):
+    archive = tmp_path / "protocols.zip"
+    with zipfile.ZipFile(archive, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("fcsProtocolEF3_final.xml", FINAL)
+        zf.writestr("fcsProtocolEF1_first.xml", FIRST_PARTS)
+        zf.writestr("readme.txt", "not xml")
+    (tmp_path / "contract.xml").write_text(CONTRACT, encoding="utf-8")
+
+    def offline(url):
+        raise AssertionError(f"unexpected download of {url}")
+
+    monkeypatch.setattr(collect, "fetch_url", offline)
+    with index_module.EisResultIndex(tmp_path / "index.sqlite") as index:
+        totals = index.ingest_path(tmp_path)
+        monkeypatch.setattr(collect, "RESULT_INDEX", index)
+        payload = collect.collect_44fz(REG, 15096, 42712)
+
+    assert totals == {"files": 3, "protocols": 2, "contracts": 1, "skipped": 1}
+    assert (payload["winner_name"], payload["winner_inn"], payload["winner_price"], payload["participants_count"]) == ('ООО "ПОБЕДИТЕЛЬ"', "7701000000", 1000.5, 2)
+    assert (payload["protocol_date"], payload["contract_registry_number"], payload["contract_publish_date"]) == ("15.03.2026", "3770100000026000123", "25.03.2026")
+    assert payload["result_status"] == "ok" and payload["deal_id"] == 15096
+    assert payload["confidence"] == "medium" and len(payload["warnings"]) == 1 and "НМЦК" in payload["warnings"][0]
+    assert [source["url"] for source in payload["sources"]] == [
+        f"{archive}!fcsProtocolEF3_final.xml",
+        "https://zakupki.gov.ru/epz/contract/contractCard/common-info.html?reestrNumber=3770100000026000123",
+    ]
+
+
+def test_record_without_winner_is_not_used(tmp_path, monkeypatch):
+    (tmp_path / "first.xml").write_text(FIRST_PARTS, encoding="utf-8")
+    with index_module.EisResultIndex(tmp_path / "index.sqlite") as index:
+        index.ingest_path(tmp_path / "first.xml")
+        monkeypatch.setattr(collect, "RESULT_INDEX", index)
+
+        assert index.get(REG)["participants_count"] == 3
+        assert collect.collect_44fz_from_index(REG, 1, None) is None
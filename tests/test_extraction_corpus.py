@@ -0,0 +1,39 @@
+import importlib.util
+import json
+from pathlib import Path
+
+import pytest
+
+MODULE_PATH = Path(__file__).resolve().parents[1] / "bitrix_tender_results" / "bench" / "extraction_bench.py"
+spec = importlib.util.spec_from_file_location("extraction_bench", MODULE_PATH)
+bench = importlib.util.module_from_spec(spec)
+assert spec.loader is not None
+spec.loader.exec_module(bench)
+
+CASES = bench.load_corpus()
+
+
+@pytest.mark.parametrize("case", CASES, ids=[case["name"] for case in CASES])
+def test_corpus_extraction_matches_expected_payloads(case):
+    expected_44fz = json.loads((case["dir"] / "expected_44fz.json").read_text(encoding="utf-8"))
+    expected_eis = json.loads((case["dir"] / "expected_eis.json").read_text(encoding="utf-8"))
+
+    assert bench.collect_44fz(case) == expected_44fz
+    assert bench.collect_eis(case) == expected_eis
+
+
+def test_huge_case_is_inflated_from_markers():
+    case = next(case for case in CASES if case["name"] == "huge_protocol")
+
+    assert "<!-- ROWS -->" not in case["pages"]["protocol_html"]
+    assert case["pages"]["protocol_html"].count("<tr>") > 4000
+    assert bench.collect_44fz(case)["participants_count"] == 148
+
+
+def test_baseline_comparison_flags_slowdowns_and_memory_growth():
+    baseline = {"cases": {"small": {"relative_time": {"44fz.collect_44fz": 0.2, "44fz.extract_status": 0.1}, "peak_memory_bytes": {"44fz.collect_44fz": 1000}}}}
+    report = {"cases": [{"case": "small", "relative_time": {"44fz.collect_44fz": 0.5, "44fz.extract_status": 0.3}, "peak_memory_bytes": {"44fz.collect_44fz": 1100}}]}
+
+    assert bench.compare_to_baseline(report, baseline) == ["corpus: 44fz.collect_44fz is 2.50x the baseline time"]
+    assert len(bench.compare_to_baseline(report, baseline, per_case=True)) == 2
+    assert len(bench.compare_to_baseline(report, baseline, memory_tolerance=0.05)) == 2
@@ -0,0 +1,49 @@
+import json
+
+from script_loader import ROOT, load
+
+
+memo_module = load("extraction_memo", ROOT / "scripts" / "extraction_memo.py")
+bench = load("extraction_bench", ROOT / "bench" / "extraction_bench.py")
+CASE = next(case for case in bench.load_corpus() if case["name"] == "multi_bid")
+
+
+def test_hit_returns_expected_payload_without_extracting(tmp_path, monkeypatch):
+    expected_44fz = json.loads((CASE["dir"] / "expected_44fz.json").read_text(encoding="utf-8"))
+    expected_eis = json.loads((CASE["dir"] / "expected_eis.json").read_text(encoding="utf-8"))
+    reg, pages = CASE["procurement_number"], CASE["pages"]
+
+    with memo_module.ExtractionMemo(tmp_path / "memo.sqlite") as memo:
+        memo.collect_44fz_from_pages(reg, CASE["deal_id"], CASE["task_id"], pages, [])
+        memo.collect_eis_from_html(pages["supplier_html"], reg, CASE["deal_id"], CASE["task_id"])
+
+    def fail(*_args, **_kwargs):
+        raise AssertionError("extraction ran on a memo hit")
+
+    monkeypatch.setattr(memo_module.collect_44fz_result, "strip_html", fail)
+    monkeypatch.setattr(memo_module.collect_eis_result, "strip_html", fail)
+    with memo_module.ExtractionMemo(tmp_path / "memo.sqlite") as memo:
+        assert memo.collect_44fz_from_pages(reg, CASE["deal_id"], CASE["task_id"], pages, []) == expected_44fz
+        assert memo.collect_eis_from_html(pages["supplier_html"], reg, CASE["deal_id"], CASE["task_id"]) == expected_eis
+        other_lot = memo.collect_44fz_from_pages(reg, 777, None, pages, [])
+        assert memo.stats() == {"hits": 3, "misses": 0}
+
+    assert (other_lot["deal_id"], other_lot["task_id"]) == (777, None)
+
+
+def test_changed_pages_or_extractor_version_miss(tmp_path):
+    reg, pages = CASE["procurement_number"], CASE["pages"]
+    changed = {**pages, "protocol_html": pages["protocol_html"] + "<p>Изменение</p>"}
+
+    with memo_module.ExtractionMemo(tmp_path / "memo.sqlite", version="v1") as memo:
+        memo.collect_44fz_from_pages(reg, 1, None, pages, [])
+        memo.collect_44fz_from_pages(reg, 1, None, changed, [])
+        memo.collect_44fz_from_pages(reg, 1, None, pages, ["Не удалось открыть common-info: timeout"])
+        assert memo.stats() == {"hits": 0, "misses": 3}
+
+    with memo_module.ExtractionMemo(tmp_path / "memo.sqlite", version="v2") as memo:
+        assert memo._conn.execute("SELECT COUNT(*) FROM extraction_memo").fetchone()[0] == 0
+        memo.collect_44fz_from_pages(reg, 1, None, pages, [])
+        assert memo.stats() == {"hits": 0, "misses": 1}
+
+    assert memo_module.extractor_version() == memo_module.extractor_version()
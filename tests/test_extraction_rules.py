@@ -0,0 +1,73 @@
+import importlib.util
+import json
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1] / "bitrix_tender_results"
+spec = importlib.util.spec_from_file_location("extraction_rules", ROOT / "scripts" / "extraction_rules.py")
+rules_module = importlib.util.module_from_spec(spec)
+assert spec.loader is not None
+spec.loader.exec_module(rules_module)
+
+CONFIG = {
+    "patterns": {
+        "money": {"regex": "(?:^|[^\\d])(\\d+(?:[,.]\\d{2}))", "max_chars": 4000},
+        "inn": {"regex": "\\b(\\d{10}|\\d{12})\\b"},
+    },
+    "demo": {
+        "line_break": "(?i)</(?:p|td)>",
+        "joins": {"both": ["first", "second"]},
+        "sections": {"contract": {"source": "second", "label": "Контракт", "before": 0, "after": 200}},
+        "fields": {
+            "supplier": {
+                "type": "text_between",
+                "source": "contract",
+                "starts": ["Поставщик"],
+                "stops": ["ИНН"],
+                "max_len": 200,
+                "clean": {"drop": ["^ООО\\s*"], "strip": " \""},
+            },
+            "supplier_inn": {"type": "pattern_after", "source": "contract", "label_from": "supplier", "before": 0, "after": 100, "pattern": "inn"},
+            "price": {"type": "money_after", "source": ["missing", "second"], "labels": ["Цена"], "after": 50},
+            "status": {"type": "first_marker", "source": "both", "markers": ["завершено", ["отмен", "Отменена"]]},
+            "count": {"type": "count", "source": "first", "patterns": ["заявок:\\s*(\\d+)"], "single_patterns": ["одна заявка"]},
+        },
+    },
+}
+
+
+def test_rules_from_config_extract_every_field_type(tmp_path):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps(CONFIG, ensure_ascii=False), encoding="utf-8")
+    rules = rules_module.load(path)["demo"]
+
+    texts = {
+        "first": rules.strip_html("<p>Протокол</p><p>Подана одна заявка</p><script>ОТМЕНЕНА</script>"),
+        "second": "Шапка. Цена 9,99. КОНТРАКТ Поставщик ООО \"Ромашка\" ИНН 7701000000. Закупка отменена",
+    }
+    docs = rules.documents(texts)
+    values = rules.extract(docs)
+
+    assert values == {"supplier": "Ромашка", "supplier_inn": "7701000000", "price": 9.99, "status": "Отменена", "count": 1}
+    # Joined pages answer label lookups from their parts without being joined.
+    assert docs.get("both")._text is None
+    assert rules.variant("price", labels=["Шапка"], after=20).extract(docs.get("second"), {}) == 9.99
+
+
+def test_line_value_fields_share_the_lines_of_a_document():
+    rules = rules_module.RuleSet(
+        {
+            "line_break": "\n",
+            "joins": {"both": ["first", "second"]},
+            "fields": {
+                "winner": {"type": "line_value", "source": "both", "labels": ["Победитель"], "stops": ["ИНН"]},
+                "customer": {"type": "line_value", "source": "both", "labels": ["Заказчик"], "stops": ["ИНН"], "max_lines": 2},
+            },
+        },
+        {},
+    )
+    docs = rules.documents({"first": "Шапка\n  Заказчик:  \nГБУ «Школа»\n\nг. Москва\nИНН 7701", "second": "Победитель — ООО \"Ромашка\"\r\nИНН 7702"})
+
+    assert rules.extract(docs) == {"winner": 'ООО "Ромашка"', "customer": "ГБУ «Школа» г. Москва"}
+    both = docs.get("both")
+    assert both._text is None and both.lines is both.lines
+    assert both.lines == docs.get("first").lines + docs.get("second").lines
@@ -0,0 +1,110 @@
+import importlib.util
+import json
+from pathlib import Path
+
+MODULE_PATH = Path(__file__).resolve().parents[1] / "bitrix_tender_results" / "scripts" / "fill_batch_payload.py"
+spec = importlib.util.spec_from_file_location("fill_batch_payload", MODULE_PATH)
+batch = importlib.util.module_from_spec(spec)
+assert spec.loader is not None
+spec.loader.exec_module(batch)
+
+fill = batch.fill_tender_result
+
+
+def load_mock():
+    path = MODULE_PATH.parents[1] / "bench" / "mock_bitrix_server.py"
+    mock_spec = importlib.util.spec_from_file_location("mock_bitrix_server", path)
+    module = importlib.util.module_from_spec(mock_spec)
+    assert mock_spec.loader is not None
+    mock_spec.loader.exec_module(module)
+    return module
+
+
+def test_task_cache_avoids_repeated_task_lookups(tmp_path, monkeypatch):
+    calls = []
+
+    def fake_call(webhook_url, method, params):
+        calls.append(method)
+        return {"result": {"task": {"ufCrmTask": ["D_15096"]}}}
+
+    monkeypatch.setattr(fill, "bitrix_call", fake_call)
+    with batch.task_deal_cache.TaskDealCache(tmp_path / "tasks.sqlite") as cache:
+        assert fill.find_deal_ids_by_task_id("https://example.invalid", 42712, cache) == [15096]
+        assert fill.find_deal_ids_by_task_id("https://example.invalid", "42712", cache) == [15096]
+        assert calls == ["tasks.task.get"]
+
+        cache.invalidate([42712])
+        assert fill.find_deal_ids_by_task_id("https://example.invalid", 42712, cache) == [15096]
+        assert calls == ["tasks.task.get", "tasks.task.get"]
+
+
+def test_task_cache_entries_expire(tmp_path):
+    with batch.task_deal_cache.TaskDealCache(tmp_path / "tasks.sqlite", ttl_seconds=-1) as cache:
+        cache.put(42712, [15096])
+
+        assert cache.get(42712) is None
+        assert cache.missing([42712, 42712]) == [42712]
+
+
+def test_bulk_task_prefetch_fills_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        fill,
+        "bitrix_call",
+        lambda webhook_url, method, params: {"result": {"tasks": [{"id": "42712", "ufCrmTask": ["D_15096"]}, {"id": "42713", "ufCrmTask": []}]}},
+    )
+    items = [
+        {"mode": "update", "task_id": 42712, "procurement_number": "0873200005426000019"},
+        {"mode": "update", "task_id": 42713, "procurement_number": "0873200005426000020"},
+    ]
+    with batch.task_deal_cache.TaskDealCache(tmp_path / "tasks.sqlite") as cache:
+        batch.prefetch_task_bindings(items, "https://example.invalid", cache)
+
+        assert cache.get(42712) == [15096]
+        assert cache.get(42713) is None
+
+
+def test_applied_index_skips_repeated_writes(tmp_path, monkeypatch):
+    mock = load_mock()
+    config, _path, _example = fill.load_config(None)
+    portal = mock.MockPortal(1, config=config)
+    monkeypatch.setattr(fill, "RATE_LIMITER", None)
+    payload = {
+        "mode": "update",
+        "deal_id": 10000,
+        "procurement_number": mock.tender_number(0),
+        "result_status": "ok",
+        "winner_name": 'ООО "ПОСТАВЩИК 0"',
+        "winner_price": 1000.5,
+        "participants_count": 3,
+    }
+
+    with mock.MockBitrixServer(portal) as server, batch.applied_index.AppliedIndex(tmp_path / "applied.sqlite") as applied:
+        first = batch.process_item(payload, config, server.webhook_url, applied=applied)
+        calls_after_first = sum(portal.stats()["calls"].values())
+        repeated = batch.process_item(payload, config, server.webhook_url, applied=applied)
+        calls_after_repeat = sum(portal.stats()["calls"].values())
+        audited = batch.process_item(payload, config, server.webhook_url, applied=applied, verify_applied=True)
+        changed = batch.process_item({**payload, "participants_count": 4}, config, server.webhook_url, applied=applied)
+
+    assert first["status"] == "ok"
+    assert (repeated["status"], repeated["reason"]) == ("no_op", "already_applied")
+    assert calls_after_repeat == calls_after_first
+    assert (audited["status"], audited["applied_index"]) == ("no_op", "confirmed")
+    assert changed["status"] == "manual_check"
+    assert applied.hits == 2 and applied.misses == 2
+
+
+def test_resume_keeps_task_resolved_lots_of_one_procurement_apart(tmp_path, monkeypatch):
+    monkeypatch.delenv("BITRIX_WEBHOOK_URL", raising=False)
+    lot = {"procurement_number": "0873200005426000019", "result_status": "ok", "winner_name": 'ООО "ВИТА"', "winner_price": 1000.0, "participants_count": 2}
+    batch_file = tmp_path / "batch.json"
+    batch_file.write_text(json.dumps({"mode": "dry_run", "items": [{**lot, "task_id": 42712}, {**lot, "task_id": 42713}]}, ensure_ascii=False), encoding="utf-8")
+    journal = tmp_path / "journal.ndjson"
+    with batch.checkpoint_journal.CheckpointJournal(journal) as entries:
+        entries.record(lot["procurement_number"], None, "dry_run", "dry_run", 42712)
+
+    output = tmp_path / "results.json"
+    batch.main(["--payload-json", str(batch_file), "--output", str(output), "--journal", str(journal), "--resume"])
+
+    results = json.loads(output.read_text(encoding="utf-8"))["results"]
+    assert [(result["task_id"], result["status"]) for result in results] == [(42712, "skipped_completed"), (42713, "dry_run")]
@@ -1,6 +1,8 @@
 import importlib.util
 from pathlib import Path
 
+import pytest
+
 MODULE_PATH = Path(__file__).resolve().parents[1] / "bitrix_tender_results" / "scripts" / "fill_tender_result.py"
 spec = importlib.util.spec_from_file_location("fill_tender_result", MODULE_PATH)
 fill = importlib.util.module_from_spec(spec)
@@ -228,3 +230,151 @@ def test_price_and_participants_are_coerced_to_numeric_values():
 
     assert fields["UF_CRM_1726788197"] == 795073736.0
     assert fields["UF_CRM_1751272530"] == 1
+
+
+def test_batch_command_query_uses_bitrix_array_syntax():
+    pairs = fill.build_bitrix_query({"id": 15096, "filter": {"%TITLE": "0873"}, "select": ["ID", "TITLE"]})
+
+    assert pairs == [("id", "15096"), ("filter[%TITLE]", "0873"), ("select[0]", "ID"), ("select[1]", "TITLE")]
+
+
+def test_deal_index_resolves_batch_from_one_category_pass(monkeypatch):
+    pages = {
+        0: {"result": [{"ID": "15096", "TITLE": "ЭА 0873 200005426000019 поставка"}, {"ID": "15097", "TITLE": "0873200005426000020"}], "next": 2},
+        2: {"result": [{"ID": "15098", "TITLE": "лот 2 0873200005426000020"}]},
+    }
+    calls = []
+
+    def fake_call(webhook_url, method, params):
+        calls.append((method, params["start"], params["filter"]))
+        return pages[params["start"]]
+
+    monkeypatch.setattr(fill, "bitrix_call", fake_call)
+    index = fill.DealIndex("https://example.invalid", config())
+
+    assert fill.resolve_deal_id(payload(deal_id=None), "https://example.invalid", config(), index)[:2] == (15096, "found_by_procurement_number")
+    try:
+        fill.resolve_deal_id(payload(deal_id=None, procurement_number="0873200005426000020"), "https://example.invalid", config(), index)
+    except fill.ControlledStop as exc:
+        assert exc.reason == "multiple_deals_found_by_procurement_number"
+        assert exc.extra["matched_deal_ids"] == ["15097", "15098"]
+    else:
+        raise AssertionError("ControlledStop was not raised")
+    assert calls == [("crm.deal.list", 0, {"CATEGORY_ID": 0}), ("crm.deal.list", 2, {"CATEGORY_ID": 0})]
+
+
+def test_deal_index_matches_numbers_of_other_lengths_like_title_search(monkeypatch):
+    deals = [{"ID": "15096", "TITLE": "223-ФЗ 32615 123456 поставка"}, {"ID": "15097", "TITLE": "0873200005426000019"}]
+    monkeypatch.setattr(fill, "bitrix_call", lambda webhook_url, method, params: {"result": deals})
+    index = fill.DealIndex("https://example.invalid", config())
+
+    for number in ("32615123456", "5426000019", "0873200005426000019", ""):
+        assert index.find(number) == [deal for deal in deals if number and fill.deal_contains_procurement_number(deal, number)]
+
+
+class FakeBitrix:
+    def __init__(self, deal):
+        self.deal = dict(deal)
+        self.calls = []
+
+    def __call__(self, webhook_url, method, params):
+        self.calls.append((method, params))
+        if method == "crm.deal.get":
+            return {"result": dict(self.deal)}
+        if method == "crm.deal.update":
+            self.deal.update(params["fields"])
+            return {"result": True}
+        raise AssertionError(f"unexpected method {method}")
+
+
+def empty_deal(**overrides):
+    deal = {
+        "ID": "15096",
+        "STAGE_ID": "NEW",
+        "UF_CRM_1693464904935": "",
+        "UF_CRM_1726788197": "",
+        "UF_CRM_1751272530": "",
+        "UF_CRM_1689581836": "",
+    }
+    deal.update(overrides)
+    return deal
+
+
+def test_optimistic_update_folds_stage_move_without_reread(monkeypatch):
+    bitrix = FakeBitrix(empty_deal())
+    monkeypatch.setattr(fill, "bitrix_call", bitrix)
+
+    log = fill.apply_update(payload(deal_id=15096), config(), "https://example.invalid", optimistic=True)
+
+    assert [method for method, _ in bitrix.calls] == ["crm.deal.get", "crm.deal.update"]
+    assert bitrix.calls[1][1]["fields"]["STAGE_ID"] == "29"
+    assert log["status"] == "ok"
+    assert log["stage_update"] == "sent_with_analytics_update"
+
+
+def test_optimistic_update_keeps_stage_when_tender_specialist_filled(monkeypatch):
+    bitrix = FakeBitrix(empty_deal(UF_CRM_1689581836="17"))
+    monkeypatch.setattr(fill, "bitrix_call", bitrix)
+
+    log = fill.apply_update(payload(deal_id=15096), config(), "https://example.invalid", optimistic=True, verify_sample_rate=1.0)
+
+    assert "STAGE_ID" not in bitrix.calls[1][1]["fields"]
+    assert log["stage_move_reason"] == "tender_specialist_to_filled"
+    assert log["optimistic_verification"] == {"status": "match", "mismatched_fields": []}
+
+
+def test_default_update_rereads_before_stage_move(monkeypatch):
+    bitrix = FakeBitrix(empty_deal())
+    monkeypatch.setattr(fill, "bitrix_call", bitrix)
+
+    fill.apply_update(payload(deal_id=15096), config(), "https://example.invalid")
+
+    assert [method for method, _ in bitrix.calls] == ["crm.deal.get", "crm.deal.update", "crm.deal.get", "crm.deal.update"]
+
+
+def test_single_call_plan_requires_all_three_fields_after_merge():
+    existing = empty_deal(UF_CRM_1751272530="")
+    partial = {"UF_CRM_1693464904935": "ООО", "UF_CRM_1726788197": 1.0}
+
+    fields, stage_fields, required, reason = fill.plan_single_call_update(existing, partial, config())
+
+    assert fields == partial
+    assert stage_fields == {}
+    assert required is False
+    assert reason.startswith("analytics_fields_not_filled:")
+
+
+def test_rejected_combined_update_resends_fields_and_moves_stage_separately(monkeypatch):
+    bitrix = FakeBitrix(empty_deal())
+
+    def rejecting_call(webhook_url, method, params):
+        if method == "crm.deal.update" and "STAGE_ID" in params["fields"] and "UF_CRM_1693464904935" in params["fields"]:
+            bitrix.calls.append((method, params))
+            raise fill.BitrixApiError("Bitrix24 API error:  - stage requires fields", "", "stage requires fields")
+        return bitrix(webhook_url, method, params)
+
+    monkeypatch.setattr(fill, "bitrix_call", rejecting_call)
+
+    log = fill.apply_update(payload(deal_id=15096), config(), "https://example.invalid", optimistic=True)
+
+    assert [method for method, _ in bitrix.calls] == ["crm.deal.get", "crm.deal.update", "crm.deal.update", "crm.deal.get", "crm.deal.update"]
+    assert "STAGE_ID" not in bitrix.calls[2][1]["fields"]
+    assert bitrix.calls[4][1]["fields"] == {"STAGE_ID": "29"}
+    assert log["stage_decision"] == "reread_after_combined_update_rejected"
+    assert (log["stage_move_required"], log["stage_update"], log["status"]) == (True, "sent", "ok")
+
+
+def test_combined_update_failures_other_than_rejection_are_raised(monkeypatch):
+    bitrix = FakeBitrix(empty_deal())
+
+    def limited_call(webhook_url, method, params):
+        if method == "crm.deal.update":
+            bitrix.calls.append((method, params))
+            raise fill.BitrixApiError("Bitrix24 HTTP error 503: QUERY_LIMIT_EXCEEDED", "QUERY_LIMIT_EXCEEDED")
+        return bitrix(webhook_url, method, params)
+
+    monkeypatch.setattr(fill, "bitrix_call", limited_call)
+
+    with pytest.raises(fill.BitrixApiError):
+        fill.apply_update(payload(deal_id=15096), config(), "https://example.invalid", optimistic=True)
+    assert [method for method, _ in bitrix.calls] == ["crm.deal.get", "crm.deal.update"]
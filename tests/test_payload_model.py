@@ -0,0 +1,57 @@
+import json
+import tracemalloc
+
+from script_loader import ROOT, load
+
+
+bench = load("extraction_bench", ROOT / "bench" / "extraction_bench.py")
+batch = load("batch_44fz_results", ROOT / "scripts" / "batch_44fz_results.py")
+payload_model = batch.payload_model
+
+PAYLOADS = [bench.collect_44fz(case) for case in bench.load_corpus()]
+
+
+def test_compact_payloads_serialize_to_the_same_json(tmp_path):
+    for payload in PAYLOADS:
+        compact = payload_model.compact(payload)
+
+        assert isinstance(compact, payload_model.TenderPayload)
+        assert compact == payload
+        assert json.dumps(compact.to_dict(), ensure_ascii=False, indent=2) == json.dumps(payload, ensure_ascii=False, indent=2)
+        assert compact.get("comment") == payload["comment"] and "comment_parts" not in compact
+
+    results = [{"status": "ok", "payload": payload} for payload in PAYLOADS]
+    for output_format in batch.batch_output.OUTPUT_FORMATS:
+        texts = []
+        for name, convert in (("dict", lambda payload: payload), ("compact", payload_model.compact)):
+            output = tmp_path / f"{name}.{output_format}"
+            with batch.batch_output.BatchResultWriter(output, output_format) as writer:
+                for result in results:
+                    writer.write({**result, "payload": convert(result["payload"])})
+                writer.finish({"total": len(results)})
+            texts.append(output.read_text(encoding="utf-8"))
+        assert texts[0] == texts[1]
+
+
+def test_fan_out_and_prepare_share_the_collected_values():
+    compact = payload_model.compact(PAYLOADS[0])
+    lot = batch.fan_out(compact, {"deal_id": 7, "task_id": None})
+    prepared = batch.prepare_update(lot, {"fields": {}}, False, "update")["payload"]
+
+    assert (prepared["mode"], prepared["deal_id"], compact["mode"]) == ("update", 7, "dry_run")
+    assert prepared.comment_parts is compact.comment_parts and prepared.sources is compact.sources
+    assert payload_model.compact({"mode": "dry_run"}) == {"mode": "dry_run"}
+
+
+def test_compact_payloads_take_a_fraction_of_the_memory():
+    blobs = [json.dumps({**PAYLOADS[index % len(PAYLOADS)], "procurement_number": f"{index:019d}"}, ensure_ascii=False) for index in range(500)]
+
+    def retained(convert):
+        tracemalloc.start()
+        kept = [convert(json.loads(blob)) for blob in blobs]
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        assert len(kept) == len(blobs)
+        return size
+
+    assert retained(payload_model.compact) < retained(dict) / 2
@@ -0,0 +1,47 @@
+import importlib.util
+import types
+from pathlib import Path
+
+MODULE_PATH = Path(__file__).resolve().parents[1] / "bench" / "price_pipeline_bench.py"
+spec = importlib.util.spec_from_file_location("price_pipeline_bench", MODULE_PATH)
+bench = importlib.util.module_from_spec(spec)
+assert spec.loader is not None
+spec.loader.exec_module(bench)
+
+
+def test_synthetic_rows_follow_duplicate_ratio():
+    rows = bench.synthetic_rows(2000, 0.25, seed=1)
+    duplicates = len(rows) - len({article for article, _, _ in rows})
+
+    assert len(rows) == 2000
+    assert 400 < duplicates < 600
+
+
+def test_installed_lookup_caches_marketplace_prices():
+    class FakeResponse:
+        def __init__(self, price):
+            self.price = price
+
+        def raise_for_status(self):
+            return None
+
+        def json(self):
+            return {"price": self.price}
+
+    requested = []
+    session = types.SimpleNamespace(get=lambda url, params, headers, timeout: requested.append(params["article"]) or FakeResponse(100.0))
+    app_module = types.SimpleNamespace(price_cache={}, session=session, DEFAULT_HEADERS={})
+    stats = {"cache_hits": 0, "cache_misses": 0}
+
+    bench.install_lookup(app_module, "http://stub.invalid/price", stats)
+
+    assert app_module.process_article("A-1", 120) == (100.0, 20.0, "Цена найдена")
+    assert app_module.process_article("A-1", 90) == (100.0, -10.0, "Цена найдена")
+    assert requested == ["A-1"]
+    assert stats == {"cache_hits": 1, "cache_misses": 1}
+
+
+def test_stub_marketplace_prices_are_stable():
+    with bench.StubMarketplace(miss_ratio=0.0) as stub:
+        assert stub.lookup("A-1") == stub.lookup("A-1")
+        assert stub.requests == 2
@@ -0,0 +1,48 @@
+import re
+import time
+
+from script_loader import ROOT, load
+
+
+collect = load("collect_44fz_result", ROOT / "scripts" / "collect_44fz_result.py")
+regex_backend = collect.extraction_rules.regex_backend
+
+OLD_MONEY_RE = re.compile(r"(?<!\d)(\d{1,3}(?:[\s ]\d{3})*(?:[,.]\d{2})|\d+(?:[,.]\d{2}))(?:\s*(?:₽|руб\.?|RUB))?", re.IGNORECASE)
+
+
+def old_strip_hidden(text):
+    for pattern in (r"(?is)<script.*?</script>", r"(?is)<style.*?</style>", r"(?is)<svg.*?</svg>", r"(?is)<!--.*?-->"):
+        text = re.sub(pattern, " ", text)
+    return text
+
+
+def test_linear_stripping_and_money_pattern_match_the_old_regexes():
+    pages = [
+        "<p>a</p><SCRIPT type='x'>var a = '<style>';</Script><style>p{}</style>b<!-- c --><svg><path/></svg>",
+        "<script</script>x<!-->y-->z<script>never closed <style>s</style>",
+        "<!-- <script> -->kept</script><style>",
+        "",
+    ]
+    for page in pages:
+        assert regex_backend.strip_hidden(page) == old_strip_hidden(page)
+
+    for text in ["Цена 1 234 567,89 руб.", "x12345,67", "a1 234.00 ₽", "99,9 и 100,00", "1234567", "5 000,00 RUB"]:
+        old, new = OLD_MONEY_RE.search(text), collect.MONEY_RE.search(text)
+        assert (old and old.group(1)) == (new and new.group(1))
+
+
+def test_unclosed_blocks_and_long_digit_runs_stay_fast():
+    page = "<p>Цена контракта</p>" + "<script>" * 200_000 + "1" * 500_000
+
+    started = time.perf_counter()
+    text = collect.strip_html(page)
+    collect.first_money(text)
+    assert time.perf_counter() - started < 5
+
+
+def test_patterns_re2_rejects_fall_back_to_re():
+    pattern = regex_backend.compile(r"(?<!\d)(\d{3})", max_chars=5)
+
+    assert pattern.engine == "re"
+    assert pattern.search("ab1234567").group(1) == "123"
+    assert pattern.search("abcde123") is None  # beyond the budget of the backtracking engine
@@ -0,0 +1,115 @@
+import gzip
+import importlib.util
+import json
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+MODULE_PATH = Path(__file__).resolve().parents[1] / "bitrix_tender_results" / "bench" / "extraction_bench.py"
+spec = importlib.util.spec_from_file_location("extraction_bench", MODULE_PATH)
+bench = importlib.util.module_from_spec(spec)
+assert spec.loader is not None
+spec.loader.exec_module(bench)
+
+collect = bench.collect_44fz_result
+CASES = bench.load_corpus()
+
+
+class CorpusServer:
+    """Serves one corpus case as EIS pages, gzip-compressed when asked, in small writes."""
+
+    def __init__(self, case):
+        paths = {
+            collect.SUPPLIER_RESULTS_PATH: "supplier_html",
+            collect.PROTOCOL_MAIN_PATH: "protocol_html",
+            collect.COMMON_INFO_PATH: "common_html",
+        }
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):  # noqa: A002
+                pass
+
+            def do_GET(self):
+                key = paths[urllib.parse.urlsplit(self.path).path]
+                body = case["pages"][key].encode("utf-8")
+                gzipped = "gzip" in self.headers.get("Accept-Encoding", "")
+                if gzipped:
+                    body = gzip.compress(body)
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                if gzipped:
+                    self.send_header("Content-Encoding", "gzip")
+                self.end_headers()
+                try:
+                    for offset in range(0, len(body), 4096):
+                        self.wfile.write(body[offset:offset + 4096])
+                except OSError:
+                    pass  # the client stopped reading early
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def __enter__(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.mark.parametrize("pooled", [False, True], ids=["urllib", "pool"])
+@pytest.mark.parametrize("case", CASES, ids=[case["name"] for case in CASES])
+def test_streamed_pages_extract_the_expected_payload(case, pooled, monkeypatch):
+    expected = json.loads((case["dir"] / "expected_44fz.json").read_text(encoding="utf-8"))
+    monkeypatch.setattr(collect, "STREAM_PAGES", True)
+    monkeypatch.setattr(collect, "CONNECTION_POOL", collect.http_pool.ConnectionPool() if pooled else None)
+
+    with CorpusServer(case) as server:
+        monkeypatch.setattr(collect, "EIS_BASE", server.base_url)
+        pages, warnings = collect.fetch_44fz_pages(case["procurement_number"])
+    monkeypatch.undo()
+
+    assert warnings == []
+    assert collect.collect_44fz_from_pages(case["procurement_number"], case["deal_id"], case["task_id"], pages, warnings) == expected
+
+
+def test_stream_stops_after_targets_and_at_the_byte_cap(monkeypatch):
+    # Small reads, otherwise the whole well-compressed page arrives in the first one.
+    monkeypatch.setattr(collect, "STREAM_CHUNK_BYTES", 1024)
+    case = next(case for case in CASES if case["name"] == "huge_protocol")
+    page = case["pages"]["protocol_html"]
+
+    with CorpusServer(case) as server:
+        url = collect.build_url(collect.PROTOCOL_MAIN_PATH, case["procurement_number"])
+        url = url.replace(collect.EIS_BASE, server.base_url)
+        head, outcome = collect.fetch_url_streaming(url, collect.PAGE_TARGETS["final protocol"])
+        capped, capped_outcome = collect.fetch_url_streaming(url, max_bytes=10000)
+
+    assert outcome == "early_stop" and page.startswith(head) and len(head) < len(page) // 4
+    assert capped_outcome == "truncated" and len(capped.encode("utf-8")) <= 10000 and page.startswith(capped)
+
+
+def test_common_info_stream_reads_up_to_a_late_nmck(monkeypatch):
+    monkeypatch.setattr(collect, "STREAM_CHUNK_BYTES", 1024)
+    filler = "".join(f"<div>Сведения о лоте {index}: характеристика товара</div>" for index in range(600))
+    page = (
+        "<div>Наименование объекта закупки</div><div>Поставка бумаги</div><div>Заказчик</div><div>ГБУ Школа</div>"
+        + filler
+        + "<div>Начальная (максимальная) цена контракта</div><div>1 000 000,00 ₽</div>"
+        + filler
+    )
+    case = {"pages": {"common_html": page}}
+
+    with CorpusServer(case) as server:
+        url = collect.build_url(collect.COMMON_INFO_PATH, "0873200005426000019").replace(collect.EIS_BASE, server.base_url)
+        head, outcome = collect.fetch_url_streaming(url, collect.PAGE_TARGETS["common-info"])
+
+    assert outcome == "early_stop" and len(head) < len(page)
+    assert collect.extract_field("nmck", common=collect.strip_html(head)) == 1000000.0
@@ -0,0 +1,43 @@
+from script_loader import ROOT, load
+
+
+sync = load("sync_deals", ROOT / "scripts" / "sync_deals.py")
+mock = load("mock_bitrix_server", ROOT / "bench" / "mock_bitrix_server.py")
+
+
+def eis_requests(portal):
+    return sum(count for method, count in portal.stats()["calls"].items() if method.startswith("eis:"))
+
+
+def test_cycles_only_touch_changed_deals(tmp_path, monkeypatch):
+    config, _path, _example = sync.fill_tender_result.load_config(None)
+    portal = mock.MockPortal(3, config=config)
+    winner_field = config["fields"]["winner_name_analytics"]
+    for field in sync.analytics_field_codes(config):
+        portal.deals[10002][field] = "заполнено"
+    monkeypatch.setattr(sync.fill_tender_result, "RATE_LIMITER", None)
+
+    with mock.MockBitrixServer(portal) as server, sync.SyncState(tmp_path / "state.sqlite") as state:
+        monkeypatch.setattr(sync.collect_44fz_result, "EIS_BASE", server.base_url)
+        first = sync.run_cycle(server.webhook_url, config, state, "dry_run")
+        requests_after_first = eis_requests(portal)
+        second = sync.run_cycle(server.webhook_url, config, state, "dry_run")
+        after_dry_run = portal.deals[10000][winner_field]
+        third = sync.run_cycle(server.webhook_url, config, state, "update")
+        fourth = sync.run_cycle(server.webhook_url, config, state, "update")
+
+    assert (first["listed"], first["pending"], first["outcomes"]) == (3, 2, {"dry_run": 2})
+    assert requests_after_first == 6
+    assert second["pending"] == 2 and second["outcomes"] == {"unchanged": 2}
+    assert after_dry_run == ""
+    assert third["outcomes"] == {"ok": 2}
+    assert portal.deals[10000][winner_field] == 'ООО "ПОСТАВЩИК 0"'
+    assert (fourth["dropped"], fourth["pending"], fourth["outcomes"]) == (3, 0, {})
+
+
+def test_deal_procurement_number_prefers_configured_field():
+    config = {"deal_search": {"procurement_number_fields": ["UF_NUMBER"]}}
+
+    assert sync.deal_procurement_number({"TITLE": "ЭА 0873200005426000019", "UF_NUMBER": "0873200005426000020"}, config) == "0873200005426000020"
+    assert sync.deal_procurement_number({"TITLE": "ЭА 0873200005426000019 лот 1"}, config) == "0873200005426000019"
+    assert sync.deal_procurement_number({"TITLE": "без номера 12345"}, config) == ""
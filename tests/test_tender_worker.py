@@ -0,0 +1,59 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+
+from script_loader import ROOT, load
+
+
+worker_module = load("tender_worker", ROOT / "scripts" / "tender_worker.py")
+mock = load("mock_bitrix_server", ROOT / "bench" / "mock_bitrix_server.py")
+collect = worker_module.collect_44fz_result
+fill = worker_module.fill_tender_result
+
+
+def post(url, data):
+    request = urllib.request.Request(url, data=json.dumps(data).encode("utf-8"), headers={"Content-Type": "application/json"}, method="POST")
+    with urllib.request.urlopen(request, timeout=30) as response:
+        return response.status, json.loads(response.read())
+
+
+def test_worker_api_updates_deals_and_reuses_pages_and_connections(monkeypatch):
+    config, _path, _example = fill.load_config(None)
+    portal = mock.MockPortal(2, config=config)
+    pool = worker_module.http_pool.ConnectionPool()
+    monkeypatch.setattr(collect, "CONNECTION_POOL", pool)
+    monkeypatch.setattr(fill, "CONNECTION_POOL", pool)
+    monkeypatch.setattr(fill, "RATE_LIMITER", None)
+
+    with mock.MockBitrixServer(portal) as bitrix:
+        monkeypatch.setattr(collect, "EIS_BASE", bitrix.base_url)
+        worker = worker_module.TenderWorker(config, webhook_url=bitrix.webhook_url, fetch_threads=1)
+        server = worker_module.ThreadingHTTPServer(("127.0.0.1", 0), worker_module.make_handler(worker, "dry_run"))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        api = f"http://127.0.0.1:{server.server_address[1]}"
+        try:
+            items = [{"procurement_number": mock.tender_number(index), "deal_id": 10000 + index} for index in range(2)]
+            status, body = post(f"{api}/items", {"items": items, "mode": "update", "wait": True})
+            eis_calls = sum(count for method, count in portal.stats()["calls"].items() if method.startswith("eis:"))
+            _status, again = post(f"{api}/items", {**items[0], "mode": "dry_run", "wait": True})
+            try:
+                post(f"{api}/items", {"items": [{"procurement_number": "123"}]})
+            except urllib.error.HTTPError as exc:
+                rejected = (exc.code, json.loads(exc.read())["error"])
+            with urllib.request.urlopen(f"{api}/health", timeout=30) as response:
+                health = json.loads(response.read())
+        finally:
+            server.shutdown()
+            server.server_close()
+            worker.close()
+        stats = portal.stats()
+
+    assert status == 200
+    assert [job["result"]["status"] for job in body["results"]] == ["ok", "ok"]
+    assert portal.deals[10000][config["fields"]["winner_name_analytics"]]
+    assert again["results"][0]["result"]["status"] == "dry_run"
+    assert sum(count for method, count in stats["calls"].items() if method.startswith("eis:")) == eis_calls
+    assert rejected == (400, "validation_error")
+    assert health["page_cache"] == {"entries": 2, "hits": 1, "misses": 2}
+    assert pool.opened < eis_calls
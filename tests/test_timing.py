@@ -0,0 +1,65 @@
+import json
+
+from script_loader import ROOT, load
+
+
+fill_batch = load("fill_batch_payload", ROOT / "scripts" / "fill_batch_payload.py")
+mock = load("mock_bitrix_server", ROOT / "bench" / "mock_bitrix_server.py")
+timing = fill_batch.timing
+
+
+def test_spans_are_dropped_while_disabled():
+    calls = []
+    traced = timing.timed("work")(lambda value: calls.append(value) or value * 2)
+
+    with timing.recording() as spans:
+        assert timing.span("work") is timing.NO_SPAN
+        assert traced(21) == 42
+
+    assert spans == {}
+    assert calls == [21]
+    assert timing.call_recorded(traced, 1) == (2, {})
+
+
+def test_spans_accumulate_per_name_and_summarize(monkeypatch):
+    monkeypatch.setattr(timing, "ENABLED", True)
+    traced = timing.timed("work")(lambda: None)
+
+    with timing.recording() as first:
+        traced()
+        traced()
+        with timing.span("bitrix_call", "crm.deal.get"):
+            pass
+    assert timing.span("outside") is timing.NO_SPAN
+
+    assert {name: count for name, (count, _seconds) in first.items()} == {"work": 2, "bitrix_call:crm.deal.get": 1}
+    summary = timing.summarize([first, {"work": [1, 0.010]}])
+    assert summary["work"]["items"] == 2
+    assert summary["work"]["calls"] == 3
+    assert summary["work"]["p99_ms"] == 10.0
+    assert summary["bitrix_call:crm.deal.get"]["items"] == 1
+
+
+def test_batch_results_carry_timings_when_enabled(tmp_path, monkeypatch):
+    config, _path, _example = fill_batch.fill_tender_result.load_config(None)
+    portal = mock.MockPortal(3, config=config)
+    items = [
+        {"deal_id": 10000 + index, "procurement_number": portal.deals[10000 + index]["TITLE"].split()[1], "winner_name": "ООО \"ПОСТАВЩИК\"",
+         "winner_price": 1000 + index, "participants_count": 2, "result_status": "ok", "price_basis": "contract_price"}
+        for index in range(3)
+    ]
+    payload_path = tmp_path / "payload.json"
+    payload_path.write_text(json.dumps({"mode": "update", "items": items}, ensure_ascii=False), encoding="utf-8")
+    output = tmp_path / "results.ndjson"
+    monkeypatch.setattr(timing, "ENABLED", False)
+
+    with mock.MockBitrixServer(portal) as server:
+        monkeypatch.setenv("BITRIX_WEBHOOK_URL", server.webhook_url)
+        fill_batch.main(["--payload-json", str(payload_path), "--output", str(output), "--output-format", "ndjson", "--rate-limit", "0", "--timings"])
+
+    lines = [json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()]
+    results, summary = lines[:-1], lines[-1]
+    assert [result["status"] for result in results] == ["ok", "ok", "ok"]
+    assert {"apply_update", "resolve_deal_id", "bitrix_call:crm.deal.update"} <= set(results[0]["timings"])
+    assert summary["timings"]["per_item"]["apply_update"]["items"] == 3
+    assert summary["timings"]["per_run"]["bitrix_call:batch"]["count"] == 1